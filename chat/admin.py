@@ -1,6 +1,10 @@
 # Bu kodlarni admin.py fayliga qo'shing
 from django.contrib import admin
-from .models import ChatRoom, Message, MessageReadReceipt
+from django.db.models import Q
+from django.utils import timezone
+
+from . import search
+from .models import ChatRoom, Message, ChatReadState
 
 @admin.register(ChatRoom)
 class ChatRoomAdmin(admin.ModelAdmin):
@@ -15,12 +19,32 @@ class MessageAdmin(admin.ModelAdmin):
     list_filter = ('is_read', 'created_at')
     search_fields = ('content', 'sender__username')
     
+    def get_search_results(self, request, queryset, search_term):
+        # content bo'yicha LIKE '%..%' o'rniga FTS5 indeksi
+        if not search_term or not search.fts_available():
+            return super().get_search_results(request, queryset, search_term)
+        ids = search.matching_ids(search_term)
+        condition = Q(sender__username__icontains=search_term)
+        if ids is not None:
+            condition |= Q(id__in=ids)
+        return queryset.filter(condition), False
+    
+    # Xabar o'chirilsa xona updated_at'i yangilanadi - watermark va ETag'lar eskiradi
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        ChatRoom.objects.filter(id=obj.chat_room_id).update(updated_at=timezone.now())
+    
+    def delete_queryset(self, request, queryset):
+        room_ids = list(queryset.values_list('chat_room_id', flat=True).distinct())
+        super().delete_queryset(request, queryset)
+        ChatRoom.objects.filter(id__in=room_ids).update(updated_at=timezone.now())
+    
     def content_preview(self, obj):
         return obj.content[:50]
     content_preview.short_description = 'Xabar'
 
-@admin.register(MessageReadReceipt)
-class MessageReadReceiptAdmin(admin.ModelAdmin):
-    list_display = ('message', 'user', 'read_at')
-    list_filter = ('read_at',)
-    search_fields = ('user__username', 'message__content')
\ No newline at end of file
+@admin.register(ChatReadState)
+class ChatReadStateAdmin(admin.ModelAdmin):
+    list_display = ('user', 'chat_room', 'last_read_id', 'unread_count', 'updated_at')
+    list_filter = ('updated_at',)
+    search_fields = ('user__username', 'chat_room__name')
\ No newline at end of file
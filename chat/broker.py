@@ -0,0 +1,207 @@
+"""Chat xabarlarini real vaqtda tarqatish uchun pub/sub backendlar.
+
+``send_message`` yangi xabarni ``get_broker().publish(room_id, payload)``
+orqali e'lon qiladi, WebSocket ulanishlari esa ``subscribe(room_id)``
+orqali shu xonaga obuna bo'ladi.
+
+Backend ``settings.CHAT_BROKER`` orqali tanlanadi::
+
+    CHAT_BROKER = {
+        'BACKEND': 'chat.broker.InMemoryBroker',
+        'OPTIONS': {},
+    }
+
+``InMemoryBroker`` bitta jarayon ichida ishlaydi. Bir nechta worker bo'lsa
+``RedisBroker`` (yoki shu interfeysdagi boshqa backend) ishlatiladi.
+
+Async kod ``await broker.apublish(...)`` ni chaqiradi - tarmoq orqali
+e'lon qiluvchi backend event loop'ni to'xtatib qo'ymasligi uchun. Har bir
+obunachi navbati ``queue_size`` bilan cheklangan: navbati to'lgan (sekin)
+obunachi uziladi va ``get()`` ``None`` qaytaradi - mijoz qayta ulanib,
+qolgan xabarlarni ``get_messages`` orqali oladi.
+"""
+import asyncio
+import json
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+DEFAULT_BROKER = {
+    'BACKEND': 'chat.broker.InMemoryBroker',
+    'OPTIONS': {},
+}
+
+
+# Obunachi navbatidagi o'qilmagan xabarlar chegarasi
+DEFAULT_QUEUE_SIZE = 100
+
+
+class Subscription:
+    """Bitta xonaga obuna: xabarlar cheklangan asyncio navbatiga tushadi"""
+
+    def __init__(self, broker, room_id, queue_size=DEFAULT_QUEUE_SIZE):
+        self.broker = broker
+        self.room_id = room_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+
+    def deliver(self, payload):
+        # publish() istalgan oqimdan chaqirilishi mumkin
+        try:
+            self.loop.call_soon_threadsafe(self._put, payload)
+        except RuntimeError:
+            # Event loop yopilgan - obunachi allaqachon ketgan
+            self.close()
+
+    def _put(self, payload):
+        if self.dropped:
+            return
+        try:
+            self.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            # Sekin obunachi: obunani yopib, kutayotgan get() ni None bilan uyg'otish
+            self.dropped = True
+            self.close()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    async def get(self):
+        """Keyingi xabar; obunachi uzilgan bo'lsa None"""
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+
+class BaseBroker:
+    """Pub/sub backend interfeysi"""
+
+    # Boshqa jarayonlarda e'lon qilingan xabarlarni ham yetkazadimi
+    cross_process = False
+
+    def __init__(self, **options):
+        self.options = options
+
+    def publish(self, room_id, payload):
+        raise NotImplementedError
+
+    async def apublish(self, room_id, payload):
+        """Async kod uchun: bloklovchi ``publish`` alohida oqimda"""
+        await sync_to_async(self.publish, thread_sensitive=False)(room_id, payload)
+
+    def subscribe(self, room_id):
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+
+class InMemoryBroker(BaseBroker):
+    """Jarayon ichidagi pub/sub (bitta ASGI worker uchun)"""
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+
+    def subscribe(self, room_id):
+        subscription = Subscription(self, int(room_id), self.options.get('queue_size', DEFAULT_QUEUE_SIZE))
+        with self._lock:
+            self._subscriptions.setdefault(subscription.room_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            room_subscriptions = self._subscriptions.get(subscription.room_id)
+            if room_subscriptions is None:
+                return
+            room_subscriptions.discard(subscription)
+            if not room_subscriptions:
+                del self._subscriptions[subscription.room_id]
+
+    def publish(self, room_id, payload):
+        self.fan_out(int(room_id), payload)
+
+    async def apublish(self, room_id, payload):
+        # fan_out bloklamaydi - oqimga o'tkazish shart emas
+        self.publish(room_id, payload)
+
+    def fan_out(self, room_id, payload):
+        """Xabarni shu jarayondagi obunachilarga yetkazish"""
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(room_id, ()))
+        for subscription in subscriptions:
+            subscription.deliver(payload)
+
+
+class RedisBroker(InMemoryBroker):
+    """Redis PUBLISH/SUBSCRIBE orqali workerlar o'rtasida tarqatish.
+
+    Har bir jarayon bitta fon oqimida ``<prefix>:*`` kanallarini tinglaydi
+    va kelgan xabarlarni o'zining obunachilariga yetkazadi.
+    """
+
+    cross_process = True
+
+    def __init__(self, url='redis://localhost:6379/0', prefix='chat:room', **options):
+        super().__init__(**options)
+        import redis
+
+        self.prefix = prefix
+        self.client = redis.Redis.from_url(url)
+        self._listener = None
+
+    def subscribe(self, room_id):
+        self._ensure_listener()
+        return super().subscribe(room_id)
+
+    def publish(self, room_id, payload):
+        self.client.publish(f'{self.prefix}:{int(room_id)}', json.dumps(payload))
+
+    async def apublish(self, room_id, payload):
+        # Tarmoq so'rovi - BaseBroker.apublish orqali alohida oqimda
+        await BaseBroker.apublish(self, room_id, payload)
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is not None:
+                return
+            self._listener = threading.Thread(target=self._listen, name='chat-redis-broker', daemon=True)
+            self._listener.start()
+
+    def _listen(self):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.psubscribe(f'{self.prefix}:*')
+        for item in pubsub.listen():
+            channel = item['channel']
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            room_id = int(channel.rsplit(':', 1)[1])
+            self.fan_out(room_id, json.loads(item['data']))
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Sozlamalardagi broker nusxasini qaytaradi (jarayon uchun bitta)"""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                config = getattr(settings, 'CHAT_BROKER', DEFAULT_BROKER)
+                backend = import_string(config.get('BACKEND', DEFAULT_BROKER['BACKEND']))
+                _broker = backend(**config.get('OPTIONS', {}))
+    return _broker
@@ -0,0 +1,113 @@
+"""Kontaktlar indeksi - "kim bilan yozisha olaman" (users_list uchun).
+
+Har bir foydalanuvchi uchun ``settings.CACHES['contacts']`` da yozuv:
+``{'contacts': {user_id: (group_id, ...)}, 'groups': {group_id: name}}`` -
+kontakt va u bilan umumiy guruhlar. Guruh tarkibi, o'qituvchi yoki guruh
+nomi o'zgarganda ``chat.signals`` faqat shu guruh a'zolarining yozuvlarini
+o'chiradi; keyingi so'rovda yozuv ikki so'rov bilan qayta quriladi.
+
+Qoidalar: o'quvchi - guruhdoshlari va guruhlari o'qituvchilari, o'qituvchi -
+guruhlaridagi o'quvchilar, admin - hamma (indekssiz, to'g'ridan-to'g'ri
+so'rov), boshqalar - hech kim.
+"""
+from django.core.cache import caches
+from django.db.models import Q
+
+from erp.models import Group, GroupStudent, User
+
+
+CACHE_ALIAS = 'contacts'
+
+SEARCH_FIELDS = ('first_name', 'last_name', 'username')
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _key(user_id):
+    return f'contacts:{user_id}'
+
+
+def invalidate_users(user_ids):
+    user_ids = {user_id for user_id in user_ids if user_id}
+    if user_ids:
+        _cache().delete_many([_key(user_id) for user_id in user_ids])
+
+
+def invalidate_group(group_id, extra_user_ids=()):
+    """Guruhning barcha a'zolari (o'qituvchi + o'quvchilar) indeksini eskirtirish"""
+    member_ids = set(GroupStudent.objects.filter(group_id=group_id).values_list('student_id', flat=True))
+    member_ids.update(Group.objects.filter(pk=group_id).values_list('teacher_id', flat=True))
+    member_ids.update(extra_user_ids)
+    invalidate_users(member_ids)
+
+
+def _build(user):
+    if user.role == 'student':
+        groups = Group.objects.filter(group_students__student=user)
+    elif user.role == 'teacher':
+        groups = Group.objects.filter(teacher=user)
+    else:
+        return {'contacts': {}, 'groups': {}}
+
+    group_rows = list(groups.values_list('id', 'name', 'teacher_id'))
+    contacts = {}
+    if user.role == 'student':
+        for group_id, _, teacher_id in group_rows:
+            if teacher_id:
+                contacts.setdefault(teacher_id, []).append(group_id)
+    members = GroupStudent.objects.filter(
+        group_id__in=[row[0] for row in group_rows]
+    ).exclude(student=user).values_list('student_id', 'group_id')
+    for student_id, group_id in members:
+        contacts.setdefault(student_id, []).append(group_id)
+
+    return {
+        'contacts': {contact_id: tuple(group_ids) for contact_id, group_ids in contacts.items()},
+        'groups': {group_id: name for group_id, name, _ in group_rows},
+    }
+
+
+def get_index(user):
+    return _cache().get_or_set(_key(user.id), lambda: _build(user))
+
+
+def contacts_queryset(user, index, query=None):
+    """Foydalanuvchi yozisha oladiganlar, ``query`` bo'yicha filtrlangan"""
+    if user.role == 'admin':
+        users = User.objects.exclude(id=user.id)
+    else:
+        users = User.objects.filter(id__in=list(index['contacts']))
+    for term in (query or '').split():
+        condition = Q()
+        for field in SEARCH_FIELDS:
+            condition |= Q(**{f'{field}__icontains': term})
+        users = users.filter(condition)
+    return users
+
+
+def attach_group_labels(user, people, index):
+    """Har bir odamga ``group_labels`` (umumiy guruhlar nomi) qo'shish.
+
+    Oddiy foydalanuvchi uchun indeksdan (so'rovsiz), admin uchun sahifadagi
+    odamlar bo'yicha bitta so'rov bilan.
+    """
+    if user.role == 'admin':
+        labels = {}
+        rows = GroupStudent.objects.filter(
+            student__in=people
+        ).order_by().values_list('student_id', 'group__name').union(
+            Group.objects.filter(teacher__in=people).order_by().values_list('teacher_id', 'name'),
+            all=True,
+        )
+        for person_id, name in rows:
+            labels.setdefault(person_id, []).append(name)
+    else:
+        labels = {
+            person.id: [index['groups'][group_id] for group_id in index['contacts'].get(person.id, ())]
+            for person in people
+        }
+    for person in people:
+        person.group_labels = sorted(labels.get(person.id, []))
+    return people
@@ -0,0 +1,154 @@
+import asyncio
+import io
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from chat.models import ChatRoom
+
+
+HOST = 'testserver'
+
+
+class Command(BaseCommand):
+    help = (
+        "Chat view'larini bir vaqtda ko'p mijoz bilan ASGI (conf.asgi) va WSGI (conf.wsgi, "
+        "--threads ta worker thread) orqali o'lchash. Ikki holat: oddiy so'rovlar to'lqini va "
+        "kutayotgan long-polling ulanishlari fonida oddiy so'rovlar kechikishi. "
+        "Ma'lumotlar uchun avval: manage.py generate_data"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=100, help="Bir vaqtdagi so'rovlar soni")
+        parser.add_argument('--threads', type=int, default=8, help="WSGI worker thread'lari soni")
+        parser.add_argument('--pollers', type=int, default=32, help="Kutayotgan long-polling ulanishlari")
+        parser.add_argument('--wait', type=int, default=3, help="Long-polling kutish vaqti (soniya)")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        room = ChatRoom.objects.annotate(size=Count('messages')).order_by('-size').first()
+        if room is None:
+            raise CommandError("Ma'lumot yo'q. Avval: python manage.py generate_data")
+        last_message_id = room.messages.order_by('-id').values_list('id', flat=True).first() or 0
+
+        client = Client()
+        client.force_login(room.participants.first())
+        cookie = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+
+        messages_url = f"{reverse('get_messages', args=[room.id])}?last_message_id={last_message_id}"
+        poll_url = f"{messages_url}&wait={options['wait']}"
+        clients = options['clients']
+        pollers = options['pollers']
+
+        from conf.asgi import application as asgi_app
+        from conf.wsgi import application as wsgi_app
+
+        servers = (
+            ('ASGI', AsgiRunner(asgi_app, cookie)),
+            (f"WSGI x{options['threads']}", WsgiRunner(wsgi_app, cookie, options['threads'])),
+        )
+        for label, runner in servers:
+            runner.run([messages_url] * 3)  # isitish
+
+            self.report(f'{label:<10} {clients} x get_messages', runner.run([messages_url] * clients))
+
+            # Long-polling javoblari hisobga olinmaydi - faqat ular fonidagi oddiy so'rovlar
+            latencies = runner.run([poll_url] * pollers + [messages_url] * clients)[pollers:]
+            self.report(f'{label:<10} {pollers} long-poll + {clients} x get_messages', latencies)
+
+    def report(self, title, latencies):
+        """Barcha so'rovlar bir vaqtda yuborilgan - oxirgi javob vaqti jami vaqtga teng"""
+        latencies = sorted(latency * 1000 for latency in latencies)
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        elapsed = latencies[-1] / 1000
+        self.stdout.write(
+            f"{title:<48} jami {elapsed:>6.2f} s  p50 {statistics.median(latencies):>8.1f} ms  "
+            f"p99 {p99:>8.1f} ms  {len(latencies) / elapsed:>7.1f} so'rov/s"
+        )
+
+
+class AsgiRunner:
+    """So'rovlarni bitta event loop'da bir vaqtda ASGI ilovaga yuborish"""
+
+    def __init__(self, app, cookie):
+        self.app = app
+        self.cookie = cookie
+
+    async def request(self, url):
+        parts = urlsplit(url)
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': 'GET', 'scheme': 'http', 'path': parts.path, 'raw_path': parts.path.encode(),
+            'query_string': parts.query.encode(), 'root_path': '',
+            'headers': [(b'host', HOST.encode()), (b'cookie', self.cookie.encode())],
+            'client': ('127.0.0.1', 0), 'server': (HOST, 80),
+        }
+        received = False
+        status = None
+
+        async def receive():
+            nonlocal received
+            if not received:
+                received = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            # Mijoz uzilmaydi - Django javobni yuborgach bu kutishni bekor qiladi
+            await asyncio.Future()
+
+        async def send(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+
+        started = time.perf_counter()
+        await self.app(scope, receive, send)
+        if status != 200:
+            raise CommandError(f'{url}: HTTP {status}')
+        return time.perf_counter() - started
+
+    def run(self, urls):
+        async def main():
+            return await asyncio.gather(*(self.request(url) for url in urls))
+        return asyncio.run(main())
+
+
+class WsgiRunner:
+    """WSGI server modeli: so'rovlar navbatda, ``threads`` ta thread ularni bajaradi"""
+
+    def __init__(self, app, cookie, threads):
+        self.app = app
+        self.cookie = cookie
+        self.threads = threads
+
+    def request(self, url, queued_at):
+        parts = urlsplit(url)
+        environ = {
+            'REQUEST_METHOD': 'GET', 'PATH_INFO': parts.path, 'QUERY_STRING': parts.query,
+            'SERVER_NAME': HOST, 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': HOST, 'HTTP_COOKIE': self.cookie, 'REMOTE_ADDR': '127.0.0.1',
+            'wsgi.input': io.BytesIO(), 'wsgi.errors': io.StringIO(), 'wsgi.url_scheme': 'http',
+            'wsgi.version': (1, 0), 'wsgi.multithread': True, 'wsgi.multiprocess': False, 'wsgi.run_once': False,
+        }
+        statuses = []
+        response = self.app(environ, lambda status, headers, exc_info=None: statuses.append(status))
+        try:
+            for _ in response:
+                pass
+        finally:
+            response.close()
+        if not statuses[0].startswith('200'):
+            raise CommandError(f'{url}: HTTP {statuses[0]}')
+        # Navbatda kutilgan vaqt ham mijoz kechikishiga kiradi
+        return time.perf_counter() - queued_at
+
+    def run(self, urls):
+        with ThreadPoolExecutor(max_workers=self.threads) as pool:
+            futures = [pool.submit(self.request, url, time.perf_counter()) for url in urls]
+            return [future.result() for future in futures]
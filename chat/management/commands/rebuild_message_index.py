@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from chat.search import fts_available, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Xabarlar qidiruv indeksini (FTS5) chat_message jadvalidan qayta qurish"
+
+    def handle(self, *args, **options):
+        if not fts_available():
+            raise CommandError("FTS5 indeksi faqat SQLite bazasida ishlaydi")
+        rebuild_index()
+        self.stdout.write(self.style.SUCCESS("Qidiruv indeksi qayta qurildi"))
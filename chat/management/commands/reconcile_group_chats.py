@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from chat.membership import reconcile
+from erp.models import Group
+
+
+class Command(BaseCommand):
+    help = (
+        "Guruh chatlari ishtirokchilarini guruh tarkibiga (o'qituvchi + o'quvchilar) keltirish. "
+        "Signalsiz o'zgarishlardan (bulk_create, QuerySet.delete) keyin ishga tushiring"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--group', type=int, action='append', dest='groups', help="Faqat shu guruh(lar) id si")
+
+    def handle(self, *args, **options):
+        groups = Group.objects.all()
+        if options['groups']:
+            groups = groups.filter(id__in=options['groups'])
+        created, added, removed = reconcile(groups)
+        self.stdout.write(self.style.SUCCESS(
+            f"Yaratilgan xonalar: {created}, qo'shilgan: {added}, olib tashlangan: {removed}"
+        ))
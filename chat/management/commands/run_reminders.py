@@ -0,0 +1,62 @@
+import signal
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from chat import reminders
+from erp import counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Eslatmalar worker'i: yaqinlashayotgan vazifa muddatlari va support darslari haqida "
+        "chat xabarlari yuboradi, kutilayotgan vazifalar sonini yangilaydi. --once - bitta aylanish (cron uchun)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=int, default=60, help='Eslatmalarni tekshirish oralig\'i (soniya)')
+        parser.add_argument(
+            '--reconcile-interval', type=int, default=300,
+            help="Muddati o'tgan vazifalarni sondan chiqarish oralig'i (soniya)",
+        )
+        parser.add_argument('--once', action='store_true', help='Har bir vazifani bir marta bajarib chiqish')
+
+    def handle(self, *args, **options):
+        jobs = [
+            ['vazifa eslatmalari', reminders.send_homework_reminders, options['interval'], 0],
+            ['dars eslatmalari', reminders.send_support_reminders, options['interval'], 0],
+            ['kutilayotgan vazifalar', lambda: len(counters.reconcile()), options['reconcile_interval'], 0],
+        ]
+        if options['once']:
+            for job in jobs:
+                self.run_job(job)
+            return
+
+        stopping = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stopping.set())
+        self.stdout.write(f"Worker ishga tushdi (har {options['interval']}s)")
+
+        while not stopping.is_set():
+            for job in jobs:
+                if time.monotonic() >= job[3]:
+                    self.run_job(job)
+                    job[3] = time.monotonic() + job[2]
+            stopping.wait(max(0, min(job[3] for job in jobs) - time.monotonic()))
+        self.stdout.write("Worker to'xtatildi")
+
+    def run_job(self, job):
+        name, func = job[0], job[1]
+        # Uzoq ishlaydigan jarayon: uzilgan/eskirgan ulanishlarni yopish
+        close_old_connections()
+        try:
+            count = func()
+        except Exception as error:  # noqa: BLE001 - bitta xato worker'ni to'xtatmasin
+            self.stderr.write(f'{name}: xato - {error!r}')
+        else:
+            if count:
+                self.stdout.write(f'{name}: {count}')
+        finally:
+            close_old_connections()
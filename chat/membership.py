@@ -0,0 +1,92 @@
+"""Guruh chatlari ishtirokchilarini guruh tarkibi bilan moslash.
+
+Guruh chati ishtirokchilari = guruh o'qituvchisi + guruh o'quvchilari
+(+ chatga o'zi kirgan adminlar). ``chat.signals`` ``GroupStudent`` va
+``Group.teacher`` o'zgarishlarini shu yerdagi funksiyalar orqali
+xonaga o'tkazadi. Signalsiz o'zgarishlar (``bulk_create``, ``QuerySet.delete``,
+to'g'ridan-to'g'ri SQL) uchun: ``manage.py reconcile_group_chats``.
+"""
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from erp.models import Group, GroupStudent, User
+
+from .models import ChatRoom
+
+
+def room_name(group):
+    return f"{group.name} Chat"
+
+
+def expected_member_ids(group):
+    member_ids = set(GroupStudent.objects.filter(group=group).values_list('student_id', flat=True))
+    if group.teacher_id:
+        member_ids.add(group.teacher_id)
+    return member_ids
+
+
+def get_group_room(group):
+    """Guruh chatini olish yoki barcha a'zolari bilan yaratish"""
+    chat_room = ChatRoom.objects.filter(group=group, room_type='group').first()
+    if chat_room is not None:
+        return chat_room
+    try:
+        with transaction.atomic():
+            chat_room = ChatRoom.objects.create(group=group, room_type='group', name=room_name(group))
+            chat_room.participants.add(*expected_member_ids(group))
+    except IntegrityError:
+        # Parallel so'rov xonani allaqachon yaratdi
+        chat_room = ChatRoom.objects.get(group=group, room_type='group')
+    return chat_room
+
+
+def add_members(group_id, user_ids):
+    chat_room = ChatRoom.objects.filter(group_id=group_id, room_type='group').first()
+    if chat_room is None:
+        # Xona hali yo'q - yaratilganda barcha a'zolar qo'shiladi
+        get_group_room(Group.objects.get(pk=group_id))
+    else:
+        chat_room.participants.add(*user_ids)
+
+
+def remove_members(group_id, user_ids):
+    chat_room = ChatRoom.objects.filter(group_id=group_id, room_type='group').first()
+    if chat_room is not None:
+        chat_room.participants.remove(*user_ids)
+
+
+def reconcile(groups=None):
+    """Xonalarni guruh tarkibiga keltirish (``groups`` - Group queryset).
+
+    (yaratilgan, qo'shilgan, olib tashlangan) sonlarini qaytaradi.
+    """
+    groups = Group.objects.all() if groups is None else groups
+    rooms = {
+        room.group_id: room
+        for room in ChatRoom.objects.filter(room_type='group', group__in=groups)
+    }
+    admin_ids = set(User.objects.filter(role='admin').values_list('id', flat=True))
+    Membership = ChatRoom.participants.through
+
+    created = added = removed = 0
+    for group in groups.iterator():
+        chat_room = rooms.get(group.id)
+        if chat_room is None:
+            get_group_room(group)
+            created += 1
+            continue
+
+        expected = expected_member_ids(group)
+        current = set(Membership.objects.filter(chatroom=chat_room).values_list('user_id', flat=True))
+        missing = expected - current
+        extra = current - expected - admin_ids
+        with transaction.atomic():
+            if missing:
+                chat_room.participants.add(*missing)
+            if extra:
+                chat_room.participants.remove(*extra)
+            if chat_room.name != room_name(group):
+                ChatRoom.objects.filter(pk=chat_room.pk).update(name=room_name(group), updated_at=timezone.now())
+        added += len(missing)
+        removed += len(extra)
+    return created, added, removed
@@ -0,0 +1,61 @@
+# Generated by Django 6.0.1 on 2026-10-18 09:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def collapse_read_receipts(apps, schema_editor):
+    """MessageReadReceipt qatorlarini (xona, foydalanuvchi) watermark'iga yig'ish"""
+    ChatRoom = apps.get_model('chat', 'ChatRoom')
+    Message = apps.get_model('chat', 'Message')
+    MessageReadReceipt = apps.get_model('chat', 'MessageReadReceipt')
+    ChatReadState = apps.get_model('chat', 'ChatReadState')
+
+    watermarks = {
+        (row['message__chat_room'], row['user']): row['last_read_id']
+        for row in MessageReadReceipt.objects.values('message__chat_room', 'user').annotate(
+            last_read_id=models.Max('message_id')
+        )
+    }
+
+    states = []
+    memberships = ChatRoom.participants.through.objects.values_list('chatroom_id', 'user_id')
+    for room_id, user_id in memberships.iterator():
+        last_read_id = watermarks.get((room_id, user_id), 0)
+        unread_count = Message.objects.filter(
+            chat_room_id=room_id, id__gt=last_read_id
+        ).exclude(sender_id=user_id).count()
+        states.append(ChatReadState(
+            chat_room_id=room_id, user_id=user_id, last_read_id=last_read_id, unread_count=unread_count
+        ))
+        if len(states) >= 1000:
+            ChatReadState.objects.bulk_create(states, ignore_conflicts=True)
+            states = []
+    ChatReadState.objects.bulk_create(states, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatReadState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_read_id', models.BigIntegerField(default=0)),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('chat_room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='read_states', to='chat.chatroom')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chat_read_states', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('chat_room', 'user')},
+            },
+        ),
+        migrations.RunPython(collapse_read_receipts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 6.0.1 on 2026-10-18 09:00
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0002_chatreadstate'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='MessageReadReceipt',
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-18 18:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0003_delete_messagereadreceipt'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['chat_room', 'created_at', 'id'], name='chat_message_room_created_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 6.0.1 on 2026-10-18 09:30
+
+from django.db import migrations
+
+
+FORWARD_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS chat_message_fts USING fts5(
+        content, content='chat_message', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS chat_message_fts_ai AFTER INSERT ON chat_message BEGIN
+        INSERT INTO chat_message_fts(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS chat_message_fts_ad AFTER DELETE ON chat_message BEGIN
+        INSERT INTO chat_message_fts(chat_message_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS chat_message_fts_au AFTER UPDATE OF content ON chat_message BEGIN
+        INSERT INTO chat_message_fts(chat_message_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO chat_message_fts(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+    "INSERT INTO chat_message_fts(chat_message_fts) VALUES ('rebuild')",
+]
+
+BACKWARD_SQL = [
+    "DROP TRIGGER IF EXISTS chat_message_fts_ai",
+    "DROP TRIGGER IF EXISTS chat_message_fts_ad",
+    "DROP TRIGGER IF EXISTS chat_message_fts_au",
+    "DROP TABLE IF EXISTS chat_message_fts",
+]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        # FTS5 faqat SQLite'da - boshqa bazalarda qidiruv icontains'ga o'tadi
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0004_message_room_created_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(run(FORWARD_SQL), run(BACKWARD_SQL)),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 6.0.1 on 2026-10-18 18:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_private_pairs(apps, schema_editor):
+    """Shaxsiy xonalarga kalit yozish, bir juftlikning takroriy xonalarini birlashtirish.
+
+    Eng eski xona qoladi: takroriylarning xabarlari unga ko'chiriladi, o'qilmaganlar
+    soni qayta hisoblanadi, takroriy xonalar o'chiriladi. Ishtirokchilari ikki
+    kishi bo'lmagan xonalar kalitsiz qoladi.
+    """
+    ChatRoom = apps.get_model('chat', 'ChatRoom')
+    Message = apps.get_model('chat', 'Message')
+    ChatReadState = apps.get_model('chat', 'ChatReadState')
+    Membership = ChatRoom.participants.through
+
+    members = {}
+    memberships = Membership.objects.filter(chatroom__room_type='private').values_list('chatroom_id', 'user_id')
+    for room_id, user_id in memberships.iterator():
+        members.setdefault(room_id, set()).add(user_id)
+
+    pairs = {}
+    for room_id in ChatRoom.objects.filter(room_type='private').order_by('created_at', 'id').values_list('id', flat=True):
+        user_ids = members.get(room_id, ())
+        if len(user_ids) == 2:
+            pairs.setdefault(tuple(sorted(user_ids)), []).append(room_id)
+
+    for (low, high), room_ids in pairs.items():
+        keeper, duplicates = room_ids[0], room_ids[1:]
+        if duplicates:
+            Message.objects.filter(chat_room_id__in=duplicates).update(chat_room_id=keeper)
+            ChatRoom.objects.filter(id__in=duplicates).delete()
+            for state in ChatReadState.objects.filter(chat_room_id=keeper):
+                state.unread_count = Message.objects.filter(
+                    chat_room_id=keeper, id__gt=state.last_read_id
+                ).exclude(sender_id=state.user_id).count()
+                state.save(update_fields=['unread_count'])
+        ChatRoom.objects.filter(id=keeper).update(min_user_id=low, max_user_id=high)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0005_message_fts'),
+        ('erp', '0002_alter_user_avatar'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatroom',
+            name='max_user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='min_user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_private_pairs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='chatroom',
+            constraint=models.UniqueConstraint(condition=models.Q(('room_type', 'private')), fields=('min_user', 'max_user'), name='chat_private_pair_unique'),
+        ),
+    ]
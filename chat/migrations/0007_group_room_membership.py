@@ -0,0 +1,82 @@
+# Generated by Django 6.0.1 on 2026-10-18 18:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def sync_group_rooms(apps, schema_editor):
+    """Har bir guruhga bitta chat: takroriylarni birlashtirish, a'zolarni moslash.
+
+    Ishtirokchilar = o'qituvchi + o'quvchilar + xonadagi adminlar. Yangi
+    ishtirokchiga ChatReadState yoziladi (xonadagi barcha xabarlar o'qilmagan).
+    """
+    Group = apps.get_model('erp', 'Group')
+    GroupStudent = apps.get_model('erp', 'GroupStudent')
+    User = apps.get_model('erp', 'User')
+    ChatRoom = apps.get_model('chat', 'ChatRoom')
+    Message = apps.get_model('chat', 'Message')
+    ChatReadState = apps.get_model('chat', 'ChatReadState')
+    Membership = ChatRoom.participants.through
+
+    admin_ids = set(User.objects.filter(role='admin').values_list('id', flat=True))
+    students = {}
+    for group_id, student_id in GroupStudent.objects.values_list('group_id', 'student_id').iterator():
+        students.setdefault(group_id, set()).add(student_id)
+
+    rooms = {}
+    for room in ChatRoom.objects.filter(room_type='group', group__isnull=False).order_by('created_at', 'id'):
+        rooms.setdefault(room.group_id, []).append(room)
+
+    for group in Group.objects.all().iterator():
+        group_rooms = rooms.get(group.id, [])
+        if group_rooms:
+            chat_room, duplicates = group_rooms[0], group_rooms[1:]
+        else:
+            chat_room, duplicates = ChatRoom.objects.create(
+                group_id=group.id, room_type='group', name=f"{group.name} Chat"
+            ), []
+        if duplicates:
+            duplicate_ids = [room.id for room in duplicates]
+            Message.objects.filter(chat_room_id__in=duplicate_ids).update(chat_room_id=chat_room.id)
+            ChatRoom.objects.filter(id__in=duplicate_ids).delete()
+
+        current = set(Membership.objects.filter(chatroom_id=chat_room.id).values_list('user_id', flat=True))
+        expected = set(students.get(group.id, ()))
+        if group.teacher_id:
+            expected.add(group.teacher_id)
+        missing = expected - current
+        extra = current - expected - admin_ids
+
+        Membership.objects.filter(chatroom_id=chat_room.id, user_id__in=extra).delete()
+        ChatReadState.objects.filter(chat_room_id=chat_room.id, user_id__in=extra).delete()
+        Membership.objects.bulk_create(
+            [Membership(chatroom_id=chat_room.id, user_id=user_id) for user_id in missing], ignore_conflicts=True
+        )
+        message_count = Message.objects.filter(chat_room_id=chat_room.id).count()
+        ChatReadState.objects.bulk_create([
+            ChatReadState(chat_room_id=chat_room.id, user_id=user_id, unread_count=message_count)
+            for user_id in missing
+        ], ignore_conflicts=True)
+        if duplicates:
+            for state in ChatReadState.objects.filter(chat_room_id=chat_room.id):
+                state.unread_count = Message.objects.filter(
+                    chat_room_id=chat_room.id, id__gt=state.last_read_id
+                ).exclude(sender_id=state.user_id).count()
+                state.save(update_fields=['unread_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0006_private_pair_key'),
+        ('erp', '0002_alter_user_avatar'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(sync_group_rooms, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='chatroom',
+            constraint=models.UniqueConstraint(condition=models.Q(('room_type', 'group')), fields=('group',), name='chat_group_room_unique'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 6.0.1 on 2026-10-18 18:52
+
+from django.db import migrations, models
+
+
+# SQLite'da AddField (default bilan) chat_message jadvalini qayta yaratadi va
+# 0005_message_fts triggerlari u bilan birga o'chadi. Qator id lari va matni
+# o'zgarmaydi, shuning uchun FTS indeksini qayta qurish shart emas.
+FTS_TRIGGERS_SQL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS chat_message_fts_ai AFTER INSERT ON chat_message BEGIN
+        INSERT INTO chat_message_fts(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS chat_message_fts_ad AFTER DELETE ON chat_message BEGIN
+        INSERT INTO chat_message_fts(chat_message_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS chat_message_fts_au AFTER UPDATE OF content ON chat_message BEGIN
+        INSERT INTO chat_message_fts(chat_message_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO chat_message_fts(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+]
+
+
+def reinstall_fts_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in FTS_TRIGGERS_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0007_group_room_membership'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SentReminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='is_system',
+            field=models.BooleanField(default=False),
+        ),
+        # Orqaga qaytishda jadval yana qayta yaratiladi - triggerlar ham qayta o'rnatiladi
+        migrations.RunPython(reinstall_fts_triggers, reinstall_fts_triggers),
+    ]
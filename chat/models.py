@@ -1,5 +1,5 @@
 # Bu kodlarni models.py fayliga qo'shing (oxiriga)
-from django.db import models
+from django.db import models, transaction
 
 from erp.models import Group, User
 
@@ -13,17 +13,48 @@ class ChatRoom(models.Model):
     room_type = models.CharField(max_length=10, choices=ROOM_TYPE_CHOICES, default='private')
     group = models.ForeignKey(Group, on_delete=models.CASCADE, null=True, blank=True, related_name='chat_rooms')
     participants = models.ManyToManyField(User, related_name='chat_rooms')
+    # Shaxsiy chat uchun kanonik kalit: (kichik id, katta id) - juftlik bo'yicha yagona
+    min_user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    max_user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-updated_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['min_user', 'max_user'],
+                condition=models.Q(room_type='private'),
+                name='chat_private_pair_unique',
+            ),
+            models.UniqueConstraint(
+                fields=['group'],
+                condition=models.Q(room_type='group'),
+                name='chat_group_room_unique',
+            ),
+        ]
     
     def __str__(self):
         if self.room_type == 'group' and self.group:
             return f"Guruh Chat: {self.group.name}"
         return self.name or f"Chat #{self.id}"
     
+    @classmethod
+    def get_or_create_private(cls, user, other_user):
+        """Ikki foydalanuvchi orasidagi shaxsiy chat - bitta indeksli so'rov.
+
+        Bir vaqtdagi ikki so'rov unique indeks tufayli bitta xonani oladi.
+        """
+        low, high = sorted((user, other_user), key=lambda person: person.id)
+        with transaction.atomic():
+            chat_room, created = cls.objects.get_or_create(
+                room_type='private', min_user=low, max_user=high,
+                defaults={'name': f"{user.get_full_name()} - {other_user.get_full_name()}"}
+            )
+            if created:
+                chat_room.participants.add(low, high)
+        return chat_room, created
+    
     def get_other_participant(self, user):
         """Shaxsiy chatda boshqa odamni topish"""
         if self.room_type == 'private':
@@ -39,21 +70,71 @@ class Message(models.Model):
     content = models.TextField()
     file = models.FileField(upload_to='chat_files/', blank=True, null=True)
     is_read = models.BooleanField(default=False)
+    # Tizim xabari (eslatma) - ``sender`` nomidan, lekin foydalanuvchi yozmagan
+    is_system = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['chat_room', 'created_at', 'id'], name='chat_message_room_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.sender.get_full_name()}: {self.content[:50]}"
+    
+    def read_by(self):
+        """Xabarni o'qigan ishtirokchilar (watermark bo'yicha)"""
+        return User.objects.filter(
+            chat_read_states__chat_room_id=self.chat_room_id,
+            chat_read_states__last_read_id__gte=self.id
+        ).exclude(id=self.sender_id)
 
-class MessageReadReceipt(models.Model):
-    message = models.ForeignKey(Message, on_delete=models.CASCADE, related_name='read_receipts')
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
-    read_at = models.DateTimeField(auto_now_add=True)
+class SentReminder(models.Model):
+    """Yuborilgan eslatma kaliti (masalan ``homework:12:202610181800``) - qayta yubormaslik uchun"""
+    key = models.CharField(max_length=100, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return self.key
+
+class ChatReadState(models.Model):
+    """Foydalanuvchi xonada qaysi xabargacha o'qiganini saqlaydi.
+
+    Har bir xabar uchun alohida qator o'rniga (foydalanuvchi, xona) juftligiga
+    bitta "watermark": ``last_read_id`` gacha bo'lgan xabarlar o'qilgan.
+    ``unread_count`` yangi xabar yuborilganda oshiriladi, xona ochilganda
+    nolga tushadi - chat ro'yxatida hisoblash kerak emas.
+    """
+    chat_room = models.ForeignKey(ChatRoom, on_delete=models.CASCADE, related_name='read_states')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chat_read_states')
+    last_read_id = models.BigIntegerField(default=0)
+    unread_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
-        unique_together = ('message', 'user')
+        unique_together = ('chat_room', 'user')
     
     def __str__(self):
-        return f"{self.user.get_full_name()} - {self.message.id}"
\ No newline at end of file
+        return f"{self.user.get_full_name()} - {self.chat_room} ({self.last_read_id})"
+    
+    @classmethod
+    async def arecord_message(cls, message):
+        """Yangi xabar: boshqalarda o'qilmaganlar +1, yuboruvchi o'zinikini o'qigan"""
+        await cls.objects.filter(chat_room_id=message.chat_room_id).exclude(
+            user_id=message.sender_id
+        ).aupdate(unread_count=models.F('unread_count') + 1)
+        await cls.objects.filter(chat_room_id=message.chat_room_id, user_id=message.sender_id).aupdate(
+            last_read_id=message.id, unread_count=0
+        )
+    
+    @classmethod
+    async def amark_read(cls, chat_room, user):
+        """Xonadagi barcha xabarlarni o'qilgan deb belgilash (oxirgi xabar id si qaytadi)"""
+        last_id = await chat_room.messages.order_by('-id').values_list('id', flat=True).afirst() or 0
+        updated = await cls.objects.filter(chat_room=chat_room, user=user).aupdate(
+            last_read_id=last_id, unread_count=0
+        )
+        if not updated:
+            await cls.objects.aget_or_create(chat_room=chat_room, user=user, defaults={'last_read_id': last_id})
+        return last_id
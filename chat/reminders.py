@@ -0,0 +1,185 @@
+"""Muddat va dars eslatmalari - chat tizim xabarlari sifatida.
+
+``manage.py run_reminders`` (worker) har daqiqada vaqt oynasidagi
+hodisalarni indeks bo'yicha topadi:
+
+* vazifa muddati ``HOMEWORK_REMINDER_HOURS`` ichida tugasa - guruh chatiga
+  bitta xabar (guruhning barcha a'zolari uni ko'radi);
+* support dars ``SUPPORT_REMINDER_MINUTES`` ichida boshlansa - o'quvchi va
+  support teacher shaxsiy chatiga.
+
+Har eslatmaning kaliti (``SentReminder``) muddat/vaqtni ham o'z ichiga oladi:
+qayta ishga tushirish yoki parallel worker xabarni takrorlamaydi, muddat
+o'zgarsa esa yangi eslatma ketadi. Xabarlar ``BATCH_SIZE`` lik bo'laklarda
+bitta tranzaksiyada yoziladi: kalitlar, ``bulk_create`` xabarlar, xonalarning
+``updated_at`` i va o'qilmaganlar soni - o'quvchi boshiga so'rov yo'q.
+
+Worker alohida jarayon: ``updated_at`` o'zgargani uchun server jarayonlaridagi
+watermark va chat ro'yxati ETag'lari o'z-o'zidan eskiradi. Darhol yetkazish
+(WebSocket, long-polling) jarayonlararo broker (``RedisBroker``) bilan ishlaydi.
+"""
+from collections import Counter
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from erp.models import Group, GroupStudent, Homework, HomeworkSubmission, SupportRequest, User
+
+from . import membership
+from .broker import get_broker
+from .models import ChatReadState, ChatRoom, Message, SentReminder
+from .serializers import message_to_dict
+
+
+HOMEWORK_LEAD = timedelta(hours=getattr(settings, 'HOMEWORK_REMINDER_HOURS', 24))
+SUPPORT_LEAD = timedelta(minutes=getattr(settings, 'SUPPORT_REMINDER_MINUTES', 60))
+
+BATCH_SIZE = 200
+
+
+def _local(value):
+    return timezone.localtime(value).strftime('%d.%m.%Y %H:%M')
+
+
+def _batches(items):
+    for start in range(0, len(items), BATCH_SIZE):
+        yield items[start:start + BATCH_SIZE]
+
+
+def homework_reminders(now):
+    """(kalit, xona id, yuboruvchi id, matn) - muddati (now, now + HOMEWORK_LEAD] dagi vazifalar"""
+    homeworks = list(
+        Homework.objects.filter(deadline__gt=now, deadline__lte=now + HOMEWORK_LEAD).order_by(
+            'deadline', 'id'
+        ).values_list('id', 'group_id', 'title', 'deadline', 'created_by_id', 'group__teacher_id')
+    )
+    if not homeworks:
+        return []
+
+    group_ids = {group_id for _, group_id, *_ in homeworks}
+    rooms = dict(
+        ChatRoom.objects.filter(room_type='group', group_id__in=group_ids).values_list('group_id', 'id')
+    )
+    for group in Group.objects.filter(id__in=group_ids - set(rooms)):
+        rooms[group.id] = membership.get_group_room(group).id
+    roster = dict(
+        GroupStudent.objects.filter(group_id__in=group_ids).values('group_id').annotate(
+            count=Count('id')
+        ).values_list('group_id', 'count')
+    )
+    submitted = dict(
+        HomeworkSubmission.objects.filter(homework_id__in=[row[0] for row in homeworks]).values(
+            'homework_id'
+        ).annotate(count=Count('id')).values_list('homework_id', 'count')
+    )
+
+    reminders = []
+    for homework_id, group_id, title, deadline, created_by_id, teacher_id in homeworks:
+        sender_id = created_by_id or teacher_id
+        if sender_id is None:
+            continue
+        waiting = max(roster.get(group_id, 0) - submitted.get(homework_id, 0), 0)
+        reminders.append((
+            f'homework:{homework_id}:{deadline:%Y%m%d%H%M}', rooms[group_id], sender_id,
+            f'⏰ Eslatma: "{title}" vazifasining muddati {_local(deadline)} da tugaydi. '
+            f'Hali topshirmaganlar: {waiting}.',
+        ))
+    return reminders
+
+
+def support_reminders(now):
+    """(kalit, xona id, yuboruvchi id, matn) - (now, now + SUPPORT_LEAD] da boshlanadigan darslar"""
+    start, end = timezone.localtime(now), timezone.localtime(now + SUPPORT_LEAD)
+    requests = []
+    for request_id, student_id, teacher_id, topic, day, at in SupportRequest.objects.filter(
+        scheduled_date__range=(start.date(), end.date()), support_teacher__isnull=False
+    ).order_by('scheduled_date', 'scheduled_time', 'id').values_list(
+        'id', 'student_id', 'support_teacher_id', 'topic', 'scheduled_date', 'scheduled_time'
+    ):
+        begins = timezone.make_aware(datetime.combine(day, at), start.tzinfo)
+        if now < begins <= now + SUPPORT_LEAD:
+            requests.append((request_id, student_id, teacher_id, topic, begins))
+    if not requests:
+        return []
+
+    pairs = {tuple(sorted((student_id, teacher_id))) for _, student_id, teacher_id, _, _ in requests}
+    rooms = {
+        (low, high): room_id
+        for low, high, room_id in ChatRoom.objects.filter(
+            room_type='private',
+            min_user_id__in={low for low, _ in pairs}, max_user_id__in={high for _, high in pairs},
+        ).values_list('min_user_id', 'max_user_id', 'id')
+        if (low, high) in pairs
+    }
+    missing = pairs - set(rooms)
+    if missing:
+        users = User.objects.in_bulk({user_id for pair in missing for user_id in pair})
+        for low, high in missing:
+            rooms[(low, high)] = ChatRoom.get_or_create_private(users[low], users[high])[0].id
+
+    return [
+        (
+            f'support:{request_id}:{begins:%Y%m%d%H%M}', rooms[tuple(sorted((student_id, teacher_id)))], teacher_id,
+            f'⏰ Eslatma: "{topic}" bo\'yicha qo\'shimcha dars {_local(begins)} da boshlanadi.',
+        )
+        for request_id, student_id, teacher_id, topic, begins in requests
+    ]
+
+
+def deliver(reminders, now=None):
+    """Yuborilmagan eslatmalarni bo'laklab yozish va e'lon qilish. Yuborilganlar sonini qaytaradi"""
+    now = now or timezone.now()
+    sent = 0
+    for batch in _batches(reminders):
+        done = set(SentReminder.objects.filter(key__in=[key for key, *_ in batch]).values_list('key', flat=True))
+        batch = [reminder for reminder in batch if reminder[0] not in done]
+        if not batch:
+            continue
+        try:
+            with transaction.atomic():
+                # Kalitlar birinchi: parallel worker bilan to'qnashsa bo'lak to'liq bekor bo'ladi
+                SentReminder.objects.bulk_create([SentReminder(key=key) for key, *_ in batch])
+                messages = Message.objects.bulk_create([
+                    Message(chat_room_id=room_id, sender_id=sender_id, content=content, is_system=True)
+                    for _, room_id, sender_id, content in batch
+                ])
+                per_room = Counter(room_id for _, room_id, _, _ in batch)
+                ChatRoom.objects.filter(id__in=list(per_room)).update(updated_at=now)
+                # Tizim xabari hamma uchun (yuboruvchi ham) o'qilmagan
+                by_count = {}
+                for room_id, count in per_room.items():
+                    by_count.setdefault(count, []).append(room_id)
+                for count, room_ids in by_count.items():
+                    ChatReadState.objects.filter(chat_room_id__in=room_ids).update(
+                        unread_count=F('unread_count') + count
+                    )
+        except IntegrityError:
+            # Boshqa worker shu eslatmalarni allaqachon yubordi
+            continue
+        sent += len(batch)
+        _publish(messages)
+    return sent
+
+
+def _publish(messages):
+    if not messages or messages[0].pk is None:
+        # Baza bulk_create da id qaytarmaydi - mijozlar keyingi so'rovda oladi
+        return
+    senders = User.objects.in_bulk({message.sender_id for message in messages})
+    broker = get_broker()
+    for message in messages:
+        message.sender = senders[message.sender_id]
+        broker.publish(message.chat_room_id, message_to_dict(message))
+
+
+def send_homework_reminders(now=None):
+    now = now or timezone.now()
+    return deliver(homework_reminders(now), now)
+
+
+def send_support_reminders(now=None):
+    now = now or timezone.now()
+    return deliver(support_reminders(now), now)
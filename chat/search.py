@@ -0,0 +1,132 @@
+"""Xabarlar bo'yicha to'liq matnli qidiruv (SQLite FTS5).
+
+``chat_message_fts`` - ``chat_message.content`` ustidagi external-content
+FTS5 jadvali. U triggerlar orqali INSERT/UPDATE/DELETE bilan sinxron
+turadi (``chat/migrations/0005_message_fts.py``). Eski ma'lumotlar yoki
+jadval qayta yaratilganda: ``python manage.py rebuild_message_index``.
+SQLite'da ``chat_message`` ni qayta yaratadigan migratsiyalar (masalan,
+default'li ``AddField``) triggerlarni qayta o'rnatishi kerak - qarang
+``0008_system_messages``.
+
+SQLite bo'lmagan bazalarda oddiy ``icontains`` qidiruviga o'tiladi.
+"""
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+
+from .models import Message
+
+
+FTS_TABLE = 'chat_message_fts'
+
+# Snippet chegaralari: avval matn escape qilinadi, keyin <mark> qo'yiladi
+MARK_START = '\x02'
+MARK_END = '\x03'
+
+SEARCH_LIMIT = 50
+
+INSTALL_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        content, content='chat_message', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS chat_message_fts_ai AFTER INSERT ON chat_message BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS chat_message_fts_ad AFTER DELETE ON chat_message BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content) VALUES ('delete', old.id, old.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS chat_message_fts_au AFTER UPDATE OF content ON chat_message BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+]
+
+
+def fts_available():
+    return connection.vendor == 'sqlite'
+
+
+def install_index():
+    """FTS jadvali va triggerlarni yaratish (mavjud bo'lsa tegmaydi)"""
+    with connection.cursor() as cursor:
+        for statement in INSTALL_SQL:
+            cursor.execute(statement)
+
+
+def rebuild_index():
+    """FTS indeksini chat_message jadvalidan to'liq qayta qurish"""
+    install_index()
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def build_match_query(text):
+    """Foydalanuvchi matnini xavfsiz FTS5 so'roviga aylantirish (har so'z prefiks bilan)"""
+    tokens = re.findall(r'\w+', text)
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def matching_ids(text):
+    """Admin qidiruvi uchun: mos xabarlar id lari (subquery sifatida)"""
+    match = build_match_query(text)
+    if not match:
+        return None
+    return RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+
+
+def _highlight(snippet):
+    return escape(snippet).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+
+
+def search_messages(user, text, chat_room=None, limit=SEARCH_LIMIT):
+    """Foydalanuvchi ishtirokchi bo'lgan xonalardagi xabarlarni qidirish.
+
+    Natija: ``(message, snippet_html)`` juftliklari, eng mosi birinchi.
+    """
+    match = build_match_query(text)
+    if not match:
+        return []
+
+    if not fts_available():
+        messages = Message.objects.filter(chat_room__participants=user, content__icontains=text)
+        if chat_room is not None:
+            messages = messages.filter(chat_room=chat_room)
+        return [(msg, escape(msg.content[:200])) for msg in messages.select_related('sender')[:limit]]
+
+    sql = f"""
+        SELECT m.id, snippet({FTS_TABLE}, 0, %s, %s, '...', 12)
+        FROM {FTS_TABLE}
+        JOIN chat_message m ON m.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH %s
+          AND m.chat_room_id IN (
+              SELECT chatroom_id FROM chat_chatroom_participants WHERE user_id = %s
+          )
+    """
+    params = [MARK_START, MARK_END, match, user.id]
+    if chat_room is not None:
+        sql += ' AND m.chat_room_id = %s'
+        params.append(chat_room.id)
+    sql += f' ORDER BY bm25({FTS_TABLE}) LIMIT %s'
+    params.append(limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    message_map = Message.objects.select_related('sender').in_bulk([row[0] for row in rows])
+    return [
+        (message_map[message_id], _highlight(snippet))
+        for message_id, snippet in rows
+        if message_id in message_map
+    ]
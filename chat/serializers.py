@@ -0,0 +1,14 @@
+"""Xabarlarning JSON ko'rinishi - view'lar, WebSocket va eslatmalar worker'i uchun bitta format."""
+
+
+def message_to_dict(message):
+    """Xabarni JSON javob / WebSocket uchun tayyorlash"""
+    return {
+        'id': message.id,
+        'content': message.content,
+        'sender_name': message.sender.get_full_name(),
+        'sender_id': message.sender.id,
+        'created_at': message.created_at.strftime('%H:%M'),
+        'file_url': message.file.url if message.file else None,
+        'is_system': message.is_system
+    }
@@ -0,0 +1,99 @@
+from django.db.models import Count
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from erp.models import Group, GroupStudent, User
+
+from . import contacts, membership
+from .models import ChatReadState, ChatRoom, Message
+
+
+@receiver(m2m_changed, sender=ChatRoom.participants.through)
+def sync_read_states(sender, instance, action, reverse, pk_set, **kwargs):
+    """Ishtirokchi qo'shilsa/olib tashlansa ChatReadState qatorlarini moslash"""
+    if action == 'post_add' and pk_set:
+        if reverse:
+            pairs = [(room_id, instance.pk) for room_id in pk_set]
+        else:
+            pairs = [(instance.pk, user_id) for user_id in pk_set]
+        # Yangi ishtirokchi uchun xonadagi barcha xabarlar o'qilmagan
+        room_ids = {room_id for room_id, _ in pairs}
+        message_counts = dict(
+            Message.objects.filter(chat_room_id__in=room_ids).values('chat_room').annotate(
+                count=Count('id')
+            ).values_list('chat_room', 'count')
+        )
+        ChatReadState.objects.bulk_create([
+            ChatReadState(chat_room_id=room_id, user_id=user_id, unread_count=message_counts.get(room_id, 0))
+            for room_id, user_id in pairs
+        ], ignore_conflicts=True)
+    
+    elif action == 'post_remove' and pk_set:
+        if reverse:
+            ChatReadState.objects.filter(user=instance, chat_room_id__in=pk_set).delete()
+        else:
+            ChatReadState.objects.filter(chat_room=instance, user_id__in=pk_set).delete()
+    
+    elif action == 'pre_clear':
+        if reverse:
+            ChatReadState.objects.filter(user=instance).delete()
+        else:
+            ChatReadState.objects.filter(chat_room=instance).delete()
+
+
+@receiver(pre_save, sender=Group)
+def remember_group_teacher(sender, instance, **kwargs):
+    instance._previous_teacher_id = None
+    if instance.pk:
+        instance._previous_teacher_id = Group.objects.filter(pk=instance.pk).values_list(
+            'teacher_id', flat=True
+        ).first()
+
+
+@receiver(post_save, sender=Group)
+def sync_group_room(sender, instance, created, raw=False, **kwargs):
+    """Yangi guruhga chat yaratish, o'qituvchi almashsa ishtirokchilarni almashtirish"""
+    if raw:
+        return
+    previous_teacher_id = getattr(instance, '_previous_teacher_id', None)
+    contacts.invalidate_group(instance.pk, [previous_teacher_id])
+    if created:
+        membership.get_group_room(instance)
+        return
+    
+    if previous_teacher_id != instance.teacher_id:
+        if previous_teacher_id:
+            membership.remove_members(instance.pk, [previous_teacher_id])
+        if instance.teacher_id:
+            membership.add_members(instance.pk, [instance.teacher_id])
+    # updated_at ham - chat_list ETag'i yangi nomni ko'rsin
+    ChatRoom.objects.filter(group=instance, room_type='group').exclude(
+        name=membership.room_name(instance)
+    ).update(name=membership.room_name(instance), updated_at=timezone.now())
+
+
+@receiver(post_save, sender=GroupStudent)
+def add_group_student_to_room(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        membership.add_members(instance.group_id, [instance.student_id])
+        contacts.invalidate_group(instance.group_id)
+
+
+@receiver(post_delete, sender=GroupStudent)
+def remove_group_student_from_room(sender, instance, **kwargs):
+    membership.remove_members(instance.group_id, [instance.student_id])
+    contacts.invalidate_group(instance.group_id, [instance.student_id])
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    # O'quvchilar GroupStudent signali orqali, o'qituvchi shu yerda
+    contacts.invalidate_users([instance.teacher_id])
+
+
+@receiver(post_save, sender=User)
+def user_role_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    contacts.invalidate_users([instance.pk])
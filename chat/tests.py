@@ -1,3 +1,371 @@
-from django.test import TestCase
+import asyncio
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import caches
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from erp.models import Group, GroupStudent, Homework, SupportRequest, User
+
+from . import membership, reminders
+from .broker import InMemoryBroker
+from .models import ChatReadState, ChatRoom, Message, SentReminder
+from .watermarks import watermarks
+
+
+class BrokerTests(TestCase):
+
+    async def test_slow_subscriber_is_dropped(self):
+        broker = InMemoryBroker(queue_size=2)
+        slow = broker.subscribe(1)
+        for index in range(3):
+            await broker.apublish(1, {'id': index})
+        await asyncio.sleep(0)
+        self.assertTrue(slow.dropped)
+        self.assertIsNone(await slow.get())
+        fresh = broker.subscribe(1)
+        await broker.apublish(1, {'id': 3})
+        await asyncio.sleep(0)
+        self.assertEqual(await fresh.get(), {'id': 3})
+        self.assertEqual(broker._subscriptions, {1: {fresh}})
+
+
+def make_user(username, role, **fields):
+    return User.objects.create_user(username, password=None, role=role, **fields)
+
+
+class ChatDataMixin:
+    """Guruh chati (o'qituvchi + 4 o'quvchi) va bitta shaxsiy chat, har birida xabarlar"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = make_user('teacher', 'teacher', first_name='Olim')
+        cls.students = [make_user(f'student{index}', 'student', first_name=f'Ali{index}') for index in range(4)]
+        cls.support = make_user('support', 'support_teacher')
+        cls.group = Group.objects.create(name='Fizika', teacher=cls.teacher)
+        for student in cls.students:
+            GroupStudent.objects.create(group=cls.group, student=student)
+        cls.room = ChatRoom.objects.get(group=cls.group, room_type='group')
+        cls.private, _ = ChatRoom.get_or_create_private(cls.students[0], cls.support)
+        Message.objects.bulk_create([
+            Message(chat_room=cls.room, sender=[cls.teacher, *cls.students][index % 5], content=f'salom dars {index}')
+            for index in range(60)
+        ] + [Message(chat_room=cls.private, sender=cls.support, content='ertaga dars bor')])
+
+    def setUp(self):
+        for alias in ('default', 'dashboard', 'contacts', 'gradebook'):
+            caches[alias].clear()
+        watermarks.clear()
+
+    def get(self, url, **params):
+        """``students[0]`` nomidan GET - javob 200 bo'lishi kerak"""
+        self.client.force_login(self.students[0])
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, url)
+        return response
+
+
+class LongPollTests(ChatDataMixin, TestCase):
+
+    @mock.patch('chat.views.LONG_POLL_RECHECK', 0.2)
+    async def test_in_memory_broker_rechecks_database(self):
+        """Boshqa jarayonda yozilgan xabar (broker orqali emas) ham timeout'gacha kelmasdan olinadi"""
+        await self.async_client.aforce_login(self.students[0])
+        last_id = (await Message.objects.filter(chat_room=self.room).alatest('id')).id
+
+        async def write_elsewhere():
+            await asyncio.sleep(0.3)
+            await Message.objects.acreate(chat_room=self.room, sender=self.teacher, content='boshqa worker')
+
+        started = asyncio.get_running_loop().time()
+        response, _ = await asyncio.gather(
+            self.async_client.get(reverse('get_messages', args=[self.room.pk]), {'last_message_id': last_id, 'wait': 5}),
+            write_elsewhere(),
+        )
+        self.assertEqual([message['content'] for message in response.json()['messages']], ['boshqa worker'])
+        self.assertLess(asyncio.get_running_loop().time() - started, 2)
+
+
+@override_settings(QUERY_BUDGET_RAISE=True)
+class ChatInboxTests(ChatDataMixin, TestCase):
+
+    def test_one_entry_per_room(self):
+        response = self.get(reverse('chat_list'))
+        self.assertEqual(len(response.context['chat_data']), 2)
+
+
+class MigrationTestCase(TransactionTestCase):
+    """``migrate_from`` holatida ma'lumot yaratib, ``migrate_to`` gacha o'tkazish"""
+
+    migrate_from = None
+    migrate_to = None
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        self.old_apps = executor.loader.project_state(self.migrate_from).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def migrate(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_to)
+        return executor.loader.project_state(self.migrate_to).apps
+
+    def make_user(self, username, role='student'):
+        return self.old_apps.get_model('erp', 'User').objects.create(username=username, password='!', role=role)
+
+
+class ReadStateMigrationTests(MigrationTestCase):
+    migrate_from = [('chat', '0001_initial')]
+    migrate_to = [('chat', '0002_chatreadstate')]
+
+    def test_receipts_collapse_to_watermarks(self):
+        ChatRoom = self.old_apps.get_model('chat', 'ChatRoom')
+        Message = self.old_apps.get_model('chat', 'Message')
+        MessageReadReceipt = self.old_apps.get_model('chat', 'MessageReadReceipt')
+        first, second, third = [self.make_user(name) for name in ('a', 'b', 'c')]
+        room = ChatRoom.objects.create(room_type='group', name='xona')
+        room.participants.add(first, second, third)
+        messages = [
+            Message.objects.create(chat_room=room, sender=sender, content='x')
+            for sender in (first, second, first, third)
+        ]
+        MessageReadReceipt.objects.create(message=messages[0], user=second)
+        MessageReadReceipt.objects.create(message=messages[2], user=second)
+
+        apps = self.migrate()
+        states = {
+            user_id: (last_read_id, unread_count)
+            for user_id, last_read_id, unread_count in apps.get_model('chat', 'ChatReadState').objects.values_list(
+                'user_id', 'last_read_id', 'unread_count'
+            )
+        }
+        self.assertEqual(states, {
+            first.pk: (0, 2),
+            second.pk: (messages[2].pk, 1),
+            third.pk: (0, 3),
+        })
+
+
+@override_settings(QUERY_BUDGET_RAISE=True)
+class ChatHistoryTests(ChatDataMixin, TestCase):
+
+    def test_room_renders_newest_page_and_pages_older(self):
+        response = self.get(reverse('chat_room', args=[self.room.pk]))
+        cursor = response.context['older_cursor']
+        self.assertIsNotNone(cursor)
+        response = self.get(reverse('older_messages', args=[self.room.pk]), cursor=cursor)
+        self.assertEqual(len(response.json()['messages']), 10)
+
+
+@override_settings(QUERY_BUDGET_RAISE=True)
+class MessageSearchTests(ChatDataMixin, TestCase):
+
+    def test_search(self):
+        self.get(reverse('search_messages'), q='dars')
+        self.get(reverse('search_room_messages', args=[self.room.pk]), q='salom')
+
+
+@override_settings(QUERY_BUDGET_RAISE=True)
+class AsyncChatViewTests(ChatDataMixin, TestCase):
+
+    def test_polling(self):
+        last_id = Message.objects.filter(chat_room=self.room).latest('id').id
+        url = reverse('get_messages', args=[self.room.pk])
+        self.assertEqual(self.get(url, last_message_id=last_id).json()['messages'], [])
+        self.assertEqual(len(self.get(url, last_message_id=last_id - 3).json()['messages']), 3)
+
+    def test_send_message(self):
+        self.client.force_login(self.students[0])
+        state = ChatReadState.objects.get(chat_room=self.room, user=self.students[1])
+        response = self.client.post(reverse('send_message', args=[self.room.pk]), {'content': 'yangi xabar'})
+        self.assertTrue(response.json()['success'])
+        self.assertEqual(ChatReadState.objects.get(pk=state.pk).unread_count, state.unread_count + 1)
+
+
+class MessageDeleteTests(ChatDataMixin, TestCase):
+
+    def test_room_delete_does_not_load_messages(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.room.delete()
+        self.assertFalse([query['sql'] for query in queries if query['sql'].startswith('SELECT "chat_message"')])
+        self.assertFalse(Message.objects.filter(chat_room_id=self.room.pk).exists())
+
+    def test_admin_delete_bumps_room(self):
+        admin = User.objects.create_superuser('root', 'root@example.com', None, role='admin')
+        self.client.force_login(admin)
+        before = self.room.updated_at
+        message = Message.objects.filter(chat_room=self.room).latest('id')
+        self.client.post(reverse('admin:chat_message_delete', args=[message.pk]), {'post': 'yes'})
+        self.room.refresh_from_db()
+        self.assertGreater(self.room.updated_at, before)
+
+
+class ChatListETagTests(ChatDataMixin, TestCase):
+
+    def assertRenameShows(self, rename):
+        etag = self.get(reverse('chat_list'))['ETag']
+        self.assertEqual(self.client.get(reverse('chat_list'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        rename()
+        response = self.client.get(reverse('chat_list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Optika')
+
+    def test_group_rename(self):
+        def rename():
+            self.group.name = 'Optika'
+            self.group.save()
+        self.assertRenameShows(rename)
+
+    def test_reconciled_rename(self):
+        def rename():
+            Group.objects.filter(pk=self.group.pk).update(name='Optika')
+            membership.reconcile()
+        self.assertRenameShows(rename)
+
+
+class PrivatePairMigrationTests(MigrationTestCase):
+    migrate_from = [('chat', '0005_message_fts')]
+    migrate_to = [('chat', '0006_private_pair_key')]
+
+    def test_duplicate_private_rooms_are_merged(self):
+        ChatRoom = self.old_apps.get_model('chat', 'ChatRoom')
+        Message = self.old_apps.get_model('chat', 'Message')
+        ChatReadState = self.old_apps.get_model('chat', 'ChatReadState')
+        first, second, third = [self.make_user(name) for name in ('a', 'b', 'c')]
+
+        def room(*users):
+            chat_room = ChatRoom.objects.create(room_type='private')
+            chat_room.participants.add(*users)
+            return chat_room
+
+        keeper, duplicate = room(first, second), room(second, first)
+        other, crowded = room(first, third), room(first, second, third)
+        Message.objects.create(chat_room=keeper, sender=first, content='1')
+        last = Message.objects.create(chat_room=keeper, sender=second, content='2')
+        Message.objects.create(chat_room=duplicate, sender=second, content='3')
+        ChatReadState.objects.create(chat_room=keeper, user=first, last_read_id=last.pk)
+        ChatReadState.objects.create(chat_room=keeper, user=second, last_read_id=last.pk)
+
+        apps = self.migrate()
+        ChatRoom = apps.get_model('chat', 'ChatRoom')
+        self.assertFalse(ChatRoom.objects.filter(pk=duplicate.pk).exists())
+        keys = dict(ChatRoom.objects.values_list('pk', 'min_user_id'))
+        self.assertEqual(keys, {keeper.pk: first.pk, other.pk: first.pk, crowded.pk: None})
+        self.assertEqual(ChatRoom.objects.get(pk=keeper.pk).max_user_id, second.pk)
+        self.assertEqual(apps.get_model('chat', 'Message').objects.filter(chat_room_id=keeper.pk).count(), 3)
+        unread = dict(apps.get_model('chat', 'ChatReadState').objects.filter(chat_room_id=keeper.pk).values_list(
+            'user_id', 'unread_count'
+        ))
+        self.assertEqual(unread, {first.pk: 1, second.pk: 0})
+
+
+class GroupRoomMigrationTests(MigrationTestCase):
+    migrate_from = [('chat', '0006_private_pair_key')]
+    migrate_to = [('chat', '0007_group_room_membership')]
+
+    def test_group_rooms_match_group_membership(self):
+        Group = self.old_apps.get_model('erp', 'Group')
+        GroupStudent = self.old_apps.get_model('erp', 'GroupStudent')
+        ChatRoom = self.old_apps.get_model('chat', 'ChatRoom')
+        Message = self.old_apps.get_model('chat', 'Message')
+        ChatReadState = self.old_apps.get_model('chat', 'ChatReadState')
+        teacher = self.make_user('teacher', 'teacher')
+        admin = self.make_user('admin', 'admin')
+        outsider, first, second = [self.make_user(name) for name in ('outsider', 's1', 's2')]
+        group = Group.objects.create(name='Kimyo', teacher=teacher)
+        empty_group = Group.objects.create(name='Biologiya', teacher=teacher)
+        GroupStudent.objects.create(group=group, student=first)
+        GroupStudent.objects.create(group=group, student=second)
+
+        room = ChatRoom.objects.create(room_type='group', group=group, name='Kimyo Chat')
+        room.participants.add(teacher, first, outsider, admin)
+        duplicate = ChatRoom.objects.create(room_type='group', group=group, name='Kimyo Chat')
+        duplicate.participants.add(second)
+        Message.objects.create(chat_room=room, sender=teacher, content='1')
+        Message.objects.create(chat_room=duplicate, sender=second, content='2')
+        ChatReadState.objects.create(chat_room=room, user=outsider)
+
+        apps = self.migrate()
+        ChatRoom = apps.get_model('chat', 'ChatRoom')
+        self.assertEqual(list(ChatRoom.objects.filter(group_id=group.pk).values_list('pk', flat=True)), [room.pk])
+        self.assertEqual(
+            set(ChatRoom.objects.get(pk=room.pk).participants.values_list('pk', flat=True)),
+            {teacher.pk, first.pk, second.pk, admin.pk},
+        )
+        states = dict(apps.get_model('chat', 'ChatReadState').objects.filter(chat_room_id=room.pk).values_list(
+            'user_id', 'unread_count'
+        ))
+        self.assertNotIn(outsider.pk, states)
+        self.assertEqual(states[second.pk], 1)
+        created = ChatRoom.objects.get(group_id=empty_group.pk)
+        self.assertEqual(list(created.participants.values_list('pk', flat=True)), [teacher.pk])
+
+
+@override_settings(QUERY_BUDGET_RAISE=True)
+class ContactListTests(ChatDataMixin, TestCase):
+
+    def test_users_list(self):
+        self.get(reverse('users_list'))
+
+
+class ReminderTests(ChatDataMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.now = timezone.now()
+        self.homework = Homework.objects.create(
+            group=self.group, title='Kinematika', description='-', created_by=self.teacher,
+            deadline=self.now + timedelta(hours=5),
+        )
+
+    def system_messages(self, room):
+        return list(Message.objects.filter(chat_room=room, is_system=True).values_list('content', flat=True))
+
+    def test_homework_reminder_is_sent_once(self):
+        unread = ChatReadState.objects.get(chat_room=self.room, user=self.students[1]).unread_count
+        self.assertEqual(reminders.send_homework_reminders(self.now), 1)
+        self.assertEqual(reminders.send_homework_reminders(self.now), 0)
+        self.assertEqual(reminders.send_homework_reminders(self.now + timedelta(minutes=5)), 0)
+        contents = self.system_messages(self.room)
+        self.assertEqual(len(contents), 1)
+        self.assertIn('Kinematika', contents[0])
+        self.assertEqual(ChatReadState.objects.get(chat_room=self.room, user=self.students[1]).unread_count, unread + 1)
+
+    def test_changed_deadline_reminds_again(self):
+        reminders.send_homework_reminders(self.now)
+        self.homework.deadline = self.now + timedelta(hours=8)
+        self.homework.save()
+        self.assertEqual(reminders.send_homework_reminders(self.now), 1)
+        self.assertEqual(len(self.system_messages(self.room)), 2)
+
+    def test_far_deadline_is_not_reminded(self):
+        self.homework.deadline = self.now + timedelta(days=3)
+        self.homework.save()
+        self.assertEqual(reminders.send_homework_reminders(self.now), 0)
+
+    def test_support_reminder_goes_to_private_room(self):
+        begins = timezone.localtime(self.now + timedelta(minutes=30)).replace(second=0, microsecond=0)
+        SupportRequest.objects.create(
+            student=self.students[0], support_teacher=self.support, topic='Optika', description='-',
+            scheduled_date=begins.date(), scheduled_time=begins.time(),
+        )
+        self.assertEqual(reminders.send_support_reminders(self.now), 1)
+        self.assertEqual(reminders.send_support_reminders(self.now), 0)
+        self.assertEqual(len(self.system_messages(self.private)), 1)
+
+    def test_concurrent_worker_batch_is_skipped(self):
+        """Kalitni boshqa worker tekshiruvdan keyin yozgan bo'lsa - bo'lak bekor, xabar takrorlanmaydi"""
+        pending = reminders.homework_reminders(self.now)
+        SentReminder.objects.create(key=pending[0][0])
+        with mock.patch.object(SentReminder.objects, 'filter', return_value=SentReminder.objects.none()):
+            self.assertEqual(reminders.deliver(pending, self.now), 0)
+        self.assertEqual(self.system_messages(self.room), [])
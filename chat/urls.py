@@ -9,6 +9,10 @@ urlpatterns = [
     path('chat/room/<int:room_id>/', views.chat_room, name='chat_room'),
     path('chat/send/<int:room_id>/', views.send_message, name='send_message'),
     path('chat/get-messages/<int:room_id>/', views.get_messages, name='get_messages'),
+    path('chat/older-messages/<int:room_id>/', views.older_messages, name='older_messages'),
+    path('chat/search/', views.search_messages, name='search_messages'),
+    path('chat/search/<int:room_id>/', views.search_messages, name='search_room_messages'),
+    path('chat/export/<int:room_id>/', views.export_messages, name='export_messages'),
     path('chat/create/<int:user_id>/', views.create_private_chat, name='create_private_chat'),
     path('chat/group/<int:group_id>/', views.group_chat, name='group_chat'),
     path('chat/users/', views.users_list, name='users_list'),
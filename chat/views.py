@@ -1,108 +1,214 @@
 # Bu kodlarni views.py fayliga qo'shing (oxiriga)
 
-from django.http import JsonResponse
-from django.db.models import Q, Count, Max
-from .models import ChatRoom, Message, MessageReadReceipt
-from erp.models import User, GroupStudent, Group
+import asyncio
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponseNotModified, JsonResponse
+from django.db.models import Q, Count, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from .models import ChatRoom, Message, ChatReadState
+from erp.models import User, Group
+from erp import exports
+from erp.instrumentation import allow_queries
+from erp.pagination import apaginate_keyset, paginate_keyset
 from django.contrib.auth.decorators import login_required
-from django.shortcuts import render, get_object_or_404, redirect
+from django.shortcuts import render, get_object_or_404, aget_object_or_404, redirect
 from django.contrib import messages
+from django.contrib.messages import get_messages as get_flash_messages
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
+from . import contacts, membership, search
+from .broker import get_broker
+from .serializers import message_to_dict
+from .watermarks import watermarks
+
+
+# Long-polling so'rovi eng ko'pi bilan shuncha soniya kutadi
+LONG_POLL_TIMEOUT = 25
+# Broker faqat jarayon ichida ishlasa (InMemoryBroker) - bazani shuncha soniyada qayta tekshirish
+LONG_POLL_RECHECK = 3
+
+# Chat xonasida bir martada ko'rsatiladigan xabarlar soni
+MESSAGES_PAGE_SIZE = 50
+MESSAGE_KEYS = ('-created_at', '-id')
+
+# users_list sahifalash tartibi
+CONTACT_KEYS = ('first_name', 'last_name', 'id')
+
+
+def _int_param(params, name, default):
+    try:
+        return max(int(params.get(name, default)), 0)
+    except (TypeError, ValueError):
+        return default
+
+
+async def arender(request, template_name, context):
+    """Async view'lar uchun render.
 
+    Shablon ``user``, ``messages`` kabi lazy obyektlarga murojaat qiladi
+    (sessiya va foydalanuvchi sinxron yuklanadi), shuning uchun render
+    alohida thread'da bajariladi. Kontekstdagi ma'lumotlar esa view ichida
+    async ORM bilan oldindan to'liq yuklanadi.
+    """
+    return await sync_to_async(render)(request, template_name, context)
+
+def _conditional(response, etag):
+    """Brauzer javobni keshlaydi, lekin har safar ETag bilan qayta tekshiradi"""
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+async def _chat_list_etag(request, user):
+    """chat_list sahifasi uchun ETag (Message jadvalisiz).
+
+    Har bir ishtirokchi uchun ChatReadState qatori bor (``chat.signals``):
+    yangi xabar xonaning ``updated_at`` ini, o'qish esa o'qilmaganlar
+    yig'indisini o'zgartiradi. Flash xabar kutilayotgan bo'lsa sahifa
+    qayta chizilishi kerak - ETag berilmaydi.
+    """
+    if await sync_to_async(lambda: len(get_flash_messages(request)))():
+        return None
+    state = await ChatReadState.objects.filter(user=user).aaggregate(
+        rooms=Count('id'), updated=Max('chat_room__updated_at'), unread=Sum('unread_count')
+    )
+    updated = state['updated'].isoformat() if state['updated'] else ''
+    key = f"{user.id}:{user.get_full_name()}:{request.GET.get('cursor', '')}:{state['rooms']}:{updated}:{state['unread']}"
+    return quote_etag(hashlib.md5(key.encode()).hexdigest())
 
 # Chat Views
 @login_required
-def chat_list(request):
-    """Barcha chatlarni shablon talab qilgan formatda ko'rsatish"""
-    user = request.user
+async def chat_list(request):
+    """Barcha chatlarni shablon talab qilgan formatda ko'rsatish.
+
+    Sahifadagi xonalar sonidan qat'i nazar so'rovlar soni o'zgarmaydi:
+    xonalar (oxirgi xabar va o'qilmaganlar annotatsiya bilan), oxirgi
+    xabarlar va shaxsiy chatdagi boshqa ishtirokchilar.
+    """
+    user = await request.auser()
+    
+    etag = await _chat_list_etag(request, user)
+    if etag is not None and etag in parse_etags(request.headers.get('If-None-Match', '')):
+        return _conditional(HttpResponseNotModified(), etag)
+    
+    last_messages = Message.objects.filter(chat_room=OuterRef('pk')).order_by('-created_at', '-id')
+    read_state = ChatReadState.objects.filter(chat_room=OuterRef('pk'), user=user)
     
     # Foydalanuvchi ishtirokchi bo'lgan xonalarni olish
-    rooms = ChatRoom.objects.filter(participants=user).annotate(
-        last_message_time=Max('messages__created_at')
-    ).order_by('-last_message_time')
+    rooms = ChatRoom.objects.filter(participants=user).select_related('group').annotate(
+        last_message_id=Subquery(last_messages.values('id')[:1]),
+        last_message_time=Coalesce(Subquery(last_messages.values('created_at')[:1]), 'created_at'),
+        unread_count=Coalesce(Subquery(read_state.values('unread_count')[:1]), 0),
+    )
+    page = await apaginate_keyset(rooms, ('-last_message_time', '-id'), request.GET.get('cursor'))
+    
+    # Oxirgi xabarlar - bitta so'rov
+    last_message_ids = [room.last_message_id for room in page.items if room.last_message_id]
+    last_message_map = await Message.objects.select_related('sender').ain_bulk(last_message_ids)
+    
+    # Shaxsiy chatlardagi ikkinchi foydalanuvchilar - bitta so'rov
+    private_ids = [room.id for room in page.items if room.room_type == 'private']
+    other_participants = {}
+    memberships = ChatRoom.participants.through.objects.filter(
+        chatroom_id__in=private_ids
+    ).exclude(user_id=user.id).select_related('user').order_by('id')
+    async for membership in memberships:
+        other_participants.setdefault(membership.chatroom_id, membership.user)
     
     chat_data = []
-    for room in rooms:
-        # Shaxsiy chat bo'lsa, ikkinchi foydalanuvchini topish
-        other_participant = None
-        if room.room_type == 'private':
-            other_participant = room.participants.exclude(id=user.id).first()
-        
-        # Unread count (o'qilmagan xabarlar)
-        unread_count = Message.objects.filter(
-            chat_room=room, 
-            is_read=False
-        ).exclude(sender=user).count()
-        
-        # Xonaga unread_count ni vaqtincha biriktirib qo'yamiz
-        room.unread_count = unread_count
-        
+    for room in page.items:
+        room.last_message = last_message_map.get(room.last_message_id)
         chat_data.append({
             'room': room,
-            'other_participant': other_participant
+            'other_participant': other_participants.get(room.id)
         })
     
-    return render(request, 'erp/chat/chat_list.html', {
-        'chat_data': chat_data
+    response = await arender(request, 'erp/chat/chat_list.html', {
+        'chat_data': chat_data,
+        'next_cursor': page.next_cursor
     })
+    return _conditional(response, etag) if etag is not None else response
 @login_required
-def chat_room(request, room_id):
+async def chat_room(request, room_id):
     """Chat xonasi"""
-    chat_room = get_object_or_404(ChatRoom, id=room_id, participants=request.user)
-    
-    # Xabarlarni o'qilgan deb belgilash
-    unread_messages = Message.objects.filter(
-        chat_room=chat_room
-    ).exclude(sender=request.user).exclude(
-        read_receipts__user=request.user
-    )
+    user = await request.auser()
+    chat_room = await aget_object_or_404(ChatRoom.objects.select_related('group'), id=room_id, participants=user)
     
-    for message in unread_messages:
-        MessageReadReceipt.objects.get_or_create(
-            message=message,
-            user=request.user
-        )
+    # Xabarlarni o'qilgan deb belgilash (watermark - bitta UPDATE)
+    last_read_id = await ChatReadState.amark_read(chat_room, user)
+    await Message.objects.filter(
+        chat_room=chat_room, id__lte=last_read_id, is_read=False
+    ).exclude(sender=user).aupdate(is_read=True)
     
-    # Xabarlar
-    messages = Message.objects.filter(chat_room=chat_room).select_related('sender').order_by('created_at')
+    # Faqat eng yangi sahifa, eskilari older_messages orqali yuklanadi
+    page = await apaginate_keyset(
+        Message.objects.filter(chat_room=chat_room).select_related('sender'),
+        MESSAGE_KEYS, page_size=MESSAGES_PAGE_SIZE
+    )
+    messages = page.items[::-1]
     
     # Boshqa ishtirokchi (shaxsiy chat uchun)
-    other_participant = chat_room.get_other_participant(request.user) if chat_room.room_type == 'private' else None
+    other_participant = None
+    if chat_room.room_type == 'private':
+        other_participant = await chat_room.participants.exclude(id=user.id).afirst()
     
-    return render(request, 'erp/chat/chat_room.html', {
+    return await arender(request, 'erp/chat/chat_room.html', {
         'chat_room': chat_room,
         'messages': messages,
-        'other_participant': other_participant
+        'last_message_id': messages[-1].id if messages else 0,
+        'older_cursor': page.next_cursor,
+        'other_participant': other_participant,
+        'participants_count': await chat_room.participants.acount()
     })
 
 @login_required
-def send_message(request, room_id):
+def older_messages(request, room_id):
+    """Eski xabarlarni sahifalab olish (AJAX, (created_at, id) bo'yicha cursor)"""
+    chat_room = get_object_or_404(ChatRoom, id=room_id, participants=request.user)
+    
+    page = paginate_keyset(
+        Message.objects.filter(chat_room=chat_room).select_related('sender'),
+        MESSAGE_KEYS, request.GET.get('cursor'), page_size=MESSAGES_PAGE_SIZE
+    )
+    
+    return JsonResponse({
+        'success': True,
+        'messages': [message_to_dict(msg) for msg in reversed(page.items)],
+        'next_cursor': page.next_cursor
+    })
+
+@login_required
+async def send_message(request, room_id):
     """Xabar yuborish (AJAX)"""
     if request.method == 'POST':
-        chat_room = get_object_or_404(ChatRoom, id=room_id, participants=request.user)
+        user = await request.auser()
+        chat_room = await aget_object_or_404(ChatRoom, id=room_id, participants=user)
         content = request.POST.get('content', '').strip()
         file = request.FILES.get('file')
         
         if content or file:
-            message = Message.objects.create(
+            message = await Message.objects.acreate(
                 chat_room=chat_room,
-                sender=request.user,
+                sender=user,
                 content=content,
                 file=file
             )
             
             # Chat room yangilash vaqtini o'zgartirish
-            chat_room.save()
+            await chat_room.asave()
+            await ChatReadState.arecord_message(message)
+            await watermarks.arefresh(chat_room)
+            
+            # Xonaga obuna bo'lganlarga (WebSocket, long-polling) darhol yetkazish.
+            # Async view autocommit rejimida - xabar allaqachon saqlangan.
+            payload = message_to_dict(message)
+            await get_broker().apublish(chat_room.id, payload)
             
             return JsonResponse({
                 'success': True,
-                'message': {
-                    'id': message.id,
-                    'content': message.content,
-                    'sender_name': message.sender.get_full_name(),
-                    'sender_id': message.sender.id,
-                    'created_at': message.created_at.strftime('%H:%M'),
-                    'file_url': message.file.url if message.file else None
-                }
+                'message': payload
             })
         
         return JsonResponse({'success': False, 'error': 'Xabar bo\'sh'})
@@ -110,123 +216,164 @@ def send_message(request, room_id):
     return JsonResponse({'success': False, 'error': 'Invalid request'})
 
 @login_required
-def get_messages(request, room_id):
-    """Yangi xabarlarni olish (AJAX polling)"""
-    chat_room = get_object_or_404(ChatRoom, id=room_id, participants=request.user)
-    last_message_id = request.GET.get('last_message_id', 0)
+async def get_messages(request, room_id):
+    """Yangi xabarlarni olish (AJAX polling, WebSocket ishlamasa zaxira yo'l).
+
+    ``?wait=<soniya>`` berilsa long-polling rejimi: yangi xabar bo'lmasa,
+    so'rov ``send_message`` uni uyg'otguncha yoki vaqt tugaguncha kutadi.
+    Broker jarayonlararo bo'lmasa boshqa worker'da yozilgan xabar so'rovni
+    uyg'otmaydi - shuning uchun kutish paytida baza har ``LONG_POLL_RECHECK``
+    soniyada qayta tekshiriladi.
+
+    Oddiy polling javobi xonaning watermark'i (oxirgi xabar id'si) bo'yicha
+    ETag oladi: watermark ``last_message_id`` dan katta bo'lmasa yoki
+    ``If-None-Match`` mos kelsa ``Message`` jadvaliga murojaat qilinmaydi.
+    """
+    user = await request.auser()
+    chat_room = await aget_object_or_404(ChatRoom, id=room_id, participants=user)
+    last_message_id = _int_param(request.GET, 'last_message_id', 0)
+    wait = min(_int_param(request.GET, 'wait', 0), LONG_POLL_TIMEOUT)
     
     messages = Message.objects.filter(
         chat_room=chat_room,
         id__gt=last_message_id
     ).select_related('sender').order_by('created_at')
     
-    messages_data = [{
-        'id': msg.id,
-        'content': msg.content,
-        'sender_name': msg.sender.get_full_name(),
-        'sender_id': msg.sender.id,
-        'created_at': msg.created_at.strftime('%H:%M'),
-        'file_url': msg.file.url if msg.file else None
-    } for msg in messages]
+    async def fetch():
+        return [message_to_dict(msg) async for msg in messages.all()]
+    
+    if wait > 0:
+        broker = get_broker()
+        step = wait if broker.cross_process else min(wait, LONG_POLL_RECHECK)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + wait
+        # Avval obuna bo'lamiz, keyin tekshiramiz - oradagi xabar yo'qolmasin
+        async with broker.subscribe(chat_room.id) as subscription:
+            messages_data = await fetch()
+            while not messages_data:
+                timeout = min(step, deadline - loop.time())
+                if timeout <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(subscription.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    if broker.cross_process:
+                        break
+                # Kutish davomidagi qayta o'qishlar so'rovlar chegarasiga kirmaydi
+                allow_queries()
+                messages_data = await fetch()
+        
+        return JsonResponse({
+            'success': True,
+            'messages': messages_data
+        })
+    
+    watermark = await watermarks.aload(chat_room)
+    etag = quote_etag(f'{chat_room.id}-{last_message_id}-{max(watermark, last_message_id)}')
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        messages_data = await fetch() if watermark > last_message_id else []
+        response = JsonResponse({
+            'success': True,
+            'messages': messages_data
+        })
+    return _conditional(response, etag)
+
+@login_required
+def search_messages(request, room_id=None):
+    """Xabarlarni qidirish (AJAX). room_id berilsa faqat shu xonada"""
+    chat_room = None
+    if room_id is not None:
+        chat_room = get_object_or_404(ChatRoom, id=room_id, participants=request.user)
+    query = request.GET.get('q', '').strip()
+    
+    results = search.search_messages(request.user, query, chat_room=chat_room)
     
     return JsonResponse({
         'success': True,
-        'messages': messages_data
+        'results': [
+            dict(message_to_dict(msg), chat_room_id=msg.chat_room_id, snippet=snippet)
+            for msg, snippet in results
+        ]
     })
 
+@login_required
+def export_messages(request, room_id):
+    """Xona xabarlari tarixi (?format=csv|xlsx) - oqim bilan. Admin yoki ishtirokchi"""
+    if request.user.role == 'admin':
+        chat_room = get_object_or_404(ChatRoom, id=room_id)
+    else:
+        chat_room = get_object_or_404(ChatRoom, id=room_id, participants=request.user)
+    
+    messages_list = Message.objects.filter(chat_room=chat_room).order_by('created_at', 'id').values_list(
+        'created_at', 'sender__first_name', 'sender__last_name', 'sender__username', 'content', 'file'
+    )
+    rows = (
+        (created_at, first_name, last_name, username, content,
+         request.build_absolute_uri(settings.MEDIA_URL + file) if file else '')
+        for created_at, first_name, last_name, username, content, file
+        in messages_list.iterator(chunk_size=exports.CHUNK_SIZE)
+    )
+    return exports.stream_export(
+        request, f'chat_{chat_room.id}',
+        ['Vaqt', 'Ism', 'Familiya', 'Username', 'Xabar', 'Fayl'], rows, exports.export_format(request)
+    )
+
 @login_required
 def create_private_chat(request, user_id):
     """Shaxsiy chat yaratish yoki mavjud chatga o'tish"""
     other_user = get_object_or_404(User, id=user_id)
     
-    # Mavjud chatni tekshirish
-    existing_chat = ChatRoom.objects.filter(
-        room_type='private',
-        participants=request.user
-    ).filter(
-        participants=other_user
-    ).first()
-    
-    if existing_chat:
-        return redirect('chat_room', room_id=existing_chat.id)
-    
-    # Yangi chat yaratish
-    chat_room = ChatRoom.objects.create(
-        name=f"{request.user.get_full_name()} - {other_user.get_full_name()}",
-        room_type='private'
-    )
-    chat_room.participants.add(request.user, other_user)
+    # Mavjud chatni topish yoki yaratish - (min_user, max_user) indeksi bo'yicha
+    chat_room, created = ChatRoom.get_or_create_private(request.user, other_user)
     
-    messages.success(request, f"{other_user.get_full_name()} bilan chat yaratildi!")
+    if created:
+        messages.success(request, f"{other_user.get_full_name()} bilan chat yaratildi!")
     return redirect('chat_room', room_id=chat_room.id)
 
 @login_required
 def group_chat(request, group_id):
-    """Guruh chati"""
-    group = get_object_or_404(Group, id=group_id)
-    
-    # Foydalanuvchi guruhga a'zo ekanligini tekshirish
-    is_member = False
-    if request.user.role == 'teacher' and group.teacher == request.user:
-        is_member = True
-    elif request.user.role == 'student' and GroupStudent.objects.filter(group=group, student=request.user).exists():
-        is_member = True
-    elif request.user.role == 'admin':
-        is_member = True
-    
-    if not is_member:
-        messages.error(request, "Siz bu guruhga a'zo emassiz!")
-        return redirect('dashboard')
-    
-    # Guruh chatini topish yoki yaratish
-    chat_room, created = ChatRoom.objects.get_or_create(
-        group=group,
-        room_type='group',
-        defaults={'name': f"{group.name} Chat"}
-    )
-    
-    # Ishtirokchilarni qo'shish
-    if created or chat_room.participants.count() == 0:
-        # O'qituvchini qo'shish
-        if group.teacher:
-            chat_room.participants.add(group.teacher)
-        
-        # O'quvchilarni qo'shish
-        students = User.objects.filter(groupstudent__group=group)
-        chat_room.participants.add(*students)
+    """Guruh chati.
+
+    Ishtirokchilar ``chat.signals`` orqali guruh tarkibi bilan moslanadi -
+    a'zolik xonaning o'zidan bitta indeksli so'rov bilan tekshiriladi.
+    """
+    room_id = ChatRoom.objects.filter(
+        group_id=group_id, room_type='group', participants=request.user
+    ).values_list('id', flat=True).first()
     
-    # Agar foydalanuvchi ishtirokchi bo'lmasa, qo'shish
-    if not chat_room.participants.filter(id=request.user.id).exists():
+    if room_id is None:
+        group = get_object_or_404(Group, id=group_id)
+        # Admin istalgan guruh chatiga qo'shila oladi
+        if request.user.role != 'admin':
+            messages.error(request, "Siz bu guruhga a'zo emassiz!")
+            return redirect('dashboard')
+        chat_room = membership.get_group_room(group)
         chat_room.participants.add(request.user)
+        room_id = chat_room.id
     
-    return redirect('chat_room', room_id=chat_room.id)
+    return redirect('chat_room', room_id=room_id)
 
 @login_required
 def users_list(request):
-    """Foydalanuvchilar ro'yxati (chat uchun)"""
+    """Foydalanuvchilar ro'yxati (chat uchun).
+
+    Kimlar ko'rinishi ``chat.contacts`` indeksidan olinadi (keshlangan),
+    sahifa esa qidiruv bilan bitta so'rovda yuklanadi.
+    """
     user = request.user
+    query = request.GET.get('q', '').strip()
     
-    # Foydalanuvchi roliga qarab ro'yxatni filtrlash
-    if user.role == 'student':
-        # O'quvchi o'z guruhlari o'qituvchilari va boshqa o'quvchilarini ko'radi
-        my_groups = Group.objects.filter(group_students__student=user)
-        teachers = User.objects.filter(teaching_groups__in=my_groups).distinct()
-        students = User.objects.filter(
-            groupstudent__group__in=my_groups
-        ).exclude(id=user.id).distinct()
-        users = teachers | students
-    elif user.role == 'teacher':
-        # O'qituvchi o'z guruhlari o'quvchilarini ko'radi
-        my_groups = Group.objects.filter(teacher=user)
-        users = User.objects.filter(
-            groupstudent__group__in=my_groups
-        ).distinct()
-    elif user.role == 'admin':
-        # Admin barchani ko'radi
-        users = User.objects.exclude(id=user.id)
-    else:
-        users = User.objects.none()
+    index = contacts.get_index(user)
+    page = paginate_keyset(
+        contacts.contacts_queryset(user, index, query), CONTACT_KEYS, request.GET.get('cursor')
+    )
+    contacts.attach_group_labels(user, page.items, index)
     
     return render(request, 'erp/chat/users_list.html', {
-        'users': users
-    })
\ No newline at end of file
+        'users': page.items,
+        'next_cursor': page.next_cursor,
+        'q': query,
+        'group_chats': sorted(index['groups'].items(), key=lambda item: item[1]),
+    })
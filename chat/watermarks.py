@@ -0,0 +1,74 @@
+"""Xonalarning oxirgi xabar id'si (watermark) - jarayon ichidagi kesh.
+
+Polling so'rovlarining aksariyati bo'sh javob qaytaradi. Watermark ma'lum
+bo'lsa ``get_messages`` ``Message`` jadvaliga murojaat qilmasdan "yangi
+xabar yo'q" deb javob beradi yoki ``If-None-Match`` ga 304 qaytaradi.
+
+Har bir yozuv ``ChatRoom.updated_at`` bilan birga saqlanadi. ``send_message``
+xabar yozgach xona saqlanadi va ``updated_at`` o'zgaradi - boshqa jarayon
+(worker) yozgan xabardan keyin bu jarayondagi yozuv o'z-o'zidan eskiradi va
+keyingi so'rovda bazadan qayta o'qiladi.
+
+``Message`` uchun ``post_delete`` signali yo'q - u xona, foydalanuvchi yoki
+guruh o'chirilganda kaskadning tez yo'lini o'chirib qo'yardi. Xabarni
+alohida o'chiradigan joylar (admin) xonaning ``updated_at`` ini yangilaydi.
+Kaskad bilan o'chgan xabardan keyin watermark kattaroq qolishi mumkin - bu
+faqat bitta bo'sh ``Message`` so'roviga olib keladi, xabar yo'qolmaydi.
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import Max
+
+
+class RoomWatermarks:
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, chat_room):
+        """Kesh bo'yicha watermark yoki None (yozuv yo'q yoki eskirgan)"""
+        with self._lock:
+            entry = self._entries.get(chat_room.id)
+            if entry is None or entry[1] != chat_room.updated_at:
+                return None
+            self._entries.move_to_end(chat_room.id)
+            return entry[0]
+
+    def set(self, chat_room, message_id):
+        with self._lock:
+            self._entries[chat_room.id] = (message_id, chat_room.updated_at)
+            self._entries.move_to_end(chat_room.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, room_id):
+        with self._lock:
+            self._entries.pop(room_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    async def aload(self, chat_room):
+        """Keshdan, bo'lmasa bazadan (indeks bo'yicha MAX) o'qib keshlash.
+
+        ``chat_room.updated_at`` MAX dan oldin o'qilgan bo'lishi kerak - shunda
+        orada yozilgan xabar yozuvni eskirtiradi.
+        """
+        watermark = self.get(chat_room)
+        if watermark is None:
+            watermark = (await chat_room.messages.aaggregate(last_id=Max('id')))['last_id'] or 0
+            self.set(chat_room, watermark)
+        return watermark
+
+    async def arefresh(self, chat_room):
+        """Xabar yozilib, xona saqlangandan keyin chaqiriladi"""
+        self.discard(chat_room.id)
+        return await self.aload(chat_room)
+
+
+watermarks = RoomWatermarks(getattr(settings, 'CHAT_WATERMARK_CACHE_SIZE', 10_000))
+
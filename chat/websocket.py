@@ -0,0 +1,96 @@
+"""Chat xonalari uchun WebSocket (ASGI) ilovasi.
+
+Ulanish manzili: ``/ws/chat/<room_id>/``. Foydalanuvchi sessiya cookie
+orqali aniqlanadi, xona ishtirokchisi bo'lmasa ulanish yopiladi. Ulanish
+ochiq turganda ``send_message`` e'lon qilgan har bir xabar JSON ko'rinishida
+yuboriladi (``get_messages`` javobidagi element formati bilan bir xil).
+"""
+import asyncio
+import json
+import re
+from http.cookies import SimpleCookie
+from importlib import import_module
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import aget_user
+
+from .broker import get_broker
+from .models import ChatRoom
+
+
+ROOM_PATH = re.compile(r'^/ws/chat/(?P<room_id>\d+)/$')
+
+CLOSE_NOT_FOUND = 4404
+CLOSE_FORBIDDEN = 4403
+# Navbati to'lgan (sekin) obunachi - mijoz qayta ulanib, qolganini oladi
+CLOSE_SLOW_CONSUMER = 4408
+
+
+def _headers(scope):
+    return {name.decode('latin1').lower(): value.decode('latin1') for name, value in scope.get('headers', [])}
+
+
+def _origin_allowed(headers):
+    """Boshqa saytlardan ochilgan ulanishlarni rad etish (CSWSH)"""
+    origin = headers.get('origin')
+    if not origin:
+        return True
+    return urlsplit(origin).netloc == headers.get('host')
+
+
+async def _get_user(headers):
+    cookie = SimpleCookie()
+    cookie.load(headers.get('cookie', ''))
+    morsel = cookie.get(settings.SESSION_COOKIE_NAME)
+    engine = import_module(settings.SESSION_ENGINE)
+    session = engine.SessionStore(morsel.value if morsel else None)
+    return await aget_user(SimpleNamespace(session=session))
+
+
+async def websocket_application(scope, receive, send):
+    event = await receive()
+    if event['type'] != 'websocket.connect':
+        return
+
+    match = ROOM_PATH.match(scope['path'])
+    if not match:
+        await send({'type': 'websocket.close', 'code': CLOSE_NOT_FOUND})
+        return
+
+    room_id = int(match['room_id'])
+    headers = _headers(scope)
+    user = await _get_user(headers)
+    is_member = user.is_authenticated and await ChatRoom.objects.filter(
+        id=room_id, participants=user
+    ).aexists()
+    if not _origin_allowed(headers) or not is_member:
+        await send({'type': 'websocket.close', 'code': CLOSE_FORBIDDEN})
+        return
+
+    async with get_broker().subscribe(room_id) as subscription:
+        await send({'type': 'websocket.accept'})
+
+        receiver = asyncio.ensure_future(receive())
+        getter = asyncio.ensure_future(subscription.get())
+        try:
+            while True:
+                done, _ = await asyncio.wait({receiver, getter}, return_when=asyncio.FIRST_COMPLETED)
+
+                if getter in done:
+                    payload = getter.result()
+                    if payload is None:
+                        await send({'type': 'websocket.close', 'code': CLOSE_SLOW_CONSUMER})
+                        break
+                    await send({'type': 'websocket.send', 'text': json.dumps(payload)})
+                    getter = asyncio.ensure_future(subscription.get())
+
+                if receiver in done:
+                    # Mijozdan kelgan matnlar e'tiborsiz qoldiriladi (xabar HTTP orqali yuboriladi)
+                    if receiver.result()['type'] == 'websocket.disconnect':
+                        break
+                    receiver = asyncio.ensure_future(receive())
+        finally:
+            receiver.cancel()
+            getter.cancel()
@@ -3,6 +3,21 @@ ASGI config for conf project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+HTTP so'rovlar Django'ga, ``websocket`` ulanishlar esa chat xonalarining
+real vaqt ilovasiga (``chat.websocket``) yo'naltiriladi.
+
+Chat view'lari (``chat_list``, ``chat_room``, ``send_message``,
+``get_messages``) async - ASGI serverda ular event loop'da ishlaydi va
+long-polling yoki WebSocket ulanishlari thread band qilmaydi. Ishga
+tushirish:
+
+    uvicorn conf.asgi:application --host 0.0.0.0 --port 8000 --workers 4
+    daphne -b 0.0.0.0 -p 8000 conf.asgi:application
+
+WSGI (``conf.wsgi``) bilan ham ishlaydi, lekin u yerda har bir async view
+alohida event loop'da bajariladi va kutayotgan so'rov butun worker
+thread'ini band qiladi. Farqni o'lchash: ``manage.py bench_concurrency``.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
@@ -13,4 +28,13 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'conf.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Django sozlangandan keyin import qilinadi (modellarga bog'liq)
+from chat.websocket import websocket_application  # noqa: E402
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        return await websocket_application(scope, receive, send)
+    return await django_application(scope, receive, send)
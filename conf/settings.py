@@ -44,6 +44,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'erp.instrumentation.InstrumentationMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -56,7 +57,8 @@ ROOT_URLCONF = 'conf.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates + render vaqtini o'lchash (erp/instrumentation.py)
+        'BACKEND': 'erp.instrumentation.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -70,6 +72,17 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'conf.wsgi.application'
+ASGI_APPLICATION = 'conf.asgi.application'
+
+# Chat real vaqt xabarlari uchun pub/sub backend (chat/broker.py).
+# Bir nechta worker bo'lsa: 'chat.broker.RedisBroker', OPTIONS={'url': 'redis://...'}
+CHAT_BROKER = {
+    'BACKEND': 'chat.broker.InMemoryBroker',
+    'OPTIONS': {},
+}
+
+# Har bir jarayonda keshlanadigan xona watermark'lari soni (chat.watermarks)
+CHAT_WATERMARK_CACHE_SIZE = 10_000
 
 
 # Database
@@ -83,6 +96,75 @@ DATABASES = {
 }
 
 
+# Cache
+# Dashboard statistikalari (erp/stats.py): TTL - TIMEOUT, LRU - MAX_ENTRIES.
+# Bir nechta worker bo'lsa umumiy backend (Redis/Memcached) tavsiya etiladi.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'dashboard': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'dashboard',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+        },
+    },
+    # chat.contacts: har bir foydalanuvchining kontaktlar indeksi
+    'contacts': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'contacts',
+        'TIMEOUT': 3600,
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+        },
+    },
+    # erp.reports.Gradebook: guruh baholar jurnali (topshiriq o'zgarguncha)
+    'gradebook': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'gradebook',
+        'TIMEOUT': 3600,
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+        },
+    },
+}
+
+
+# Unumdorlik o'lchovlari (erp/instrumentation.py)
+# View nomi -> ruxsat etilgan SQL so'rovlar soni (sessiya va foydalanuvchi so'rovlari bilan)
+VIEW_QUERY_BUDGETS = {
+    'dashboard': 8,
+    'chat_list': 7,
+    'chat_room': 10,
+    'get_messages': 4,
+    'older_messages': 4,
+    'send_message': 12,
+    'search_messages': 4,
+    'search_room_messages': 5,
+    'users_list': 6,
+    'admin_groups': 6,
+    'admin_group_students': 8,
+    'teacher_groups': 6,
+    'teacher_attendance': 8,
+    'teacher_attendance_report': 6,
+    'teacher_homeworks': 6,
+    'teacher_gradebook': 6,
+    'teacher_submissions': 6,
+    'student_groups': 6,
+    'student_homeworks': 6,
+    'support_requests_list': 6,
+    'support_queue': 5,
+    'support_schedule': 4,
+}
+# True bo'lsa chegaradan oshish xatoga aylanadi (testlar uchun), aks holda log
+QUERY_BUDGET_RAISE = False
+# Har bir view uchun xotirada saqlanadigan oxirgi o'lchovlar soni
+PERF_STATS_WINDOW = 500
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Group, GroupStudent, Attendance, Homework, HomeworkSubmission, SupportRequest
+from .models import (User, Group, GroupStudent, Attendance, Homework, HomeworkSubmission, PendingHomeworkCounter,
+                     SupportRequest)
 
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
@@ -46,6 +47,12 @@ class HomeworkSubmissionAdmin(admin.ModelAdmin):
     search_fields = ('student__first_name', 'student__last_name', 'homework__title')
     date_hierarchy = 'submitted_at'
 
+@admin.register(PendingHomeworkCounter)
+class PendingHomeworkCounterAdmin(admin.ModelAdmin):
+    list_display = ('student', 'pending_homeworks', 'next_deadline', 'updated_at')
+    search_fields = ('student__first_name', 'student__last_name', 'student__username')
+    readonly_fields = ('student', 'pending_homeworks', 'next_deadline', 'updated_at')
+
 @admin.register(SupportRequest)
 class SupportRequestAdmin(admin.ModelAdmin):
     list_display = ('student', 'topic', 'scheduled_date', 'scheduled_time', 'status', 'support_teacher')
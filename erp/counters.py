@@ -0,0 +1,80 @@
+"""O'quvchilarning kutilayotgan vazifalari soni - ``PendingHomeworkCounter``.
+
+Dashboard har safar guruhlar, vazifalar va topshiriqlar ustida anti-join
+qilmasligi uchun son alohida jadvalda saqlanadi va bitta qator bo'lib
+o'qiladi. ``erp.signals`` sonni vazifa yaratilganda yoki muddati
+o'zgarganda (guruhning barcha o'quvchilari), topshiriq va guruh a'zoligi
+o'zgarganda (bitta o'quvchi) qayta hisoblaydi.
+
+Muddati o'tgan vazifalar sondan chiqishi uchun har qatorda eng yaqin muddat
+(``next_deadline``) saqlanadi: ``manage.py reconcile_pending_homeworks``
+muddati o'tgan qatorlarni davriy yangilaydi, ``get_pending_count`` esa
+o'qishda ham eskirgan qatorni o'zi qayta hisoblaydi.
+"""
+from django.db.models import Count, Exists, Min, OuterRef
+from django.utils import timezone
+
+from .models import GroupStudent, Homework, HomeworkSubmission, PendingHomeworkCounter, User
+
+
+BATCH_SIZE = 500
+
+STUDENT = 'group__group_students__student'
+
+
+def _chunks(ids):
+    ids = list(ids)
+    for start in range(0, len(ids), BATCH_SIZE):
+        yield ids[start:start + BATCH_SIZE]
+
+
+def refresh(student_ids):
+    """Berilgan o'quvchilar qatorlarini qayta hisoblash - har bo'lakka bitta guruhlangan so'rov.
+
+    {student_id: son} qaytaradi.
+    """
+    now = timezone.now()
+    result = {}
+    for chunk in _chunks({student_id for student_id in student_ids if student_id}):
+        # O'chirilgan foydalanuvchilar uchun qator yozilmaydi
+        chunk = list(User.objects.filter(id__in=chunk).values_list('id', flat=True))
+        rows = Homework.objects.filter(
+            ~Exists(HomeworkSubmission.objects.filter(homework=OuterRef('pk'), student=OuterRef(STUDENT))),
+            deadline__gte=now, **{f'{STUDENT}__in': chunk},
+        ).values(STUDENT).annotate(pending=Count('id'), next_deadline=Min('deadline')).order_by()
+        counts = {row[STUDENT]: (row['pending'], row['next_deadline']) for row in rows}
+
+        PendingHomeworkCounter.objects.bulk_create([
+            PendingHomeworkCounter(
+                student_id=student_id,
+                pending_homeworks=counts.get(student_id, (0, None))[0],
+                next_deadline=counts.get(student_id, (0, None))[1],
+                updated_at=now,
+            )
+            for student_id in chunk
+        ], update_conflicts=True, unique_fields=['student'],
+            update_fields=['pending_homeworks', 'next_deadline', 'updated_at'])
+        result.update((student_id, counts.get(student_id, (0, None))[0]) for student_id in chunk)
+    return result
+
+
+def refresh_groups(group_ids):
+    return refresh(GroupStudent.objects.filter(group_id__in=group_ids).values_list('student_id', flat=True))
+
+
+def reconcile(now=None):
+    """Muddati o'tgan vazifalarni sondan chiqarish (``next_deadline`` indeksi bo'yicha)"""
+    now = now or timezone.now()
+    return refresh(
+        PendingHomeworkCounter.objects.filter(next_deadline__lt=now).values_list('student_id', flat=True)
+    )
+
+
+def get_pending_count(user):
+    """Dashboard uchun: bitta qator; qator yo'q yoki eskirgan bo'lsa - joyida qayta hisoblash"""
+    counter = PendingHomeworkCounter.objects.filter(student=user).values_list(
+        'pending_homeworks', 'next_deadline'
+    ).first()
+    if counter is None or (counter[1] is not None and counter[1] < timezone.now()):
+        return refresh([user.id])[user.id]
+    return counter[0]
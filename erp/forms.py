@@ -1,6 +1,8 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
+from django.db.models import Exists, OuterRef
 from .models import User, Group, GroupStudent, Attendance, Homework, HomeworkSubmission, SupportRequest
+from . import schedule
 
 class UserRegistrationForm(UserCreationForm):
     class Meta:
@@ -35,7 +37,8 @@ class GroupStudentForm(forms.ModelForm):
         model = GroupStudent
         fields = ('student',)
         widgets = {
-            'student': forms.Select(attrs={'class': 'form-control'}),
+            # Ro'yxat sahifada chizilmaydi - o'quvchi autocomplete orqali tanlanadi
+            'student': forms.HiddenInput(),
         }
     
     def __init__(self, *args, **kwargs):
@@ -43,8 +46,16 @@ class GroupStudentForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         self.fields['student'].queryset = User.objects.filter(role='student')
         if group:
-            existing_students = GroupStudent.objects.filter(group=group).values_list('student_id', flat=True)
-            self.fields['student'].queryset = self.fields['student'].queryset.exclude(id__in=existing_students)
+            self.fields['student'].queryset = self.fields['student'].queryset.exclude(
+                Exists(GroupStudent.objects.filter(group=group, student=OuterRef('pk')))
+            )
+        self.fields['student'].error_messages['invalid_choice'] = 'O\'quvchi topilmadi yoki allaqachon guruhda.'
+
+class RosterImportForm(forms.Form):
+    file = forms.FileField(
+        label='CSV yoki JSON fayl',
+        widget=forms.FileInput(attrs={'class': 'form-control', 'accept': '.csv,.json'}),
+    )
 
 class AttendanceForm(forms.ModelForm):
     class Meta:
@@ -83,9 +94,14 @@ class GradeSubmissionForm(forms.ModelForm):
         model = HomeworkSubmission
         fields = ('score', 'feedback')
         widgets = {
-            'score': forms.NumberInput(attrs={'class': 'form-control', 'min': 0, 'max': 100}),
+            'score': forms.NumberInput(attrs={'class': 'form-control', 'min': 0}),
             'feedback': forms.Textarea(attrs={'class': 'form-control', 'rows': 3, 'placeholder': 'Izoh'}),
         }
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Yuqori chegara HomeworkSubmission.clean() da tekshiriladi
+        self.fields['score'].widget.attrs['max'] = self.instance.homework.max_score
 
 class SupportRequestForm(forms.ModelForm):
     class Meta:
@@ -96,12 +112,31 @@ class SupportRequestForm(forms.ModelForm):
             'topic': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Mavzu'}),
             'description': forms.Textarea(attrs={'class': 'form-control', 'rows': 4, 'placeholder': 'Batafsil ma\'lumot'}),
             'scheduled_date': forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
-            'scheduled_time': forms.TimeInput(attrs={'class': 'form-control', 'type': 'time'}),
+            'scheduled_time': forms.TimeInput(attrs={'class': 'form-control', 'type': 'time', 'list': 'free-slots'}),
         }
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.fields['support_teacher'].queryset = User.objects.filter(role='support_teacher')
+        # Tanlangan kun uchun bo'sh vaqtlar (clean dan keyin, shablondagi datalist uchun)
+        self.free_slots = []
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        support_teacher = cleaned_data.get('support_teacher')
+        scheduled_date = cleaned_data.get('scheduled_date')
+        scheduled_time = cleaned_data.get('scheduled_time')
+        
+        if support_teacher and scheduled_date and scheduled_time:
+            day = schedule.load_day(support_teacher, scheduled_date, exclude_id=self.instance.pk)
+            if day.is_busy(schedule.to_minutes(scheduled_time)):
+                self.free_slots = day.free_slots()
+                if self.free_slots:
+                    slots = ', '.join(slot.strftime('%H:%M') for slot in self.free_slots)
+                    self.add_error('scheduled_time', f"Bu vaqt band. Bo'sh vaqtlar: {slots}")
+                else:
+                    self.add_error('scheduled_date', "Bu kunda bo'sh vaqt qolmagan, boshqa kunni tanlang")
+        return cleaned_data
         
 from django import forms
 from django.contrib.auth import get_user_model
@@ -0,0 +1,110 @@
+"""Bir vazifaning ko'p topshiriqlarini bitta so'rovda baholash.
+
+Baholar ``(submission_id, score, feedback)`` ko'rinishida keladi (forma yoki
+JSON). Holat ``HomeworkSubmission.status_for`` bilan (``save()`` dagi qoida)
+hisoblanadi va hammasi bitta tranzaksiyada ``bulk_update`` bilan yoziladi.
+``bulk_update`` ``save()`` va signallarni chaqirmaydi - holat shu yerda
+qo'yiladi, dashboard va baholar jurnali keshi qo'lda eskirtiriladi.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from . import reports, stats
+from .models import HomeworkSubmission
+
+
+FIELDS = ('score', 'feedback', 'status', 'graded_at')
+
+
+def _integer(value):
+    """Butun son: ``int`` yoki raqamli satr (formadan). ``bool``, kasr (85.9), ``inf`` - None"""
+    if isinstance(value, bool):
+        return None
+    try:
+        if isinstance(value, int):
+            return value
+        if isinstance(value, float):
+            return int(value) if value.is_integer() else None
+        if isinstance(value, str):
+            return int(value.strip())
+    except (ValueError, OverflowError):
+        return None
+    return None
+
+
+def clean_grades(homework, entries):
+    """``entries`` - (id, score, feedback) lar. Natija: ({id: (score, feedback)}, [xatolar])"""
+    grades = {}
+    errors = []
+    for entry in entries:
+        if not isinstance(entry, (list, tuple)) or len(entry) != 3:
+            errors.append(f"Noto'g'ri yozuv: {entry!r}")
+            continue
+        submission_id, score, feedback = entry
+        submission_id = _integer(submission_id)
+        if submission_id is None:
+            errors.append(f"Noto'g'ri yozuv: {entry!r}")
+            continue
+        if feedback is not None and not isinstance(feedback, str):
+            errors.append(f"#{submission_id}: izoh matn bo'lishi kerak")
+            continue
+        if score is None or score == '':
+            # Ball yozilmagan - bu topshiriq baholanmaydi
+            continue
+        score = _integer(score)
+        if score is None:
+            errors.append(f"#{submission_id}: ball butun son bo'lishi kerak")
+            continue
+        if not 0 <= score <= homework.max_score:
+            errors.append(f"#{submission_id}: ball 0 dan {homework.max_score} gacha bo'lishi kerak")
+            continue
+        grades[submission_id] = (score, (feedback or '').strip() or None)
+    return grades, errors
+
+
+def entries_from_post(data):
+    """Formadan: ``score_<id>`` va ``feedback_<id>`` maydonlari"""
+    return [
+        (key[len('score_'):], data[key], data.get(f'feedback_{key[len("score_"):]}'))
+        for key in data if key.startswith('score_')
+    ]
+
+
+def entries_from_json(payload):
+    """JSON dan: ``{"grades": [[id, score, feedback], ...]}`` yoki ``{"id", "score", "feedback"}`` ob'ektlari.
+
+    Ro'yxat yoki ob'ekt bo'lmagan element o'zgarishsiz qoladi - ``clean_grades`` uni xato deb qaytaradi.
+    """
+    grades = payload.get('grades') if isinstance(payload, dict) else payload
+    if not isinstance(grades, list):
+        return None
+    return [
+        (item.get('id'), item.get('score'), item.get('feedback')) if isinstance(item, dict) else item
+        for item in grades
+    ]
+
+
+def apply_grades(homework, grades):
+    """Baholarni yozish. O'zgargan topshiriqlar sonini va topilmagan id larni qaytaradi"""
+    now = timezone.now()
+    with transaction.atomic():
+        submissions = list(
+            HomeworkSubmission.objects.select_for_update().filter(homework=homework, id__in=list(grades))
+        )
+        changed = []
+        for submission in submissions:
+            score, feedback = grades[submission.pk]
+            if (submission.score, submission.feedback) == (score, feedback):
+                continue
+            submission.score = score
+            submission.feedback = feedback
+            submission.status = HomeworkSubmission.status_for(score)
+            submission.graded_at = now
+            changed.append(submission)
+        HomeworkSubmission.objects.bulk_update(changed, FIELDS, batch_size=500)
+
+    if changed:
+        stats.invalidate_users([submission.student_id for submission in changed] + [homework.group.teacher_id])
+        reports.invalidate_gradebooks([homework.group_id])
+    missing = sorted(set(grades) - {submission.pk for submission in submissions})
+    return len(changed), missing
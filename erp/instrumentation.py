@@ -0,0 +1,238 @@
+"""So'rovlar unumdorligini o'lchash.
+
+``InstrumentationMiddleware`` ``erp.urls`` va ``chat.urls`` dagi har bir
+view uchun SQL so'rovlar soni va vaqtini, shablon render vaqtini va umumiy
+kechikishni yozib boradi:
+
+* javobga ``Server-Timing`` sarlavhasi qo'shiladi (brauzer DevTools'da ko'rinadi);
+* oxirgi ``PERF_STATS_WINDOW`` ta so'rov bo'yicha statistikalar xotirada
+  saqlanadi va ``perf_stats`` endpointi orqali JSON ko'rinishida beriladi;
+* ``settings.VIEW_QUERY_BUDGETS`` dagi chegaradan oshgan view log'ga yoziladi,
+  ``QUERY_BUDGET_RAISE = True`` bo'lsa ``QueryBudgetExceeded`` ko'tariladi
+  (testlarda N+1 ni ushlash uchun).
+
+So'rovlar har bir DB ulanishiga o'rnatilgan ``execute_wrapper`` orqali,
+joriy so'rov esa ``ContextVar`` orqali topiladi - shu sababli
+``sync_to_async`` ichida bajarilgan ORM chaqiruvlari ham hisoblanadi.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates
+
+
+logger = logging.getLogger(__name__)
+
+INSTRUMENTED_URLCONFS = ('erp.urls', 'chat.urls')
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class RequestMetrics:
+    __slots__ = ('started', 'queries', 'allowed_queries', 'sql_time', 'template_time')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.allowed_queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+
+    @property
+    def total_time(self):
+        return time.perf_counter() - self.started
+
+
+def record_query(execute, sql, params, many, context):
+    """DB ulanishlariga o'rnatiladigan execute_wrapper"""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.sql_time += time.perf_counter() - started
+
+
+def allow_queries(count=1):
+    """Kutilgan qo'shimcha so'rovlarni chegaradan chiqarish (masalan long-polling qayta tekshiruvi)"""
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.allowed_queries += count
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """connection_created signali: yangi ulanishga record_query ni qo'shish"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class TimedTemplate:
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return self.template.render(context, request)
+        started = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Render vaqtini o'lchaydigan Django shablon backendi"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+class ViewStats:
+    """Har bir view uchun oxirgi N ta o'lchov (xotirada, jarayon bo'yicha)"""
+
+    def __init__(self, window):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=self.window))
+        self._budget_violations = defaultdict(int)
+
+    def add(self, view_name, metrics, total_time, over_budget):
+        sample = (total_time, metrics.queries, metrics.sql_time, metrics.template_time)
+        with self._lock:
+            self._samples[view_name].append(sample)
+            if over_budget:
+                self._budget_violations[view_name] += 1
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+            self._budget_violations.clear()
+
+    @staticmethod
+    def _percentile(values, percent):
+        index = min(len(values) - 1, int(round(percent / 100 * (len(values) - 1))))
+        return values[index]
+
+    def snapshot(self):
+        with self._lock:
+            samples = {name: list(values) for name, values in self._samples.items()}
+            violations = dict(self._budget_violations)
+
+        result = {}
+        for name, values in sorted(samples.items()):
+            latencies = sorted(sample[0] * 1000 for sample in values)
+            queries = [sample[1] for sample in values]
+            result[name] = {
+                'count': len(values),
+                'p50_ms': round(self._percentile(latencies, 50), 2),
+                'p95_ms': round(self._percentile(latencies, 95), 2),
+                'p99_ms': round(self._percentile(latencies, 99), 2),
+                'max_ms': round(latencies[-1], 2),
+                'avg_queries': round(sum(queries) / len(queries), 2),
+                'max_queries': max(queries),
+                'avg_sql_ms': round(sum(sample[2] for sample in values) * 1000 / len(values), 2),
+                'avg_template_ms': round(sum(sample[3] for sample in values) * 1000 / len(values), 2),
+                'query_budget': query_budget(name),
+                'budget_violations': violations.get(name, 0),
+            }
+        return result
+
+
+view_stats = ViewStats(getattr(settings, 'PERF_STATS_WINDOW', 500))
+
+
+def query_budget(view_name):
+    return getattr(settings, 'VIEW_QUERY_BUDGETS', {}).get(view_name)
+
+
+_instrumented_names = None
+
+
+def instrumented_view_names():
+    global _instrumented_names
+    if _instrumented_names is None:
+        from importlib import import_module
+
+        names = set()
+        for urlconf in INSTRUMENTED_URLCONFS:
+            names.update(
+                pattern.name for pattern in import_module(urlconf).urlpatterns if getattr(pattern, 'name', None)
+            )
+        _instrumented_names = frozenset(names)
+    return _instrumented_names
+
+
+def server_timing(metrics, total_time):
+    return ', '.join([
+        f'db;dur={metrics.sql_time * 1000:.1f};desc="{metrics.queries} queries"',
+        f'tpl;dur={metrics.template_time * 1000:.1f}',
+        f'total;dur={total_time * 1000:.1f}',
+    ])
+
+
+class InstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    def finish(self, request, response, metrics):
+        match = getattr(request, 'resolver_match', None)
+        if match is None or match.url_name not in instrumented_view_names():
+            return response
+
+        total_time = metrics.total_time
+        budget = query_budget(match.url_name)
+        over_budget = budget is not None and metrics.queries - metrics.allowed_queries > budget
+
+        view_stats.add(match.url_name, metrics, total_time, over_budget)
+        response['Server-Timing'] = server_timing(metrics, total_time)
+
+        if over_budget:
+            message = f"{match.url_name}: {metrics.queries} ta SQL so'rov (chegara {budget}) - {request.path}"
+            if getattr(settings, 'QUERY_BUDGET_RAISE', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
@@ -0,0 +1,298 @@
+import random
+import time
+from datetime import time as dt_time, timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from chat.models import ChatReadState, ChatRoom, Message
+from erp.models import Attendance, Group, GroupStudent, Homework, HomeworkSubmission, SupportRequest, User
+
+
+# Yaratilgan ma'lumotlar shu prefiks bilan belgilanadi (--clear ularni o'chiradi)
+PREFIX = 'gen_'
+
+SCALES = {
+    'small': {
+        'teachers': 10, 'students': 300, 'support_teachers': 3, 'groups': 20,
+        'group_size': 15, 'homeworks': 10, 'days': 365, 'private_chats': 300, 'messages': 50_000,
+    },
+    'medium': {
+        'teachers': 50, 'students': 3_000, 'support_teachers': 10, 'groups': 150,
+        'group_size': 20, 'homeworks': 20, 'days': 365, 'private_chats': 3_000, 'messages': 500_000,
+    },
+    'large': {
+        'teachers': 200, 'students': 20_000, 'support_teachers': 30, 'groups': 1_000,
+        'group_size': 25, 'homeworks': 30, 'days': 365, 'private_chats': 20_000, 'messages': 3_000_000,
+    },
+}
+
+WORDS = (
+    "salom dars vazifa ertaga bugun guruh savol javob imtihon matematika fizika ingliz tili "
+    "kitob daftar mashq yordam rahmat iltimos qachon qayerda nima uchun albatta tushundim "
+    "tushunmadim qayta yuboring fayl muddat baho ustoz o'quvchi loyiha test natija"
+).split()
+
+FIRST_NAMES = ['Aziz', 'Dilnoza', 'Jasur', 'Malika', 'Sardor', 'Nilufar', 'Bekzod', 'Gulnora', 'Otabek', 'Zarina']
+LAST_NAMES = ['Karimov', 'Rahimova', 'Toshmatov', 'Yusupova', 'Aliyev', 'Qodirova', 'Ergashev', 'Saidova']
+
+
+class Command(BaseCommand):
+    help = "Unumdorlikni o'lchash uchun sintetik ma'lumotlar yaratish (foydalanuvchilar, guruhlar, davomat, vazifalar, chat)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+        for name in SCALES['small']:
+            parser.add_argument(f'--{name.replace("_", "-")}', type=int, dest=name, help=f"{name} (scale qiymatini almashtiradi)")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5_000)
+        parser.add_argument('--clear', action='store_true', help=f"Avval '{PREFIX}' bilan yaratilgan ma'lumotlarni o'chirish")
+        parser.add_argument(
+            '--password', help="Yaratilgan foydalanuvchilar paroli (berilmasa - parol bilan kirib bo'lmaydi)"
+        )
+        parser.add_argument('--force', action='store_true', help='DEBUG=False bo\'lsa ham ishga tushirish')
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError("DEBUG=False - bu ishchi baza bo'lishi mumkin. Ishonchingiz komil bo'lsa --force bilan.")
+        self.password = options['password']
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.config = dict(SCALES[options['scale']])
+        for name in self.config:
+            if options.get(name) is not None:
+                self.config[name] = options[name]
+
+        if options['clear']:
+            self.step('Eski ma\'lumotlarni o\'chirish', self.clear)
+        elif User.objects.filter(username__startswith=PREFIX).exists():
+            raise CommandError(f"'{PREFIX}' ma'lumotlari allaqachon mavjud. --clear bilan qayta yarating.")
+
+        self.now = timezone.now()
+        self.today = self.now.date()
+
+        self.step('Foydalanuvchilar', self.create_users)
+        self.step('Guruhlar va a\'zolar', self.create_groups)
+        self.step('Davomat', self.create_attendance)
+        self.step('Vazifalar va topshiriqlar', self.create_homeworks)
+        self.step('Yordam so\'rovlari', self.create_support_requests)
+        self.step('Chat xonalari', self.create_rooms)
+        self.step('Xabarlar', self.create_messages)
+        self.step('O\'qilganlik holatlari', self.create_read_states)
+
+        caches['dashboard'].clear()
+        self.stdout.write(self.style.SUCCESS('Tayyor'))
+
+    def step(self, title, func):
+        started = time.perf_counter()
+        count = func()
+        suffix = f' ({count} ta)' if count is not None else ''
+        self.stdout.write(f'{title}{suffix}: {time.perf_counter() - started:.1f}s')
+
+    def bulk(self, model, objects, **kwargs):
+        """Generator/ro'yxatdan bo'laklab, har bo'lak alohida tranzaksiyada yozish"""
+        total = 0
+        chunk = []
+        for obj in objects:
+            chunk.append(obj)
+            if len(chunk) >= self.batch_size:
+                with transaction.atomic():
+                    model.objects.bulk_create(chunk, batch_size=self.batch_size, **kwargs)
+                total += len(chunk)
+                chunk = []
+        if chunk:
+            with transaction.atomic():
+                model.objects.bulk_create(chunk, batch_size=self.batch_size, **kwargs)
+            total += len(chunk)
+        return total
+
+    def clear(self):
+        ChatRoom.objects.filter(name__startswith=PREFIX).delete()
+        Group.objects.filter(name__startswith=PREFIX).delete()
+        deleted, _ = User.objects.filter(username__startswith=PREFIX).delete()
+        return deleted
+
+    def text(self, low=3, high=15):
+        return ' '.join(self.random.choices(WORDS, k=self.random.randint(low, high)))
+
+    def create_users(self):
+        # Parol xeshi bitta - minglab foydalanuvchi uchun PBKDF2 hisoblamaslik uchun.
+        # --password berilmasa make_password(None) kirib bo'lmaydigan parol qaytaradi
+        password = make_password(self.password)
+        users = []
+        for role, count in (('admin', 1), ('teacher', self.config['teachers']),
+                            ('student', self.config['students']), ('support_teacher', self.config['support_teachers'])):
+            for index in range(count):
+                users.append(User(
+                    username=f'{PREFIX}{role}_{index}',
+                    password=password,
+                    first_name=self.random.choice(FIRST_NAMES),
+                    last_name=self.random.choice(LAST_NAMES),
+                    role=role,
+                ))
+        total = self.bulk(User, users)
+
+        generated = User.objects.filter(username__startswith=PREFIX)
+        self.teacher_ids = list(generated.filter(role='teacher').values_list('id', flat=True))
+        self.student_ids = list(generated.filter(role='student').values_list('id', flat=True))
+        self.support_ids = list(generated.filter(role='support_teacher').values_list('id', flat=True))
+        return total
+
+    def create_groups(self):
+        self.bulk(Group, (
+            Group(name=f'{PREFIX}group_{index}', teacher_id=self.random.choice(self.teacher_ids))
+            for index in range(self.config['groups'])
+        ))
+        self.groups = list(Group.objects.filter(name__startswith=PREFIX).values_list('id', 'teacher_id'))
+
+        size = min(self.config['group_size'], len(self.student_ids))
+        self.members = {
+            group_id: self.random.sample(self.student_ids, size) for group_id, _ in self.groups
+        }
+        return self.bulk(GroupStudent, (
+            GroupStudent(group_id=group_id, student_id=student_id)
+            for group_id, student_ids in self.members.items()
+            for student_id in student_ids
+        ))
+
+    def create_attendance(self):
+        statuses = ['present'] * 8 + ['absent', 'late', 'excused']
+        start = self.today - timedelta(days=self.config['days'] - 1)
+        lesson_days = [
+            start + timedelta(days=offset)
+            for offset in range(self.config['days'])
+            if (start + timedelta(days=offset)).weekday() < 5
+        ]
+        return self.bulk(Attendance, (
+            Attendance(
+                group_id=group_id, student_id=student_id, date=day,
+                status=self.random.choice(statuses), created_by_id=teacher_id,
+            )
+            for group_id, teacher_id in self.groups
+            for day in lesson_days
+            for student_id in self.members[group_id]
+        ))
+
+    def create_homeworks(self):
+        count = self.config['homeworks']
+        span = timedelta(days=self.config['days'])
+        self.bulk(Homework, (
+            Homework(
+                group_id=group_id, title=f'Vazifa {index + 1}', description=self.text(10, 40),
+                # Ko'pchiligi o'tmishda, oxirgilari kelajakda
+                deadline=self.now - span + span * (index + 1) / count + timedelta(days=7),
+                max_score=100, created_by_id=teacher_id,
+            )
+            for group_id, teacher_id in self.groups
+            for index in range(count)
+        ))
+
+        homeworks = Homework.objects.filter(group__name__startswith=PREFIX).values_list('id', 'group_id', 'deadline')
+
+        def submissions():
+            for homework_id, group_id, deadline in homeworks.iterator():
+                for student_id in self.members[group_id]:
+                    if self.random.random() > 0.8:
+                        continue
+                    score = None
+                    status = 'pending'
+                    if deadline < self.now and self.random.random() < 0.9:
+                        score = self.random.randint(30, 100)
+                        status = 'rejected' if score < 60 else 'graded'
+                    yield HomeworkSubmission(
+                        homework_id=homework_id, student_id=student_id, text_answer=self.text(),
+                        score=score, status=status, graded_at=self.now if score is not None else None,
+                    )
+
+        return self.bulk(HomeworkSubmission, submissions())
+
+    def create_support_requests(self):
+        if not self.support_ids:
+            return 0
+        return self.bulk(SupportRequest, (
+            SupportRequest(
+                student_id=self.random.choice(self.student_ids),
+                support_teacher_id=self.random.choice(self.support_ids),
+                topic=self.text(2, 5), description=self.text(10, 30),
+                scheduled_date=self.today + timedelta(days=self.random.randint(-30, 30)),
+                scheduled_time=dt_time(self.random.randint(9, 17), self.random.choice([0, 30])),
+                status=self.random.choice(['pending', 'viewed']),
+            )
+            for _ in range(len(self.student_ids) // 2)
+        ))
+
+    def create_rooms(self):
+        rooms = [ChatRoom(room_type='group', group_id=group_id, name=f'{PREFIX}group_{group_id} Chat')
+                 for group_id, _ in self.groups]
+        pairs = set()
+        people = self.student_ids + self.teacher_ids
+        while len(pairs) < min(self.config['private_chats'], len(people) * (len(people) - 1) // 2):
+            first, second = self.random.sample(people, 2)
+            pairs.add((min(first, second), max(first, second)))
+        rooms.extend(
+            ChatRoom(room_type='private', name=f'{PREFIX}dm_{first}_{second}', min_user_id=first, max_user_id=second)
+            for first, second in pairs
+        )
+        self.bulk(ChatRoom, rooms)
+
+        group_rooms = dict(ChatRoom.objects.filter(group_id__in=self.members).values_list('group_id', 'id'))
+        private_rooms = dict(
+            ChatRoom.objects.filter(room_type='private', name__startswith=f'{PREFIX}dm_').values_list('name', 'id')
+        )
+
+        self.room_members = {}
+        for group_id, teacher_id in self.groups:
+            self.room_members[group_rooms[group_id]] = self.members[group_id] + [teacher_id]
+        for first, second in pairs:
+            self.room_members[private_rooms[f'{PREFIX}dm_{first}_{second}']] = [first, second]
+
+        Membership = ChatRoom.participants.through
+        return self.bulk(Membership, (
+            Membership(chatroom_id=room_id, user_id=user_id)
+            for room_id, user_ids in self.room_members.items()
+            for user_id in user_ids
+        ))
+
+    def create_messages(self):
+        room_ids = list(self.room_members)
+        # Guruh chatlari faolroq
+        weights = [len(self.room_members[room_id]) for room_id in room_ids]
+        total = self.config['messages']
+        start = self.now - timedelta(days=self.config['days'])
+        step = timedelta(days=self.config['days']) / max(total, 1)
+
+        def messages():
+            # Xonalar bo'yicha tasodifiy, vaqt bo'yicha o'suvchi tartibda
+            for index, room_id in enumerate(self.random.choices(room_ids, weights=weights, k=total)):
+                yield Message(
+                    chat_room_id=room_id,
+                    sender_id=self.random.choice(self.room_members[room_id]),
+                    content=self.text(),
+                    is_read=True,
+                    created_at=start + step * index,
+                )
+
+        # auto_now_add bulk_create da ham "hozir" ni yozadi - tarixiy vaqt uchun vaqtincha o'chiramiz
+        created_at = Message._meta.get_field('created_at')
+        created_at.auto_now_add = False
+        try:
+            return self.bulk(Message, messages())
+        finally:
+            created_at.auto_now_add = True
+
+    def create_read_states(self):
+        last_ids = dict(
+            Message.objects.filter(chat_room_id__in=list(self.room_members)).values('chat_room').annotate(
+                last_id=Max('id')
+            ).values_list('chat_room', 'last_id')
+        )
+        return self.bulk(ChatReadState, (
+            ChatReadState(chat_room_id=room_id, user_id=user_id, last_read_id=last_ids.get(room_id, 0))
+            for room_id, user_ids in self.room_members.items()
+            for user_id in user_ids
+        ), ignore_conflicts=True)
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from erp import roster
+from erp.models import Group
+
+
+class Command(BaseCommand):
+    help = (
+        "O'quvchilarni CSV/JSON fayldan yaratish va guruhlarga yozish. "
+        "Ustunlar: username, first_name, last_name, phone, password, group (guruh id si)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV yoki JSON fayl')
+        parser.add_argument('--group', type=int, help="Barcha o'quvchilarni shu guruhga yozish (group ustuni o'rniga)")
+        parser.add_argument('--format', choices=('csv', 'json'), help="Fayl kengaytmasidan aniqlanmasa")
+
+    def handle(self, *args, **options):
+        group = None
+        if options['group']:
+            group = Group.objects.filter(pk=options['group']).first()
+            if group is None:
+                raise CommandError(f"{options['group']} id li guruh topilmadi")
+
+        try:
+            with open(options['path'], 'rb') as source:
+                rows = roster.parse(source.read(), options['format'] or roster.file_format(options['path']))
+        except (OSError, UnicodeDecodeError, roster.RosterError) as error:
+            raise CommandError(error)
+
+        started = time.perf_counter()
+        result = roster.import_rows(rows, group=group)
+        for line, error in result['errors']:
+            self.stderr.write(f'{line}-qator: {error}')
+        self.stdout.write(self.style.SUCCESS(
+            f"Yangi o'quvchilar: {result['created']}, avvaldan bor: {result['existing']}, "
+            f"guruhga qo'shildi: {result['enrolled']}, xatolar: {len(result['errors'])} "
+            f"({time.perf_counter() - started:.1f}s)"
+        ))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from erp import counters
+from erp.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Kutilayotgan vazifalar sonini yangilash: muddati o'tgan vazifalarni sondan chiqarish. "
+        "Davriy ishga tushiring (masalan, cron orqali har 5 daqiqada); --all - barcha o'quvchilarni qayta hisoblash"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Barcha o'quvchilar qatorlarini qayta hisoblash")
+
+    def handle(self, *args, **options):
+        if options['all']:
+            refreshed = counters.refresh(User.objects.filter(role='student').values_list('id', flat=True))
+        else:
+            refreshed = counters.reconcile()
+        self.stdout.write(self.style.SUCCESS(f"Yangilangan o'quvchilar: {len(refreshed)}"))
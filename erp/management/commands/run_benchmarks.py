@@ -0,0 +1,163 @@
+import json
+import statistics
+import subprocess
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from chat.models import ChatRoom
+from erp.models import Group, Homework, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Asosiy view'larni test client orqali o'lchash: p50/p99 kechikish, SQL so'rovlar soni, "
+        "eng yuqori xotira. Natija JSON faylga yoziladi va oldingi natija bilan solishtiriladi. "
+        "Ma'lumotlar uchun avval: manage.py generate_data"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--output', default='benchmarks.json')
+        parser.add_argument('--compare', help="Oldingi natijalar fayli (JSON)")
+        parser.add_argument('--cold', action='store_true', help="Har bir so'rovdan oldin dashboard keshini tozalash")
+        parser.add_argument('--only', nargs='*', help="Faqat shu nomdagi benchmarklar")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        scenarios = self.scenarios()
+        if options['only']:
+            scenarios = [scenario for scenario in scenarios if scenario[0] in options['only']]
+
+        results = {}
+        for name, user, url in scenarios:
+            results[name] = self.measure(user, url, options)
+            self.stdout.write(self.format_row(name, results[name]))
+
+        report = {'meta': self.meta(options), 'results': results}
+        Path(options['output']).write_text(json.dumps(report, indent=2, ensure_ascii=False))
+        self.stdout.write(self.style.SUCCESS(f"Natija: {options['output']}"))
+
+        if options['compare']:
+            self.compare(json.loads(Path(options['compare']).read_text()), report)
+
+    def scenarios(self):
+        """(nom, foydalanuvchi, url) - eng ko'p ma'lumotga ega obyektlar tanlanadi"""
+        teacher_group = Group.objects.filter(teacher__isnull=False).annotate(
+            size=Count('group_students')
+        ).select_related('teacher').order_by('-size').first()
+        if teacher_group is None:
+            raise CommandError("Ma'lumot yo'q. Avval: python manage.py generate_data")
+
+        room = ChatRoom.objects.annotate(size=Count('messages')).order_by('-size').first()
+        room_user = room.participants.first()
+        student = User.objects.filter(role='student', groupstudent__group=teacher_group).first()
+        admin = User.objects.filter(role='admin').first()
+        homework = Homework.objects.filter(group=teacher_group, deadline__lte=timezone.now()).annotate(
+            size=Count('submissions')
+        ).order_by('-size').first() or Homework.objects.filter(group=teacher_group).first()
+        last_message_id = room.messages.order_by('-id').values_list('id', flat=True).first() or 0
+
+        scenarios = [
+            ('dashboard[student]', student, reverse('dashboard')),
+            ('dashboard[teacher]', teacher_group.teacher, reverse('dashboard')),
+            ('dashboard[admin]', admin, reverse('dashboard')),
+            ('chat_list', room_user, reverse('chat_list')),
+            ('chat_room', room_user, reverse('chat_room', args=[room.id])),
+            ('get_messages', room_user, f"{reverse('get_messages', args=[room.id])}?last_message_id={last_message_id}"),
+            ('teacher_attendance', teacher_group.teacher, reverse('teacher_attendance', args=[teacher_group.id])),
+            ('users_list[student]', student, reverse('users_list')),
+            ('users_list[admin]', admin, reverse('users_list')),
+        ]
+        if homework is not None:
+            scenarios.append(
+                ('teacher_submissions', teacher_group.teacher, reverse('teacher_submissions', args=[homework.id]))
+            )
+        return [scenario for scenario in scenarios if scenario[1] is not None]
+
+    def measure(self, user, url, options):
+        client = Client()
+        client.force_login(user)
+        cache = caches['dashboard']
+
+        def request():
+            if options['cold']:
+                cache.clear()
+            response = client.get(url)
+            if response.status_code != 200:
+                raise CommandError(f"{url}: HTTP {response.status_code}")
+            return response
+
+        for _ in range(options['warmup']):
+            request()
+
+        latencies = []
+        query_counts = []
+        for _ in range(options['iterations']):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                request()
+                latencies.append((time.perf_counter() - started) * 1000)
+            query_counts.append(len(queries.captured_queries))
+
+        # Xotira alohida o'lchanadi - tracemalloc kechikishni buzmasin
+        tracemalloc.start()
+        request()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        latencies.sort()
+        return {
+            'url': url,
+            'iterations': len(latencies),
+            'p50_ms': round(statistics.median(latencies), 2),
+            'p99_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 2),
+            'mean_ms': round(statistics.fmean(latencies), 2),
+            'queries': max(query_counts),
+            'peak_kb': round(peak / 1024, 1),
+        }
+
+    def meta(self, options):
+        try:
+            revision = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, cwd=settings.BASE_DIR
+            ).stdout.strip()
+        except OSError:
+            revision = ''
+        return {
+            'created_at': timezone.now().isoformat(),
+            'revision': revision,
+            'database': connection.vendor,
+            'iterations': options['iterations'],
+            'cold': options['cold'],
+            'users': User.objects.count(),
+            'groups': Group.objects.count(),
+        }
+
+    @staticmethod
+    def format_row(name, result):
+        return (f"{name:<24} p50 {result['p50_ms']:>9.2f} ms  p99 {result['p99_ms']:>9.2f} ms  "
+                f"{result['queries']:>4} so'rov  {result['peak_kb']:>9.1f} KB")
+
+    def compare(self, previous, current):
+        self.stdout.write(f"\nSolishtirish: {previous['meta'].get('revision')} -> {current['meta'].get('revision')}")
+        for name, result in current['results'].items():
+            before = previous['results'].get(name)
+            if before is None:
+                continue
+            change = (result['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100 if before['p50_ms'] else 0
+            line = (f"{name:<24} p50 {before['p50_ms']:>9.2f} -> {result['p50_ms']:>9.2f} ms ({change:+.1f}%)  "
+                    f"so'rov {before['queries']} -> {result['queries']}")
+            style = self.style.ERROR if change > 10 or result['queries'] > before['queries'] else self.style.SUCCESS
+            self.stdout.write(style(line))
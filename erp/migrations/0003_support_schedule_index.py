@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-18 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0002_alter_user_avatar'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='supportrequest',
+            index=models.Index(fields=['support_teacher', 'scheduled_date', 'scheduled_time'], name='erp_support_schedule_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-18 18:28
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0003_support_schedule_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='homeworksubmission',
+            name='score',
+            field=models.IntegerField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(0)]),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-18 18:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0004_submission_score_max'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingHomeworkCounter',
+            fields=[
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='pending_homework_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('pending_homeworks', models.PositiveIntegerField(default=0)),
+                ('next_deadline', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-18 18:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0005_pending_homework_counter'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='homework',
+            index=models.Index(fields=['deadline'], name='erp_homework_deadline_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='supportrequest',
+            index=models.Index(fields=['scheduled_date', 'scheduled_time'], name='erp_support_date_idx'),
+        ),
+    ]
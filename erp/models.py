@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
-from django.core.validators import MinValueValidator, MaxValueValidator
+from django.core.exceptions import ValidationError
+from django.core.validators import MinValueValidator
 
 class User(AbstractUser):
     ROLE_CHOICES = (
@@ -76,6 +77,10 @@ class Homework(models.Model):
     
     class Meta:
         ordering = ['-deadline']
+        indexes = [
+            # Yaqinlashayotgan muddatlar (chat.reminders) va kutilayotgan vazifalar
+            models.Index(fields=['deadline'], name='erp_homework_deadline_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.group.name}"
@@ -91,7 +96,8 @@ class HomeworkSubmission(models.Model):
     student = models.ForeignKey(User, on_delete=models.CASCADE, limit_choices_to={'role': 'student'})
     file = models.FileField(upload_to='submissions/', blank=True, null=True)
     text_answer = models.TextField(blank=True, null=True)
-    score = models.IntegerField(null=True, blank=True, validators=[MinValueValidator(0), MaxValueValidator(100)])
+    # Yuqori chegara - vazifaning max_score i (clean() da tekshiriladi)
+    score = models.IntegerField(null=True, blank=True, validators=[MinValueValidator(0)])
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
     feedback = models.TextField(blank=True, null=True)
     submitted_at = models.DateTimeField(auto_now_add=True)
@@ -104,14 +110,37 @@ class HomeworkSubmission(models.Model):
     def __str__(self):
         return f"{self.student.get_full_name()} - {self.homework.title}"
     
+    # Shundan kam baho - rad etilgan (max_score dan qat'i nazar)
+    PASS_SCORE = 60
+    
+    @classmethod
+    def status_for(cls, score):
+        if score is None:
+            return 'pending'
+        return 'rejected' if score < cls.PASS_SCORE else 'graded'
+    
+    def clean(self):
+        super().clean()
+        # Admin, ModelForm va full_clean() - hammasi shu yerdan o'tadi
+        if self.score is not None and self.homework_id and self.score > self.homework.max_score:
+            raise ValidationError({'score': f'Ball {self.homework.max_score} dan oshmasligi kerak.'})
+    
     def save(self, *args, **kwargs):
         if self.score is not None:
-            if self.score < 60:
-                self.status = 'rejected'
-            else:
-                self.status = 'graded'
+            self.status = self.status_for(self.score)
         super().save(*args, **kwargs)
 
+class PendingHomeworkCounter(models.Model):
+    """O'quvchining topshirilmagan, muddati o'tmagan vazifalari soni (erp.counters)"""
+    student = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='pending_homework_counter')
+    pending_homeworks = models.PositiveIntegerField(default=0)
+    # Hisobga olingan vazifalarning eng yaqin muddati - o'tgach son qayta hisoblanadi
+    next_deadline = models.DateTimeField(null=True, blank=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.student_id}: {self.pending_homeworks}"
+
 class SupportRequest(models.Model):
     STATUS_CHOICES = (
         ('pending', 'Kutilmoqda'),
@@ -130,6 +159,11 @@ class SupportRequest(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['support_teacher', 'scheduled_date', 'scheduled_time'], name='erp_support_schedule_idx'),
+            # Barcha support teacherlar bo'yicha vaqt oralig'i (chat.reminders)
+            models.Index(fields=['scheduled_date', 'scheduled_time'], name='erp_support_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.student.get_full_name()} - {self.topic} - {self.scheduled_date}"
\ No newline at end of file
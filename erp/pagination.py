@@ -0,0 +1,93 @@
+"""Keyset (cursor) pagination.
+
+OFFSET o'rniga oxirgi ko'rsatilgan qatorning kalit qiymatlaridan keyingi
+qatorlarni olamiz - sahifa raqami qanchalik katta bo'lmasin, so'rov indeks
+bo'yicha bir xil tezlikda ishlaydi.
+
+    page = paginate_keyset(queryset, ('-created_at', '-id'), request.GET.get('cursor'))
+    page.items, page.next_cursor
+"""
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime, time
+
+from django.db.models import Q
+
+
+DEFAULT_PAGE_SIZE = 30
+
+
+@dataclass
+class KeysetPage:
+    items: list = field(default_factory=list)
+    next_cursor: str = None
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def _to_json(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(values):
+    raw = json.dumps([_to_json(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """Noto'g'ri yoki buzilgan cursor bo'lsa None qaytaradi (birinchi sahifa)"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError):
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    return values
+
+
+def _after(keys, values):
+    """(k1, k2, ...) > (v1, v2, ...) shartini Q ko'rinishida qurish"""
+    condition = Q()
+    equal = Q()
+    for key, value in zip(keys, values):
+        name = key.lstrip('-')
+        lookup = 'lt' if key.startswith('-') else 'gt'
+        condition |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+def _page_queryset(queryset, keys, cursor, page_size):
+    values = decode_cursor(cursor, len(keys))
+    if values is not None:
+        queryset = queryset.filter(_after(keys, values))
+    return queryset.order_by(*keys)[:page_size + 1]
+
+
+def _make_page(items, keys, page_size):
+    page = KeysetPage(items=items[:page_size])
+    if len(items) > page_size:
+        last = page.items[-1]
+        page.next_cursor = encode_cursor([getattr(last, key.lstrip('-')) for key in keys])
+    return page
+
+
+def paginate_keyset(queryset, keys, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """``keys`` - tartiblash maydonlari, oxirgisi yagona bo'lishi kerak (odatda id)"""
+    items = list(_page_queryset(queryset, keys, cursor, page_size))
+    return _make_page(items, keys, page_size)
+
+
+async def apaginate_keyset(queryset, keys, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """paginate_keyset ning async view'lar uchun varianti"""
+    items = [obj async for obj in _page_queryset(queryset, keys, cursor, page_size)]
+    return _make_page(items, keys, page_size)
@@ -0,0 +1,292 @@
+"""Guruh hisobotlari: davomat (o'quvchi x sana) va baholar (o'quvchi x vazifa).
+
+Davomat bitta ``values_list`` so'rovi bilan olinadi va ``bytearray``
+matritsaga (qator - o'quvchi, ustun - kun) joylanadi. Statistikalar har
+bir qator bo'lagi ustida ``bytes.count`` / ``re`` kabi C darajasidagi
+amallar bilan hisoblanadi - yozuvlar bo'yicha Python sikli yo'q.
+
+Baholar jurnali (``Gradebook``) ham shu tarzda: topshiriqlar bitta so'rov
+bilan ``array``/``bytearray`` matritsalarga joylanadi va
+``settings.CACHES['gradebook']`` da guruh bo'yicha saqlanadi. Guruhdagi
+topshiriq, vazifa yoki tarkib o'zgarganda ``erp.signals`` yozuvni o'chiradi.
+"""
+import re
+from array import array
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.core.cache import caches
+
+from .models import Attendance, GroupStudent, Homework, HomeworkSubmission, User
+
+
+# Matritsadagi kodlar (0 - yozuv yo'q)
+NO_RECORD = 0
+STATUS_CODES = {'present': 1, 'absent': 2, 'late': 3, 'excused': 4}
+
+ABSENCE_RUN = re.compile(rb'\x02+')
+
+
+@dataclass
+class StudentAttendance:
+    student: User
+    present: int = 0
+    absent: int = 0
+    late: int = 0
+    excused: int = 0
+    longest_absence_streak: int = 0
+    current_absence_streak: int = 0
+    weekly_rates: list = field(default_factory=list)
+
+    @property
+    def recorded(self):
+        return self.present + self.absent + self.late + self.excused
+
+    @property
+    def rate(self):
+        """Qatnashish foizi: (keldi + kechikdi) / (sababsiz yozuvlar)"""
+        counted = self.recorded - self.excused
+        if not counted:
+            return None
+        return round(100 * (self.present + self.late) / counted, 1)
+
+
+class AttendanceMatrix:
+    """Bitta guruhning [start, end] oralig'idagi davomat matritsasi"""
+
+    def __init__(self, group, start, end):
+        self.group = group
+        self.start = start
+        self.end = end
+        self.days = (end - start).days + 1
+        self.students = []
+        self.data = bytearray()
+
+    @property
+    def dates(self):
+        return [self.start + timedelta(days=offset) for offset in range(self.days)]
+
+    def weeks(self):
+        """(hafta boshlanish sanasi, ustun boshlanishi, ustun oxiri) - dushanbadan"""
+        result = []
+        offset = 0
+        while offset < self.days:
+            day = self.start + timedelta(days=offset)
+            length = min(7 - day.weekday(), self.days - offset)
+            result.append((day - timedelta(days=day.weekday()), offset, offset + length))
+            offset += length
+        return result
+
+    @classmethod
+    def build(cls, group, start, end):
+        matrix = cls(group, start, end)
+
+        roster = GroupStudent.objects.filter(group=group).select_related('student')
+        matrix.students = [gs.student for gs in roster]
+
+        records = Attendance.objects.filter(
+            group=group, date__range=(start, end)
+        ).values_list('student_id', 'date', 'status')
+        records = list(records)
+
+        # Guruhdan chiqib ketgan, lekin davomati bor o'quvchilar
+        known = {student.id for student in matrix.students}
+        missing = {student_id for student_id, _, _ in records} - known
+        if missing:
+            matrix.students.extend(User.objects.filter(id__in=missing).order_by('first_name'))
+
+        row_index = {student.id: index for index, student in enumerate(matrix.students)}
+        matrix.data = bytearray(len(matrix.students) * matrix.days)
+        for student_id, day, status in records:
+            position = row_index[student_id] * matrix.days + (day - start).days
+            matrix.data[position] = STATUS_CODES.get(status, NO_RECORD)
+        return matrix
+
+    def row(self, index):
+        return bytes(self.data[index * self.days:(index + 1) * self.days])
+
+    def summary(self):
+        """Har bir o'quvchi uchun StudentAttendance ro'yxati"""
+        weeks = self.weeks()
+        result = []
+        for index, student in enumerate(self.students):
+            row = self.row(index)
+            stats = StudentAttendance(
+                student=student,
+                present=row.count(STATUS_CODES['present']),
+                absent=row.count(STATUS_CODES['absent']),
+                late=row.count(STATUS_CODES['late']),
+                excused=row.count(STATUS_CODES['excused']),
+            )
+
+            # Ketma-ket qoldirishlar: dars bo'lmagan kunlar hisobga olinmaydi
+            recorded = row.replace(b'\x00', b'')
+            runs = ABSENCE_RUN.findall(recorded)
+            stats.longest_absence_streak = max(map(len, runs), default=0)
+            stats.current_absence_streak = len(recorded) - len(recorded.rstrip(b'\x02'))
+
+            for _, first, last in weeks:
+                week = row[first:last]
+                attended = week.count(STATUS_CODES['present']) + week.count(STATUS_CODES['late'])
+                counted = attended + week.count(STATUS_CODES['absent'])
+                stats.weekly_rates.append(round(100 * attended / counted, 1) if counted else None)
+
+            result.append(stats)
+        return result
+
+
+# Baholar matritsasidagi holat kodlari (0 - topshirilmagan)
+NOT_SUBMITTED = 0
+SUBMISSION_CODES = {'pending': 1, 'graded': 2, 'rejected': 3}
+SUBMISSION_STATUSES = {code: status for status, code in SUBMISSION_CODES.items()}
+
+# Ball qo'yilmagan katak
+NO_SCORE = -1
+# Ballar massivi turi: 64 bitli - max_score yuqoridan cheklanmagan (PositiveIntegerField)
+SCORE_TYPECODE = 'q'
+
+GRADEBOOK_CACHE = 'gradebook'
+
+
+@dataclass
+class GradebookCell:
+    status: str = None
+    score: int = None
+    late: bool = False
+
+
+@dataclass
+class GradebookRow:
+    student_id: int
+    name: str
+    username: str
+    cells: list
+    submitted: int = 0
+    average: float = None
+
+
+class Gradebook:
+    """Bitta guruhning o'quvchi x vazifa baholar jurnali.
+
+    Katak (qator * vazifalar soni + ustun) bo'yicha uchta ixcham massiv:
+    ``scores`` (``array('q')``, ``NO_SCORE`` - ball yo'q), ``statuses`` va
+    ``late`` (``bytearray``). Keshga shu massivlar va qisqa tuple'lar
+    ko'rinishida tushadi.
+    """
+
+    def __init__(self, group_id):
+        self.group_id = group_id
+        self.homeworks = []  # (id, title, deadline, max_score)
+        self.students = []  # (id, first_name, last_name, username)
+        self.scores = array(SCORE_TYPECODE)
+        self.statuses = bytearray()
+        self.late = bytearray()
+
+    @classmethod
+    def build(cls, group):
+        gradebook = cls(group.pk)
+        gradebook.homeworks = list(
+            Homework.objects.filter(group=group).order_by('deadline', 'id').values_list(
+                'id', 'title', 'deadline', 'max_score'
+            )
+        )
+        gradebook.students = list(
+            GroupStudent.objects.filter(group=group).order_by(
+                'student__first_name', 'student__last_name', 'student_id'
+            ).values_list('student_id', 'student__first_name', 'student__last_name', 'student__username')
+        )
+
+        width = len(gradebook.homeworks)
+        size = len(gradebook.students) * width
+        gradebook.scores = array(SCORE_TYPECODE, [NO_SCORE]) * size
+        gradebook.statuses = bytearray(size)
+        gradebook.late = bytearray(size)
+
+        columns = {homework_id: index for index, (homework_id, *_) in enumerate(gradebook.homeworks)}
+        deadlines = [deadline for _, _, deadline, _ in gradebook.homeworks]
+        rows = {student_id: index for index, (student_id, *_) in enumerate(gradebook.students)}
+        submissions = HomeworkSubmission.objects.filter(homework__group=group).values_list(
+            'homework_id', 'student_id', 'score', 'status', 'submitted_at'
+        )
+        for homework_id, student_id, score, status, submitted_at in submissions:
+            row = rows.get(student_id)
+            # Guruhdan chiqib ketgan o'quvchilarning topshiriqlari jurnalga kirmaydi
+            if row is None:
+                continue
+            column = columns[homework_id]
+            position = row * width + column
+            gradebook.statuses[position] = SUBMISSION_CODES.get(status, NOT_SUBMITTED)
+            gradebook.late[position] = submitted_at > deadlines[column]
+            if score is not None:
+                gradebook.scores[position] = score
+        return gradebook
+
+    def _percent(self, position, column):
+        score = self.scores[position]
+        if score == NO_SCORE:
+            return None
+        return 100 * score / self.homeworks[column][3]
+
+    def rows(self):
+        """Har bir o'quvchi uchun GradebookRow (kataklar, topshirilganlar, o'rtacha foiz)"""
+        width = len(self.homeworks)
+        result = []
+        for index, (student_id, first_name, last_name, username) in enumerate(self.students):
+            offset = index * width
+            row = GradebookRow(
+                student_id=student_id, name=f'{first_name} {last_name}'.strip() or username,
+                username=username, cells=[],
+                submitted=width - self.statuses[offset:offset + width].count(NOT_SUBMITTED),
+            )
+            percents = []
+            for column in range(width):
+                position = offset + column
+                status = self.statuses[position]
+                percent = self._percent(position, column)
+                if percent is not None:
+                    percents.append(percent)
+                row.cells.append(GradebookCell(
+                    status=SUBMISSION_STATUSES.get(status),
+                    score=self.scores[position] if self.scores[position] != NO_SCORE else None,
+                    late=bool(self.late[position]),
+                ))
+            if percents:
+                row.average = round(sum(percents) / len(percents), 1)
+            result.append(row)
+        return result
+
+    def columns(self):
+        """Har bir vazifa uchun: topshirish foizi, o'rtacha ball va kechikkanlar soni"""
+        width = len(self.homeworks)
+        total = len(self.students)
+        result = []
+        for column, (homework_id, title, deadline, max_score) in enumerate(self.homeworks):
+            # Ustun - har ``width`` qadamdagi kataklar
+            statuses = self.statuses[column::width]
+            scores = [score for score in self.scores[column::width] if score != NO_SCORE]
+            submitted = total - statuses.count(NOT_SUBMITTED)
+            result.append({
+                'id': homework_id,
+                'title': title,
+                'deadline': deadline,
+                'max_score': max_score,
+                'submitted': submitted,
+                'completion': round(100 * submitted / total, 1) if total else None,
+                'average': round(sum(scores) / len(scores), 1) if scores else None,
+                'late': self.late[column::width].count(1),
+            })
+        return result
+
+
+def _gradebook_key(group_id):
+    return f'gradebook:{group_id}'
+
+
+def get_gradebook(group):
+    return caches[GRADEBOOK_CACHE].get_or_set(_gradebook_key(group.pk), lambda: Gradebook.build(group))
+
+
+def invalidate_gradebooks(group_ids):
+    group_ids = {group_id for group_id in group_ids if group_id}
+    if group_ids:
+        caches[GRADEBOOK_CACHE].delete_many([_gradebook_key(group_id) for group_id in group_ids])
@@ -0,0 +1,229 @@
+"""O'quvchilarni CSV/JSON fayldan ommaviy import qilish va guruhga yozish.
+
+Fayl qatorlari: ``username`` (majburiy), ``first_name``, ``last_name``,
+``phone``, ``password`` va ``group`` (guruh id si; guruh tashqaridan
+berilmagan bo'lsa). Qatorlar ``CHUNK_SIZE`` lik bo'laklarda qayta ishlanadi:
+har bo'lak - bitta tranzaksiya, ``User`` va ``GroupStudent`` lar
+``bulk_create(ignore_conflicts=True)`` bilan yoziladi (parallel import
+yoki qayta yuklangan fayl xatoga olib kelmaydi).
+
+Parol xeshlash (PBKDF2) ataylab sekin. ``manage.py import_roster`` uni
+jarayonlar pulida (``ProcessPoolExecutor``) bajaradi; web so'rovi ichida
+esa jarayon ishga tushirilmaydi - parollar joyida xeshlanadi va
+``WEB_MAX_PASSWORDS`` dan ko'p parolli fayl buyruq orqali yuklanadi.
+``bulk_create`` signallarni chaqirmaydi, shuning uchun guruh chatlari,
+kontaktlar va dashboard keshi oxirida qo'lda yangilanadi.
+"""
+import csv
+import io
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from chat import contacts, membership
+
+from . import counters, reports, stats
+from .models import Group, GroupStudent, User
+
+
+CHUNK_SIZE = getattr(settings, 'ROSTER_IMPORT_CHUNK_SIZE', 1000)
+HASH_WORKERS = getattr(settings, 'ROSTER_HASH_WORKERS', None) or os.cpu_count() or 1
+
+# Bundan kam parol uchun jarayonlar puli ishga tushirilmaydi
+POOL_THRESHOLD = 8
+
+# Web orqali importda joyida xeshlanadigan parollar chegarasi
+WEB_MAX_PASSWORDS = getattr(settings, 'ROSTER_WEB_MAX_PASSWORDS', 30)
+
+FIELDS = ('username', 'first_name', 'last_name', 'phone', 'password', 'group')
+
+
+class RosterError(Exception):
+    pass
+
+
+def parse(data, fmt):
+    """Fayl baytlaridan qatorlar (dict) ro'yxati"""
+    text = data.decode('utf-8-sig') if isinstance(data, bytes) else data
+    if fmt == 'json':
+        try:
+            rows = json.loads(text)
+        except ValueError as error:
+            raise RosterError(f"JSON noto'g'ri: {error}")
+        if isinstance(rows, dict):
+            rows = rows.get('students')
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise RosterError("JSON ob'ektlar ro'yxati bo'lishi kerak")
+        return rows
+    reader = csv.DictReader(io.StringIO(text))
+    if not reader.fieldnames or 'username' not in [name.strip() for name in reader.fieldnames]:
+        raise RosterError("CSV sarlavhasida 'username' ustuni yo'q")
+    return [{(key or '').strip(): value for key, value in row.items()} for row in reader]
+
+
+def file_format(name):
+    return 'json' if name.lower().endswith('.json') else 'csv'
+
+
+def password_count(rows):
+    return sum(1 for row in rows if str(row.get('password') or '').strip())
+
+
+def _clean(row):
+    values = {field: str(row.get(field) or '').strip() for field in FIELDS}
+    User.username_validator(values['username'])
+    for field in ('username', 'first_name', 'last_name', 'phone'):
+        max_length = User._meta.get_field(field).max_length
+        if len(values[field]) > max_length:
+            raise ValidationError(f"{field}: {max_length} belgidan oshmasligi kerak")
+    if values['group'] and not values['group'].isdigit():
+        raise ValidationError("group: guruh id si (son) bo'lishi kerak")
+    return values
+
+
+class _Hasher:
+    """Parollarni xeshlash: ko'p bo'lsa (va ``parallel``) jarayonlar pulida, aks holda joyida"""
+
+    def __init__(self, parallel=True):
+        self.parallel = parallel
+        self._pool = None
+
+    def __call__(self, passwords):
+        # Parolsiz o'quvchilar uchun ishlatib bo'lmaydigan parol - xeshlash shart emas
+        passwords = [password or None for password in passwords]
+        inline = not self.parallel or HASH_WORKERS < 2
+        if inline or sum(1 for password in passwords if password) < POOL_THRESHOLD:
+            return [make_password(password) for password in passwords]
+        if self._pool is None:
+            # fork emas, spawn: ko'p oqimli server jarayonidan fork qilish xavfli.
+            # Ishchiga faqat Django funksiyalari uzatiladi - bu modul (modellar
+            # bilan) django.setup() dan oldin import qilinmasligi kerak
+            self._pool = ProcessPoolExecutor(
+                max_workers=HASH_WORKERS, mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup,
+            )
+        chunksize = max(1, len(passwords) // (HASH_WORKERS * 4))
+        return list(self._pool.map(make_password, passwords, chunksize=chunksize))
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+
+
+def _chunks(rows):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def import_rows(rows, group=None, parallel=True):
+    """Qatorlardan o'quvchilar yaratish va guruhlarga yozish.
+
+    ``group`` berilsa barcha qatorlar shu guruhga, aks holda har qator
+    ``group`` ustunidagi guruhga yoziladi. ``parallel=False`` - parollar
+    jarayonlar pulisiz xeshlanadi (web so'rovi uchun). Natija: ``created`` (yangi
+    o'quvchilar), ``existing``, ``enrolled`` (yangi a'zoliklar) sonlari va
+    ``errors`` - [(qator raqami, xabar)].
+    """
+    result = {'created': 0, 'existing': 0, 'enrolled': 0, 'errors': []}
+    valid = []
+    seen = set()
+    for line, row in enumerate(rows, start=1):
+        try:
+            values = _clean(row)
+        except ValidationError as error:
+            result['errors'].append((line, '; '.join(error.messages)))
+            continue
+        if values['username'] in seen:
+            result['errors'].append((line, f"{values['username']}: faylda takrorlangan"))
+            continue
+        seen.add(values['username'])
+        values['group'] = group.pk if group is not None else int(values['group'] or 0) or None
+        valid.append((line, values))
+
+    group_ids = {values['group'] for _, values in valid if values['group']}
+    known_groups = set(Group.objects.filter(id__in=group_ids).values_list('id', flat=True))
+    enrolled = {}
+    hasher = _Hasher(parallel)
+    try:
+        for chunk in _chunks(valid):
+            _import_chunk(chunk, known_groups, hasher, result, enrolled)
+    finally:
+        hasher.close()
+
+    _after_import(enrolled, result['created'])
+    result['errors'].sort()
+    return result
+
+
+def _import_chunk(chunk, known_groups, hasher, result, enrolled):
+    usernames = [values['username'] for _, values in chunk]
+    existing = dict(User.objects.filter(username__in=usernames).values_list('username', 'role'))
+
+    new_rows = [values for _, values in chunk if values['username'] not in existing]
+    # Xeshlash tranzaksiyadan tashqarida - bazani uzoq band qilmaslik uchun
+    passwords = hasher([values['password'] for values in new_rows])
+
+    with transaction.atomic():
+        User.objects.bulk_create([
+            User(
+                username=values['username'], password=password, role='student',
+                first_name=values['first_name'], last_name=values['last_name'], phone=values['phone'] or None,
+            )
+            for values, password in zip(new_rows, passwords)
+        ], ignore_conflicts=True)
+        # ignore_conflicts bilan pk qaytmaydi - id larni qayta o'qiymiz
+        users = dict(User.objects.filter(username__in=usernames, role='student').values_list('username', 'id'))
+
+        pairs = []
+        for line, values in chunk:
+            username = values['username']
+            if username in existing and existing[username] != 'student':
+                result['errors'].append((line, f"{username}: o'quvchi emas ({existing[username]})"))
+                continue
+            if values['group'] is None:
+                continue
+            if values['group'] not in known_groups:
+                result['errors'].append((line, f"{username}: {values['group']} id li guruh topilmadi"))
+                continue
+            if username in users:
+                pairs.append((values['group'], users[username]))
+
+        current = set(GroupStudent.objects.filter(
+            group_id__in={group_id for group_id, _ in pairs}, student_id__in={student_id for _, student_id in pairs}
+        ).values_list('group_id', 'student_id'))
+        new_pairs = [pair for pair in pairs if pair not in current]
+        GroupStudent.objects.bulk_create([
+            GroupStudent(group_id=group_id, student_id=student_id) for group_id, student_id in new_pairs
+        ], ignore_conflicts=True)
+
+    result['created'] += len(users) - sum(1 for username in users if username in existing)
+    result['existing'] += len(existing)
+    result['enrolled'] += len(new_pairs)
+    for group_id, student_id in new_pairs:
+        enrolled.setdefault(group_id, []).append(student_id)
+
+
+def _after_import(enrolled, created):
+    """Signallar o'rniga: guruh chatlari, kontaktlar va dashboard keshi"""
+    teachers = dict(Group.objects.filter(id__in=list(enrolled)).values_list('id', 'teacher_id'))
+    for group_id, student_ids in enrolled.items():
+        membership.add_members(group_id, student_ids)
+        contacts.invalidate_group(group_id)
+        stats.invalidate_users([*student_ids, teachers.get(group_id)])
+    reports.invalidate_gradebooks(enrolled)
+    counters.refresh(student_id for student_ids in enrolled.values() for student_id in student_ids)
+    if created or enrolled:
+        stats.invalidate_role('admin')
@@ -0,0 +1,99 @@
+"""Support teacher jadvali: band vaqtlar, to'qnashuvlar va bo'sh slotlar.
+
+Har bir so'rov ``scheduled_time`` dan boshlanadigan ``SESSION_MINUTES``
+daqiqalik dars. Bir kunlik so'rovlar boshlanish vaqti bo'yicha tartiblangan
+ro'yxatda saqlanadi (``DaySchedule``) - vaqt bandligi ``bisect`` bilan
+O(log n) da tekshiriladi, to'qnashuvlar va birlashtirilgan band oraliqlar
+bir o'tishda topiladi. Ma'lumot ``(support_teacher, scheduled_date,
+scheduled_time)`` indeksi bo'yicha bitta so'rov bilan yuklanadi.
+"""
+from bisect import bisect_right
+from datetime import time, timedelta
+
+from django.conf import settings
+
+from .models import SupportRequest
+
+
+SESSION_MINUTES = getattr(settings, 'SUPPORT_SESSION_MINUTES', 30)
+DAY_START = getattr(settings, 'SUPPORT_DAY_START', time(9, 0))
+DAY_END = getattr(settings, 'SUPPORT_DAY_END', time(18, 0))
+
+
+def to_minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def to_time(minutes):
+    return time(minutes // 60, minutes % 60)
+
+
+class DaySchedule:
+    def __init__(self, day, bookings=()):
+        """``bookings`` - (boshlanish daqiqasi, so'rov id) juftliklari, tartiblangan"""
+        self.day = day
+        self.starts = [start for start, _ in bookings]
+        self.ids = [request_id for _, request_id in bookings]
+
+    def is_busy(self, start):
+        """[start, start + SESSION_MINUTES) biror so'rov bilan kesishadimi"""
+        # Kesishadigan so'rovlar (start - SESSION, start + SESSION) oralig'ida boshlanadi
+        index = bisect_right(self.starts, start - SESSION_MINUTES)
+        return index < len(self.starts) and self.starts[index] < start + SESSION_MINUTES
+
+    def busy(self):
+        """Birlashtirilgan band oraliqlar: [(boshlanish, tugash), ...] daqiqalarda"""
+        merged = []
+        for start in self.starts:
+            end = start + SESSION_MINUTES
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        return [tuple(interval) for interval in merged]
+
+    def conflicts(self):
+        """Vaqti kesishgan so'rovlar juftliklari (id, id)"""
+        pairs = []
+        window = 0
+        for index, start in enumerate(self.starts):
+            while self.starts[window] + SESSION_MINUTES <= start:
+                window += 1
+            pairs.extend((self.ids[other], self.ids[index]) for other in range(window, index))
+        return pairs
+
+    def free_slots(self, after=None):
+        """Ish vaqtidagi bo'sh slotlar (``time``), ``SESSION_MINUTES`` qadam bilan"""
+        first = to_minutes(DAY_START)
+        if after is not None:
+            # Bugungi kun uchun - hozirgi vaqtdan keyingi birinchi slot
+            first = max(first, -(-(to_minutes(after) - first) // SESSION_MINUTES) * SESSION_MINUTES + first)
+        last = to_minutes(DAY_END) - SESSION_MINUTES
+        return [
+            to_time(start) for start in range(first, last + 1, SESSION_MINUTES)
+            if not self.is_busy(start)
+        ]
+
+
+def load(support_teacher, start, end, exclude_id=None):
+    """[start, end] kunlari uchun {sana: DaySchedule} - bitta indeksli so'rov"""
+    rows = SupportRequest.objects.filter(
+        support_teacher=support_teacher, scheduled_date__range=(start, end)
+    ).order_by('scheduled_date', 'scheduled_time', 'id').values_list('id', 'scheduled_date', 'scheduled_time')
+    if exclude_id is not None:
+        rows = rows.exclude(id=exclude_id)
+
+    bookings = {}
+    for request_id, day, at in rows:
+        bookings.setdefault(day, []).append((to_minutes(at), request_id))
+
+    days = {}
+    day = start
+    while day <= end:
+        days[day] = DaySchedule(day, bookings.get(day, ()))
+        day += timedelta(days=1)
+    return days
+
+
+def load_day(support_teacher, day, exclude_id=None):
+    return load(support_teacher, day, day, exclude_id)[day]
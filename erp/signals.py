@@ -0,0 +1,82 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import counters, reports, stats
+from .models import Group, GroupStudent, Homework, HomeworkSubmission, SupportRequest, User
+
+
+def _group_student_ids(group_id):
+    return GroupStudent.objects.filter(group_id=group_id).values_list('student_id', flat=True)
+
+
+def _refresh_pending(student_ids=(), group_ids=()):
+    # Tranzaksiyadan keyin: kaskad o'chirishda o'quvchi qatori hali bazada bo'ladi
+    student_ids, group_ids = list(student_ids), list(group_ids)
+    transaction.on_commit(lambda: (counters.refresh(student_ids), counters.refresh_groups(group_ids)))
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    # Har bir login last_login ni yozadi - sonlarga ta'sir qilmaydi
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    # Admin panelidagi o'quvchi/o'qituvchi sonlari
+    stats.invalidate_role('admin')
+    if kwargs['signal'] is post_save and instance.role == 'student':
+        # Baholar jurnalidagi ism-familiya
+        reports.invalidate_gradebooks(
+            GroupStudent.objects.filter(student=instance).values_list('group_id', flat=True)
+        )
+
+
+@receiver([post_save, post_delete], sender=Group)
+def group_changed(sender, instance, **kwargs):
+    # O'qituvchi almashgan bo'lishi mumkin - barcha o'qituvchilar keshi yangilanadi
+    stats.invalidate_role('admin')
+    stats.invalidate_role('teacher')
+    if kwargs['signal'] is post_save:
+        stats.invalidate_users(_group_student_ids(instance.pk))
+
+
+@receiver([post_save, post_delete], sender=GroupStudent)
+def group_student_changed(sender, instance, **kwargs):
+    teacher_id = Group.objects.filter(pk=instance.group_id).values_list('teacher_id', flat=True).first()
+    stats.invalidate_users([instance.student_id, teacher_id])
+    reports.invalidate_gradebooks([instance.group_id])
+    _refresh_pending(student_ids=[instance.student_id])
+
+
+@receiver(pre_save, sender=Homework)
+def remember_homework_deadline(sender, instance, **kwargs):
+    instance._previous = None
+    if instance.pk:
+        instance._previous = Homework.objects.filter(pk=instance.pk).values_list('group_id', 'deadline').first()
+
+
+@receiver([post_save, post_delete], sender=Homework)
+def homework_changed(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous', None)
+    # Vazifa boshqa guruhga o'tgan bo'lsa - eski guruh ham
+    group_ids = {instance.group_id, previous[0] if previous else None} - {None}
+    stats.invalidate_users(_group_student_ids(instance.group_id))
+    reports.invalidate_gradebooks(group_ids)
+    # Kutilayotgan vazifalar soni: yangi/o'chirilgan vazifa yoki muddati (guruhi) o'zgargan
+    if kwargs['signal'] is post_delete or kwargs.get('created') or previous != (instance.group_id, instance.deadline):
+        _refresh_pending(group_ids=group_ids)
+
+
+@receiver([post_save, post_delete], sender=HomeworkSubmission)
+def submission_changed(sender, instance, **kwargs):
+    group_id, teacher_id = Group.objects.filter(homeworks=instance.homework_id).values_list(
+        'id', 'teacher_id'
+    ).first() or (None, None)
+    stats.invalidate_users([instance.student_id, teacher_id])
+    reports.invalidate_gradebooks([group_id])
+    if kwargs['signal'] is post_delete or kwargs.get('created'):
+        _refresh_pending(student_ids=[instance.student_id])
+
+
+@receiver([post_save, post_delete], sender=SupportRequest)
+def support_request_changed(sender, instance, **kwargs):
+    stats.invalidate_users([instance.support_teacher_id])
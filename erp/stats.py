@@ -0,0 +1,97 @@
+"""Dashboard statistikalari keshi.
+
+Har bir foydalanuvchi uchun (rol, user_id) bo'yicha alohida yozuv
+``settings.CACHES['dashboard']`` da saqlanadi (TTL va LRU - kesh backendi
+sozlamalarida). Ma'lumot o'zgarganda ``erp.signals`` kerakli yozuvlarni
+o'chiradi: bitta foydalanuvchi uchun ``invalidate_users``, butun rol uchun
+``invalidate_role`` (rol versiyasi oshiriladi, eski kalitlar o'z-o'zidan
+eskiradi).
+"""
+from django.core.cache import caches
+from django.db.models import Count
+
+from .counters import get_pending_count
+from .models import Group, HomeworkSubmission, SupportRequest, User
+
+
+CACHE_ALIAS = 'dashboard'
+ROLES = [role for role, _ in User.ROLE_CHOICES]
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _role_version(role):
+    return _cache().get_or_set(f'dashboard:version:{role}', 1, timeout=None)
+
+
+def _key(role, user_id):
+    return f'dashboard:{role}:{_role_version(role)}:{user_id}'
+
+
+def invalidate_users(user_ids):
+    user_ids = {user_id for user_id in user_ids if user_id}
+    if user_ids:
+        _cache().delete_many([_key(role, user_id) for role in ROLES for user_id in user_ids])
+
+
+def invalidate_role(role):
+    cache = _cache()
+    key = f'dashboard:version:{role}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, timeout=None)
+
+
+def _admin_stats(user):
+    return {
+        'groups_count': Group.objects.count(),
+        'students_count': User.objects.filter(role='student').count(),
+        'teachers_count': User.objects.filter(role='teacher').count(),
+        'recent_groups': list(Group.objects.select_related('teacher')[:5]),
+    }
+
+
+def _teacher_stats(user):
+    my_groups = list(Group.objects.filter(teacher=user).annotate(students_count=Count('group_students')))
+    return {
+        'my_groups': my_groups,
+        'my_groups_count': len(my_groups),
+        'pending_submissions': HomeworkSubmission.objects.filter(
+            homework__group__teacher=user, status='pending'
+        ).count(),
+    }
+
+
+def _student_stats(user):
+    my_groups = list(Group.objects.filter(group_students__student=user).select_related('teacher'))
+    return {
+        'my_groups': my_groups,
+        'my_groups_count': len(my_groups),
+        'pending_homeworks': get_pending_count(user),
+    }
+
+
+def _support_teacher_stats(user):
+    return {
+        'pending_requests': SupportRequest.objects.filter(
+            support_teacher=user, status='pending'
+        ).count(),
+    }
+
+
+BUILDERS = {
+    'admin': _admin_stats,
+    'teacher': _teacher_stats,
+    'student': _student_stats,
+    'support_teacher': _support_teacher_stats,
+}
+
+
+def get_dashboard_stats(user):
+    builder = BUILDERS.get(user.role)
+    if builder is None:
+        return {}
+    return _cache().get_or_set(_key(user.role, user.id), lambda: builder(user))
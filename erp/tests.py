@@ -1,3 +1,446 @@
-from django.test import TestCase
+import csv
+import io
+import json
+from datetime import date, time, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import counters, grading, reports
+from .forms import GradeSubmissionForm
+from .instrumentation import QueryBudgetExceeded
+from .models import (Attendance, Group, GroupStudent, Homework, HomeworkSubmission, PendingHomeworkCounter,
+                     SupportRequest, User)
+from .pagination import decode_cursor, encode_cursor, paginate_keyset
+
+
+def make_user(username, role, **fields):
+    # Parolsiz (make_password(None)) - PBKDF2 testlarni sekinlashtirmasin
+    return User.objects.create_user(username, password=None, role=role, **fields)
+
+
+class ErpDataMixin:
+    """Bitta guruh: o'qituvchi, 6 o'quvchi, 3 vazifa, topshiriqlar, davomat, support so'rovlari"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.now = timezone.now()
+        cls.admin = make_user('admin', 'admin')
+        cls.teacher = make_user('teacher', 'teacher', first_name='Olim')
+        cls.other_teacher = make_user('teacher2', 'teacher')
+        cls.support = make_user('support', 'support_teacher')
+        cls.students = [
+            make_user(f'student{index}', 'student', first_name=name, last_name='Karimov')
+            for index, name in enumerate(['Aziz', 'Aziz', 'Bekzod', 'Dilnoza', 'Malika', 'Sardor'])
+        ]
+        cls.group = Group.objects.create(name='Matematika', teacher=cls.teacher)
+        GroupStudent.objects.bulk_create([GroupStudent(group=cls.group, student=student) for student in cls.students])
+
+        cls.homeworks = [
+            Homework.objects.create(
+                group=cls.group, title=f'Vazifa {index}', description='-', created_by=cls.teacher,
+                deadline=cls.now + timedelta(days=offset),
+            )
+            for index, offset in enumerate([-7, 3, 10])
+        ]
+        cls.submissions = [
+            HomeworkSubmission.objects.create(homework=cls.homeworks[0], student=student, text_answer='javob')
+            for student in cls.students[:4]
+        ]
+        Attendance.objects.bulk_create([
+            Attendance(group=cls.group, student=student, date=cls.now.date() - timedelta(days=day),
+                       status='present' if day % 3 else 'absent', created_by=cls.teacher)
+            for day in range(5) for student in cls.students
+        ])
+        SupportRequest.objects.bulk_create([
+            SupportRequest(student=student, support_teacher=cls.support, topic='Algebra', description='-',
+                           scheduled_date=timezone.localdate() + timedelta(days=1), scheduled_time=time(10 + index))
+            for index, student in enumerate(cls.students[:3])
+        ])
+
+    def setUp(self):
+        # Keshlar jarayon bo'yicha - oldingi testlardan qolgan yozuvlar id'lari mos kelib qolmasin
+        for alias in ('default', 'dashboard', 'contacts', 'gradebook'):
+            caches[alias].clear()
+
+
+class KeysetPaginationTests(ErpDataMixin, TestCase):
+
+    def walk(self, queryset, keys, page_size):
+        seen, cursor = [], None
+        while True:
+            page = paginate_keyset(queryset, keys, cursor, page_size=page_size)
+            seen.extend(obj.pk for obj in page.items)
+            if not page.has_next:
+                return seen
+            cursor = page.next_cursor
+
+    def test_pages_cover_queryset_once_with_ties(self):
+        students = User.objects.filter(role='student')
+        for keys in (('first_name', 'id'), ('-first_name', '-id'), ('last_name', 'first_name', 'id')):
+            expected = list(students.order_by(*keys).values_list('pk', flat=True))
+            for page_size in (1, 2, 4, 10):
+                self.assertEqual(self.walk(students, keys, page_size), expected, (keys, page_size))
+
+    def test_datetime_keys(self):
+        homeworks = Homework.objects.all()
+        expected = list(homeworks.order_by('-deadline', '-id').values_list('pk', flat=True))
+        self.assertEqual(self.walk(homeworks, ('-deadline', '-id'), 2), expected)
+
+    def test_invalid_cursor_returns_first_page(self):
+        students = User.objects.filter(role='student')
+        first = paginate_keyset(students, ('first_name', 'id'), page_size=2)
+        for cursor in ('garbage', encode_cursor(['Aziz']), '!!!', encode_cursor({'a': 1})):
+            page = paginate_keyset(students, ('first_name', 'id'), cursor, page_size=2)
+            self.assertEqual(page.items, first.items, cursor)
+
+    def test_cursor_round_trip(self):
+        values = ['Aziz', date(2026, 1, 2), 7]
+        self.assertEqual(decode_cursor(encode_cursor(values), 3), ['Aziz', '2026-01-02', 7])
+        self.assertIsNone(decode_cursor(encode_cursor(values), 2))
+
+
+class AttendanceTests(ErpDataMixin, TestCase):
+
+    def test_impossible_date_saves_today(self):
+        self.client.force_login(self.teacher)
+        data = {'date': '2026-02-30', **{f'status_{student.pk}': 'late' for student in self.students}}
+        response = self.client.post(reverse('teacher_attendance', args=[self.group.pk]), data)
+        self.assertRedirects(response, reverse('teacher_attendance', args=[self.group.pk]))
+        today = Attendance.objects.filter(group=self.group, date=timezone.now().date())
+        self.assertEqual(list(today.values_list('status', flat=True)), ['late'] * len(self.students))
+
+
+class AttendanceReportTests(ErpDataMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.teacher)
+        self.url = reverse('teacher_attendance_report', args=[self.group.pk])
+
+    def test_impossible_dates_fall_back(self):
+        """Mavjud bo'lmagan sana (2026-02-30) 500 emas - standart qiymat"""
+        response = self.client.get(self.url, {'start': '2026-02-30', 'end': '2026-13-01'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['end'], timezone.now().date())
+
+    def test_dates_near_date_min(self):
+        for params in ({'end': '0001-01-05'}, {'start': '0001-01-01', 'end': '0001-01-02'}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 200, params)
+            self.assertGreaterEqual(response.context['start'], date.min)
+
+    def test_csv_escapes_formulas(self):
+        student = self.students[0]
+        student.first_name = '=HYPERLINK("http://example.com")'
+        student.save()
+        response = self.client.get(self.url, {'export': 'csv'})
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        names = [row[0] for row in csv.reader(io.StringIO(response.content.decode('utf-8-sig')))][1:]
+        self.assertIn('\'=HYPERLINK("http://example.com") Karimov', names)
+
+
+@override_settings(QUERY_BUDGET_RAISE=True)
+class QueryBudgetTests(ErpDataMixin, TestCase):
+    """settings.VIEW_QUERY_BUDGETS: chegaradan oshgan view QueryBudgetExceeded ko'taradi"""
+
+    def assertWithinBudget(self, user, url):
+        self.client.force_login(user)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return response
+
+    def test_budget_overrun_raises(self):
+        with self.settings(VIEW_QUERY_BUDGETS={'teacher_groups': 1}):
+            self.client.force_login(self.teacher)
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(reverse('teacher_groups'))
+
+    def test_dashboard(self):
+        for user in (self.admin, self.teacher, self.students[0], self.support):
+            self.assertWithinBudget(user, reverse('dashboard'))
+
+    def test_admin_views(self):
+        self.assertWithinBudget(self.admin, reverse('admin_groups'))
+        self.assertWithinBudget(self.admin, reverse('admin_group_students', args=[self.group.pk]))
+
+    def test_teacher_views(self):
+        self.assertWithinBudget(self.teacher, reverse('teacher_groups'))
+        self.assertWithinBudget(self.teacher, reverse('teacher_attendance', args=[self.group.pk]))
+        self.assertWithinBudget(self.teacher, reverse('teacher_attendance_report', args=[self.group.pk]))
+        self.assertWithinBudget(self.teacher, reverse('teacher_homeworks', args=[self.group.pk]))
+        self.assertWithinBudget(self.teacher, reverse('teacher_submissions', args=[self.homeworks[0].pk]))
+
+    def test_student_views(self):
+        self.assertWithinBudget(self.students[0], reverse('student_groups'))
+        response = self.assertWithinBudget(self.students[5], reverse('student_homeworks', args=[self.group.pk]))
+        # Boshqa o'quvchilarning topshiriqlari ko'rinmaydi
+        self.assertEqual([list(homework.submissions.all()) for homework in response.context['homeworks']], [[]] * 3)
+
+    def test_support_views(self):
+        self.assertWithinBudget(self.support, reverse('support_requests_list'))
+        self.assertWithinBudget(self.support, reverse('support_queue'))
+
+
+class SupportQueueTests(ErpDataMixin, TestCase):
+
+    def test_impossible_from_date_falls_back(self):
+        self.client.force_login(self.support)
+        response = self.client.get(reverse('support_queue'), {'from': '2026-02-30'})
+        self.assertEqual(response.context['start'], timezone.localdate())
+        self.assertEqual(len(response.context['requests']), 3)
+
+
+@override_settings(QUERY_BUDGET_RAISE=True)
+class SupportScheduleTests(ErpDataMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('support_schedule', args=[self.support.pk])
+        self.tomorrow = timezone.localdate() + timedelta(days=1)
+        self.overlapping = SupportRequest.objects.create(
+            student=self.students[3], support_teacher=self.support, topic='Geometriya', description='-',
+            scheduled_date=self.tomorrow, scheduled_time=time(10, 15),
+        )
+
+    def day(self, user, **params):
+        self.client.force_login(user)
+        response = self.client.get(self.url, {'start': self.tomorrow.isoformat(), 'days': 1, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['days'][0]
+
+    def test_busy_intervals_and_conflicts(self):
+        day = self.day(self.support)
+        self.assertEqual(day['busy'], [['10:00', '10:45'], ['11:00', '11:30'], ['12:00', '12:30']])
+        self.assertEqual([slot for slot in day['free'] if slot < '12:00'], ['09:00', '09:30', '11:30'])
+        first = SupportRequest.objects.get(support_teacher=self.support, scheduled_time=time(10))
+        self.assertEqual(day['conflicts'], [[first.pk, self.overlapping.pk]])
+
+    def test_student_sees_no_details(self):
+        day = self.day(self.students[0])
+        self.assertNotIn('bookings', day)
+        self.assertNotIn('conflicts', day)
+
+    def test_bad_parameters(self):
+        self.client.force_login(self.support)
+        for params in ({'days': 'x'}, {'start': '2026-02-30'}, {'start': '9999-12-30'}, {'start': '0001-01-01'}):
+            self.assertEqual(self.client.get(self.url, params).status_code, 400, params)
+
+
+class ExportTests(ErpDataMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.teacher)
+
+    def test_impossible_dates_export_everything(self):
+        response = self.client.get(
+            reverse('export_attendance', args=[self.group.pk]), {'start': '2026-02-30', 'end': '2026-02-31'}
+        )
+        self.assertEqual(response.status_code, 200)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1 + Attendance.objects.filter(group=self.group).count())
+
+
+@override_settings(QUERY_BUDGET_RAISE=True)
+class GradebookTests(ErpDataMixin, TestCase):
+
+    def test_cold_and_cached(self):
+        self.client.force_login(self.teacher)
+        url = reverse('teacher_gradebook', args=[self.group.pk])
+        response = self.client.get(url)
+        self.assertEqual(len(response.context['rows']), len(self.students))
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_moved_homework_leaves_old_gradebook(self):
+        homework = self.homeworks[2]
+        other = Group.objects.create(name='Fizika', teacher=self.teacher)
+        self.assertIn(homework.pk, [column['id'] for column in reports.get_gradebook(self.group).columns()])
+        reports.get_gradebook(other)
+        homework.group = other
+        homework.save()
+        self.assertNotIn(homework.pk, [column['id'] for column in reports.get_gradebook(self.group).columns()])
+        self.assertIn(homework.pk, [column['id'] for column in reports.get_gradebook(other).columns()])
+
+
+class BatchGradingTests(ErpDataMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.homework = self.homeworks[0]
+        self.client.force_login(self.teacher)
+
+    def test_clean_grades(self):
+        first, second, third, fourth = [submission.pk for submission in self.submissions]
+        grades, errors = grading.clean_grades(self.homework, [
+            (first, '75', ' Yaxshi '), (second, '', 'ball yo\'q'), (third, 'abc', None),
+            (fourth, 101, None), ('x', 5, None), (first + 1000, -1, None), 'buzuq',
+        ])
+        self.assertEqual(grades, {first: (75, 'Yaxshi')})
+        self.assertEqual(len(errors), 5)
+
+    def test_clean_grades_rejects_loose_values(self):
+        first = self.submissions[0].pk
+        grades, errors = grading.clean_grades(self.homework, [
+            (first, 85.9, None), (first, True, None), (first, float('inf'), None), (first, '1e400', None),
+            (first, 90, 5), (True, 90, None), 'abc', [first, 90], {'id': first},
+        ])
+        self.assertEqual((grades, len(errors)), ({}, 9))
+        self.assertEqual(grading.clean_grades(self.homework, [[first, 90.0, None]]), ({first: (90, None)}, []))
+
+    def test_api_reports_bad_entries(self):
+        url = reverse('teacher_batch_grade_api', args=[self.homework.pk])
+        first = self.submissions[0].pk
+        for body in (
+            f'{{"grades": [[{first}, 90, 5]]}}', f'{{"grades": [[{first}, 1e400, null]]}}',
+            f'{{"grades": [[{first}, 85.9, null]]}}', f'{{"grades": [[{first}, true, null]]}}', '{"grades": ["abc"]}',
+        ):
+            response = self.client.post(url, body, content_type='application/json')
+            self.assertEqual(response.status_code, 400, body)
+            self.assertEqual(len(response.json()['errors']), 1, body)
+        self.assertFalse(HomeworkSubmission.objects.filter(score__isnull=False).exists())
+
+    def test_upper_bound_is_homework_max_score(self):
+        self.homework.max_score = 500
+        grades, errors = grading.clean_grades(self.homework, [(self.submissions[0].pk, 450, None)])
+        self.assertEqual((grades, errors), ({self.submissions[0].pk: (450, None)}, []))
+
+    def test_model_bounds_score_by_max_score(self):
+        submission = self.submissions[0]
+        submission.score = 101
+        with self.assertRaises(ValidationError) as raised:
+            submission.full_clean()
+        self.assertIn('score', raised.exception.message_dict)
+        self.homework.max_score = 150
+        self.homework.save()
+        submission.homework.refresh_from_db()
+        submission.full_clean()
+
+        form = GradeSubmissionForm({'score': 151}, instance=submission)
+        self.assertEqual(list(form.errors), ['score'])
+
+    def test_apply_grades_uses_absolute_pass_score(self):
+        self.homework.max_score = 50
+        self.homework.save()
+        first, second = self.submissions[:2]
+        other = HomeworkSubmission.objects.create(homework=self.homeworks[1], student=self.students[0])
+
+        changed, missing = grading.apply_grades(
+            self.homework, {first.pk: (45, None), second.pk: (60, 'Zo\'r'), other.pk: (90, None)}
+        )
+        self.assertEqual((changed, missing), (2, [other.pk]))
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.status, second.status), ('rejected', 'graded'))
+        self.assertIsNotNone(first.graded_at)
+        other.refresh_from_db()
+        self.assertEqual(other.status, 'pending')
+        # O'zgarmagan baho qayta yozilmaydi
+        self.assertEqual(grading.apply_grades(self.homework, {second.pk: (60, 'Zo\'r')}), (0, []))
+
+    def test_apply_grades_refreshes_gradebook(self):
+        submission = self.submissions[0]
+        gradebook = reports.get_gradebook(self.group)
+        self.assertEqual(gradebook.rows()[0].cells[0].status, 'pending')
+        grading.apply_grades(self.homework, {submission.pk: (80, None)})
+        cells = {row.student_id: row.cells[0] for row in reports.get_gradebook(self.group).rows()}
+        self.assertEqual((cells[submission.student_id].status, cells[submission.student_id].score), ('graded', 80))
+
+    def test_api(self):
+        url = reverse('teacher_batch_grade_api', args=[self.homework.pk])
+        first, second = self.submissions[:2]
+        self.assertEqual(self.client.get(url).status_code, 405)
+        response = self.client.post(url, 'not json', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+        # Bitta xato - hech narsa yozilmaydi
+        response = self.client.post(url, json.dumps({'grades': [[first.pk, 90, ''], [second.pk, 150, '']]}),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(HomeworkSubmission.objects.filter(score__isnull=False).count(), 0)
+
+        response = self.client.post(url, json.dumps({'grades': [
+            {'id': first.pk, 'score': 90, 'feedback': 'Barakalla'}, [second.pk, 20, None],
+        ]}), content_type='application/json')
+        self.assertEqual(response.json(), {'success': True, 'updated': 2, 'missing': []})
+        self.assertEqual(
+            dict(HomeworkSubmission.objects.filter(pk__in=[first.pk, second.pk]).values_list('pk', 'status')),
+            {first.pk: 'graded', second.pk: 'rejected'},
+        )
+
+    def test_api_other_teacher(self):
+        self.client.force_login(self.other_teacher)
+        response = self.client.post(
+            reverse('teacher_batch_grade_api', args=[self.homework.pk]),
+            json.dumps({'grades': [[self.submissions[0].pk, 90, '']]}), content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_form(self):
+        first = self.submissions[0]
+        response = self.client.post(reverse('teacher_batch_grade', args=[self.homework.pk]), {
+            f'score_{first.pk}': '70', f'feedback_{first.pk}': 'Yaxshi', f'score_{self.submissions[1].pk}': '',
+        })
+        self.assertRedirects(response, reverse('teacher_submissions', args=[self.homework.pk]))
+        first.refresh_from_db()
+        self.assertEqual((first.score, first.feedback, first.status), (70, 'Yaxshi', 'graded'))
+
+
+class PendingHomeworkCounterTests(ErpDataMixin, TestCase):
+    """Kutilayotgan vazifalar: guruhdagi, muddati o'tmagan, topshirilmagan"""
+
+    def counts(self):
+        return dict(PendingHomeworkCounter.objects.values_list('student_id', 'pending_homeworks'))
+
+    def expected(self, now=None):
+        now = now or timezone.now()
+        return {
+            student.pk: Homework.objects.filter(group__group_students__student=student, deadline__gte=now).exclude(
+                submissions__student=student
+            ).count()
+            for student in self.students
+        }
+
+    def test_refresh_matches_query(self):
+        HomeworkSubmission.objects.create(homework=self.homeworks[1], student=self.students[0])
+        result = counters.refresh(student.pk for student in self.students)
+        self.assertEqual(result, self.expected())
+        self.assertEqual(self.counts(), self.expected())
+        self.assertEqual(result[self.students[0].pk], 1)
+        self.assertEqual(result[self.students[1].pk], 2)
+
+    def test_signals_keep_counts_current(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            homework = Homework.objects.create(
+                group=self.group, title='Yangi', description='-', deadline=timezone.now() + timedelta(days=1)
+            )
+        self.assertEqual(self.counts(), {student.pk: 3 for student in self.students})
+        with self.captureOnCommitCallbacks(execute=True):
+            HomeworkSubmission.objects.create(homework=homework, student=self.students[0])
+        self.assertEqual(self.counts()[self.students[0].pk], 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            homework.deadline = timezone.now() - timedelta(days=1)
+            homework.save()
+        self.assertEqual(self.counts(), self.expected())
+
+    def test_reconcile_drops_passed_deadlines(self):
+        counters.refresh(student.pk for student in self.students)
+        later = self.homeworks[1].deadline + timedelta(hours=1)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            refreshed = counters.reconcile()
+            self.assertEqual(set(refreshed), {student.pk for student in self.students})
+            self.assertEqual(self.counts(), self.expected(later))
+            self.assertEqual(counters.reconcile(), {})
+
+    def test_get_pending_count_self_heals(self):
+        student = self.students[5]
+        self.assertFalse(PendingHomeworkCounter.objects.filter(student=student).exists())
+        self.assertEqual(counters.get_pending_count(student), 2)
+        self.assertTrue(PendingHomeworkCounter.objects.filter(student=student).exists())
+        later = self.homeworks[1].deadline + timedelta(hours=1)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            self.assertEqual(counters.get_pending_count(student), 1)
@@ -13,14 +13,20 @@ urlpatterns = [
     path('admin/groups/<int:pk>/edit/', views.admin_edit_group, name='admin_edit_group'),
     path('admin/groups/<int:pk>/students/', views.admin_group_students, name='admin_group_students'),
     path('admin/groups/<int:group_pk>/students/<int:student_pk>/remove/', views.admin_remove_student, name='admin_remove_student'),
+    path('admin/groups/<int:pk>/students/import/', views.admin_import_students, name='admin_import_students'),
+    path('admin/students/search/', views.admin_student_search, name='admin_student_search'),
     
     # Teacher URLs
     path('teacher/groups/', views.teacher_groups, name='teacher_groups'),
     path('teacher/groups/<int:pk>/attendance/', views.teacher_attendance, name='teacher_attendance'),
+    path('teacher/groups/<int:pk>/attendance/report/', views.teacher_attendance_report, name='teacher_attendance_report'),
     path('teacher/groups/<int:pk>/homeworks/', views.teacher_homeworks, name='teacher_homeworks'),
+    path('teacher/groups/<int:pk>/gradebook/', views.teacher_gradebook, name='teacher_gradebook'),
     path('teacher/groups/<int:pk>/homeworks/create/', views.teacher_create_homework, name='teacher_create_homework'),
     path('teacher/homeworks/<int:pk>/edit/', views.teacher_edit_homework, name='teacher_edit_homework'),
     path('teacher/homeworks/<int:pk>/submissions/', views.teacher_submissions, name='teacher_submissions'),
+    path('teacher/homeworks/<int:pk>/grade/', views.teacher_batch_grade, name='teacher_batch_grade'),
+    path('teacher/homeworks/<int:pk>/grade/json/', views.teacher_batch_grade_api, name='teacher_batch_grade_api'),
     path('teacher/submissions/<int:pk>/grade/', views.teacher_grade_submission, name='teacher_grade_submission'),
     
     # Student URLs
@@ -31,6 +37,15 @@ urlpatterns = [
     
     # Support Teacher URLs
     path('support/requests/', views.support_requests_list, name='support_requests_list'),
+    path('support/queue/', views.support_queue, name='support_queue'),
+    path('support/schedule/<int:teacher_id>/', views.support_schedule, name='support_schedule'),
     path('profile/', views.ProfileView.as_view(), name='profile'),
     path('hr/', views.HRView.as_view(), name='hr_page'),
+    
+    # Eksport (CSV/XLSX, oqim bilan)
+    path('export/groups/<int:pk>/attendance/', views.export_attendance, name='export_attendance'),
+    path('export/groups/<int:pk>/gradebook/', views.export_gradebook, name='export_gradebook'),
+    
+    # Unumdorlik
+    path('perf/stats/', views.perf_stats, name='perf_stats'),
 ]
\ No newline at end of file
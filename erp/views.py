@@ -1,12 +1,21 @@
+import json
+
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import login, logout, authenticate
 from django.contrib import messages
 from django.utils import timezone
-from django.db.models import Q, Avg, Count
+from django.db import transaction
+from django.db.models import Q, Avg, Count, Exists, F, OuterRef, Prefetch
 from .models import User, Group, GroupStudent, Attendance, Homework, HomeworkSubmission, SupportRequest
+from .stats import get_dashboard_stats, invalidate_users
+from .pagination import paginate_keyset
+from .instrumentation import view_stats
+from . import exports, grading, roster, schedule
 from .forms import (UserRegistrationForm, GroupForm, GroupStudentForm, AttendanceForm, 
-                   HomeworkForm, HomeworkSubmissionForm, GradeSubmissionForm, SupportRequestForm)
+                   HomeworkForm, HomeworkSubmissionForm, GradeSubmissionForm, SupportRequestForm,
+                   RosterImportForm)
 
 # Auth Views
 def login_view(request):
@@ -30,35 +39,31 @@ def logout_view(request):
     logout(request)
     return redirect('login')
 
+# Ro'yxatlar uchun keyset pagination kalitlari (erp/pagination.py)
+GROUP_KEYS = ('-created_at', '-id')
+ROSTER_KEYS = ('student_first_name', 'id')
+REQUEST_KEYS = ('-created_at', '-id')
+QUEUE_KEYS = ('scheduled_date', 'scheduled_time', 'id')
+SCHEDULE_MAX_DAYS = 31
+# Jadval boshlanishi bugundan +-1 yil (9999-12-30 + days toshib ketmasin)
+SCHEDULE_WINDOW_DAYS = 366
+STUDENT_SEARCH_LIMIT = 20
+
+def _search(queryset, query, fields):
+    """Oddiy server tomonidagi filtr: har bir so'z istalgan maydonda bo'lishi kerak"""
+    for term in (query or '').split():
+        condition = Q()
+        for field in fields:
+            condition |= Q(**{f'{field}__icontains': term})
+        queryset = queryset.filter(condition)
+    return queryset
+
 @login_required
 def dashboard(request):
     user = request.user
     context = {'user': user}
-    
-    if user.role == 'admin':
-        context['groups_count'] = Group.objects.count()
-        context['students_count'] = User.objects.filter(role='student').count()
-        context['teachers_count'] = User.objects.filter(role='teacher').count()
-        context['recent_groups'] = Group.objects.all()[:5]
-        
-    elif user.role == 'teacher':
-        context['my_groups'] = Group.objects.filter(teacher=user)
-        context['pending_submissions'] = HomeworkSubmission.objects.filter(
-            homework__group__teacher=user, status='pending'
-        ).count()
-        
-    elif user.role == 'student':
-        context['my_groups'] = Group.objects.filter(group_students__student=user)
-        context['pending_homeworks'] = Homework.objects.filter(
-            group__group_students__student=user
-        ).exclude(
-            submissions__student=user
-        ).filter(deadline__gte=timezone.now()).count()
-        
-    elif user.role == 'support_teacher':
-        context['pending_requests'] = SupportRequest.objects.filter(
-            support_teacher=user, status='pending'
-        ).count()
+    # Statistikalar keshdan (erp/stats.py), o'zgarishlarda signal bilan tozalanadi
+    context.update(get_dashboard_stats(user))
     
     return render(request, 'erp/dashboard.html', context)
 
@@ -68,8 +73,14 @@ def admin_groups(request):
         messages.error(request, 'Sizda ruxsat yo\'q!')
         return redirect('dashboard')
     
-    groups = Group.objects.all()
-    return render(request, 'erp/admin/groups.html', {'groups': groups})
+    groups = _search(
+        Group.objects.select_related('teacher').annotate(students_count=Count('group_students')),
+        request.GET.get('q'), ('name', 'teacher__first_name', 'teacher__last_name')
+    )
+    page = paginate_keyset(groups, GROUP_KEYS, request.GET.get('cursor'))
+    return render(request, 'erp/admin/groups.html', {
+        'groups': page.items, 'next_cursor': page.next_cursor, 'q': request.GET.get('q', '')
+    })
 
 @login_required
 def admin_create_group(request):
@@ -107,8 +118,14 @@ def admin_group_students(request, pk):
     if request.user.role != 'admin':
         return redirect('dashboard')
     
-    group = get_object_or_404(Group, pk=pk)
-    students = GroupStudent.objects.filter(group=group)
+    group = get_object_or_404(Group.objects.select_related('teacher'), pk=pk)
+    memberships = GroupStudent.objects.filter(group=group)
+    students_count = memberships.count()
+    students = _search(
+        memberships.select_related('student').annotate(student_first_name=F('student__first_name')),
+        request.GET.get('q'), ('student__first_name', 'student__last_name', 'student__username')
+    )
+    page = paginate_keyset(students, ROSTER_KEYS, request.GET.get('cursor'))
     
     if request.method == 'POST':
         form = GroupStudentForm(request.POST, group=group)
@@ -122,9 +139,75 @@ def admin_group_students(request, pk):
         form = GroupStudentForm(group=group)
     
     return render(request, 'erp/admin/group_students.html', {
-        'group': group, 'students': students, 'form': form
+        'group': group, 'students': page.items, 'students_count': students_count,
+        'next_cursor': page.next_cursor, 'q': request.GET.get('q', ''), 'form': form,
+        'import_form': RosterImportForm()
     })
 
+@login_required
+def admin_import_students(request, pk):
+    """CSV/JSON fayldan o'quvchilarni yaratib guruhga yozish (``erp.roster``).
+
+    Parollar so'rov ichida xeshlanadi - ``roster.WEB_MAX_PASSWORDS`` dan ko'p
+    parolli fayl ``manage.py import_roster`` buyrug'iga yo'naltiriladi.
+    """
+    if request.user.role != 'admin':
+        return redirect('dashboard')
+    
+    group = get_object_or_404(Group, pk=pk)
+    form = RosterImportForm(request.POST or None, request.FILES or None)
+    if request.method != 'POST' or not form.is_valid():
+        messages.error(request, 'Fayl tanlanmadi!')
+        return redirect('admin_group_students', pk=pk)
+    
+    upload = form.cleaned_data['file']
+    try:
+        rows = roster.parse(upload.read(), roster.file_format(upload.name))
+    except (roster.RosterError, UnicodeDecodeError) as error:
+        messages.error(request, f'Faylni o\'qib bo\'lmadi: {error}')
+        return redirect('admin_group_students', pk=pk)
+    
+    passwords = roster.password_count(rows)
+    if passwords > roster.WEB_MAX_PASSWORDS:
+        messages.error(request, (
+            f"Faylda {passwords} ta parol bor (web orqali ko'pi bilan {roster.WEB_MAX_PASSWORDS} ta). "
+            f"Serverda yuklang: python manage.py import_roster <fayl> --group {group.pk}"
+        ))
+        return redirect('admin_group_students', pk=pk)
+    
+    result = roster.import_rows(rows, group=group, parallel=False)
+    messages.success(request, (
+        f"Import tugadi: {result['created']} ta yangi o'quvchi, "
+        f"{result['enrolled']} ta guruhga qo'shildi, {result['existing']} ta avvaldan bor edi."
+    ))
+    for line, error in result['errors'][:10]:
+        messages.warning(request, f'{line}-qator: {error}')
+    if len(result['errors']) > 10:
+        messages.warning(request, f"Yana {len(result['errors']) - 10} ta xato qator o'tkazib yuborildi.")
+    return redirect('admin_group_students', pk=pk)
+
+@login_required
+def admin_student_search(request):
+    """O'quvchi qo'shish formasi uchun autocomplete (?q=, ?group= - a'zolarsiz)"""
+    if request.user.role != 'admin':
+        return JsonResponse({'error': 'Ruxsat yo\'q'}, status=403)
+    
+    students = _search(
+        User.objects.filter(role='student'), request.GET.get('q'), ('first_name', 'last_name', 'username')
+    )
+    group_id = request.GET.get('group')
+    if group_id and group_id.isdigit():
+        students = students.exclude(
+            Exists(GroupStudent.objects.filter(group_id=group_id, student=OuterRef('pk')))
+        )
+    results = [
+        {'id': pk, 'name': f'{first_name} {last_name}'.strip() or username, 'username': username}
+        for pk, first_name, last_name, username in students.order_by(
+            'first_name', 'last_name', 'id'
+        ).values_list('id', 'first_name', 'last_name', 'username')[:STUDENT_SEARCH_LIMIT]
+    ]
+    return JsonResponse({'results': results})
+
 @login_required
 def admin_remove_student(request, group_pk, student_pk):
     if request.user.role != 'admin':
@@ -140,11 +223,28 @@ def teacher_groups(request):
     if request.user.role != 'teacher':
         return redirect('dashboard')
     
-    groups = Group.objects.filter(teacher=request.user)
-    return render(request, 'erp/teacher/groups.html', {'groups': groups})
+    groups = _search(
+        Group.objects.filter(teacher=request.user).annotate(students_count=Count('group_students')),
+        request.GET.get('q'), ('name',)
+    )
+    page = paginate_keyset(groups, GROUP_KEYS, request.GET.get('cursor'))
+    return render(request, 'erp/teacher/groups.html', {
+        'groups': page.items, 'next_cursor': page.next_cursor, 'q': request.GET.get('q', '')
+    })
+
+from datetime import date, timedelta
 
 from django.utils.dateparse import parse_date
 from django.utils import timezone
+from .reports import AttendanceMatrix, get_gradebook
+
+
+def _date_param(params, name, default=None):
+    """YYYY-MM-DD parametri; bo'sh yoki mavjud bo'lmagan sana (2026-02-30) bo'lsa - default"""
+    try:
+        return parse_date(params.get(name) or '') or default
+    except ValueError:
+        return default
 
 @login_required
 def teacher_attendance(request, pk):
@@ -152,33 +252,41 @@ def teacher_attendance(request, pk):
         return redirect('dashboard')
     
     group = get_object_or_404(Group, pk=pk, teacher=request.user)
-    students = GroupStudent.objects.filter(group=group)
+    students = GroupStudent.objects.filter(group=group).select_related('student')
     today = timezone.now().date()
     
     if request.method == 'POST':
-        raw_date = request.POST.get('date')
-        
-        attendance_date = parse_date(raw_date) if raw_date else today
-        
-        if not attendance_date:
-            attendance_date = today
-
-        for gs in students:
-            status = request.POST.get(f'status_{gs.student.id}')
-            if status:
-                Attendance.objects.update_or_create(
-                    group=group, 
-                    student=gs.student, 
-                    date=attendance_date, 
-                    defaults={
-                        'status': status, 
-                        'created_by': request.user
-                    }
-                )
+        attendance_date = _date_param(request.POST, 'date', today)
+
+        # Bitta tranzaksiyada bitta INSERT ... ON CONFLICT DO UPDATE
+        valid_statuses = dict(Attendance.STATUS_CHOICES)
+        records = []
+        for student_id in students.values_list('student_id', flat=True):
+            status = request.POST.get(f'status_{student_id}')
+            if status in valid_statuses:
+                records.append(Attendance(
+                    group=group,
+                    student_id=student_id,
+                    date=attendance_date,
+                    status=status,
+                    created_by=request.user
+                ))
+        with transaction.atomic():
+            Attendance.objects.bulk_create(
+                records,
+                update_conflicts=True,
+                unique_fields=['group', 'student', 'date'],
+                update_fields=['status', 'created_by']
+            )
         messages.success(request, 'Davomat saqlandi!')
         return redirect('teacher_attendance', pk=pk)
     
     attendances = Attendance.objects.filter(group=group, date=today)
+    statuses = dict(attendances.values_list('student_id', 'status'))
+    students = list(students)
+    for gs in students:
+        gs.attendance_status = statuses.get(gs.student_id)
+    
     return render(request, 'erp/teacher/attendance.html', {
         'group': group, 
         'students': students, 
@@ -186,15 +294,81 @@ def teacher_attendance(request, pk):
         'attendances': attendances
     })
 
+# Hisobot oralig'i: standart 4 hafta, eng ko'pi bilan 1 yil
+ATTENDANCE_REPORT_DAYS = 28
+ATTENDANCE_REPORT_MAX_DAYS = 366
+
+@login_required
+def teacher_attendance_report(request, pk):
+    if request.user.role not in ('teacher', 'admin'):
+        return redirect('dashboard')
+    
+    groups = Group.objects.all() if request.user.role == 'admin' else Group.objects.filter(teacher=request.user)
+    group = get_object_or_404(groups, pk=pk)
+    
+    today = timezone.now().date()
+    end = _date_param(request.GET, 'end', today)
+    start = _date_param(request.GET, 'start')
+    if start and start > end:
+        start, end = end, start
+    # ?end=0001-01-05 - ayirishda date.min dan chiqib ketmaslik uchun
+    end = max(end, date.min + timedelta(days=ATTENDANCE_REPORT_MAX_DAYS))
+    start = max(
+        start or end - timedelta(days=ATTENDANCE_REPORT_DAYS - 1),
+        end - timedelta(days=ATTENDANCE_REPORT_MAX_DAYS - 1)
+    )
+    
+    matrix = AttendanceMatrix.build(group, start, end)
+    rows = matrix.summary()
+    weeks = [week_start for week_start, _, _ in matrix.weeks()]
+    
+    if request.GET.get('export') == 'csv':
+        header = (
+            ["O'quvchi", 'Foiz', 'Keldi', 'Kelmadi', 'Kechikdi', 'Sababli', 'Eng uzun qoldirish', 'Hozirgi qoldirish']
+            + [week.isoformat() for week in weeks]
+        )
+        # exports.csv_chunks - formula in'ektsiyasidan himoyalangan qatorlar
+        response = HttpResponse(exports.csv_chunks(header, (
+            [row.student.get_full_name() or row.student.username, row.rate, row.present, row.absent,
+             row.late, row.excused, row.longest_absence_streak, row.current_absence_streak]
+            + row.weekly_rates
+            for row in rows
+        )), content_type=exports.FORMATS['csv'])
+        response['Content-Disposition'] = f'attachment; filename="davomat_{group.pk}_{start}_{end}.csv"'
+        return response
+    
+    return render(request, 'erp/teacher/attendance_report.html', {
+        'group': group,
+        'rows': rows,
+        'weeks': weeks,
+        'start': start,
+        'end': end,
+    })
+
 @login_required
 def teacher_homeworks(request, pk):
     if request.user.role != 'teacher':
         return redirect('dashboard')
     
     group = get_object_or_404(Group, pk=pk, teacher=request.user)
-    homeworks = Homework.objects.filter(group=group)
+    homeworks = Homework.objects.filter(group=group).annotate(submissions_count=Count('submissions'))
     return render(request, 'erp/teacher/homeworks.html', {'group': group, 'homeworks': homeworks})
 
+@login_required
+def teacher_gradebook(request, pk):
+    """Guruh baholar jurnali: o'quvchi x vazifa (keshdan, erp.reports.Gradebook)"""
+    if request.user.role not in ('teacher', 'admin'):
+        return redirect('dashboard')
+    
+    groups = Group.objects.all() if request.user.role == 'admin' else Group.objects.filter(teacher=request.user)
+    group = get_object_or_404(groups, pk=pk)
+    gradebook = get_gradebook(group)
+    return render(request, 'erp/teacher/gradebook.html', {
+        'group': group,
+        'homeworks': gradebook.columns(),
+        'rows': gradebook.rows(),
+    })
+
 @login_required
 def teacher_create_homework(request, pk):
     if request.user.role != 'teacher':
@@ -243,15 +417,57 @@ def teacher_submissions(request, pk):
         return redirect('dashboard')
     
     homework = get_object_or_404(Homework, pk=pk, group__teacher=request.user)
-    submissions = HomeworkSubmission.objects.filter(homework=homework)
+    submissions = HomeworkSubmission.objects.filter(homework=homework).select_related('student')
     return render(request, 'erp/teacher/submissions.html', {'homework': homework, 'submissions': submissions})
 
+@login_required
+def teacher_batch_grade(request, pk):
+    """Topshiriqlar sahifasidagi formadan bir nechta bahoni birdaniga qo'yish"""
+    if request.user.role != 'teacher':
+        return redirect('dashboard')
+    
+    homework = get_object_or_404(Homework.objects.select_related('group'), pk=pk, group__teacher=request.user)
+    if request.method == 'POST':
+        grades, errors = grading.clean_grades(homework, grading.entries_from_post(request.POST))
+        if errors:
+            # Hech narsa yozilmaydi - o'qituvchi xatoni tuzatib qayta yuboradi
+            for error in errors:
+                messages.error(request, error)
+        else:
+            changed, _ = grading.apply_grades(homework, grades)
+            messages.success(request, f'{changed} ta topshiriq baholandi!')
+    return redirect('teacher_submissions', pk=pk)
+
+@login_required
+def teacher_batch_grade_api(request, pk):
+    """JSON: {"grades": [[submission_id, score, feedback], ...]} - bitta tranzaksiyada"""
+    if request.user.role != 'teacher':
+        return JsonResponse({'success': False, 'error': 'Ruxsat yo\'q'}, status=403)
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Faqat POST'}, status=405)
+    
+    homework = get_object_or_404(Homework.objects.select_related('group'), pk=pk, group__teacher=request.user)
+    try:
+        entries = grading.entries_from_json(json.loads(request.body))
+    except ValueError:
+        entries = None
+    if entries is None:
+        return JsonResponse({'success': False, 'error': 'JSON noto\'g\'ri'}, status=400)
+    
+    grades, errors = grading.clean_grades(homework, entries)
+    if errors:
+        return JsonResponse({'success': False, 'errors': errors}, status=400)
+    changed, missing = grading.apply_grades(homework, grades)
+    return JsonResponse({'success': True, 'updated': changed, 'missing': missing})
+
 @login_required
 def teacher_grade_submission(request, pk):
     if request.user.role != 'teacher':
         return redirect('dashboard')
     
-    submission = get_object_or_404(HomeworkSubmission, pk=pk, homework__group__teacher=request.user)
+    submission = get_object_or_404(
+        HomeworkSubmission.objects.select_related('homework'), pk=pk, homework__group__teacher=request.user
+    )
     
     if request.method == 'POST':
         form = GradeSubmissionForm(request.POST, instance=submission)
@@ -270,16 +486,28 @@ def student_groups(request):
     if request.user.role != 'student':
         return redirect('dashboard')
     
-    groups = Group.objects.filter(group_students__student=request.user)
-    return render(request, 'erp/student/groups.html', {'groups': groups})
+    # Filtrni subquery bilan beramiz - aks holda Count faqat o'quvchining o'zini sanaydi
+    groups = _search(
+        Group.objects.filter(
+            id__in=GroupStudent.objects.filter(student=request.user).values('group_id')
+        ).select_related('teacher').annotate(students_count=Count('group_students')),
+        request.GET.get('q'), ('name', 'teacher__first_name', 'teacher__last_name')
+    )
+    page = paginate_keyset(groups, GROUP_KEYS, request.GET.get('cursor'))
+    return render(request, 'erp/student/groups.html', {
+        'groups': page.items, 'next_cursor': page.next_cursor, 'q': request.GET.get('q', '')
+    })
 
 @login_required
 def student_homeworks(request, pk):
     if request.user.role != 'student':
         return redirect('dashboard')
     
-    group = get_object_or_404(Group, pk=pk, group_students__student=request.user)
-    homeworks = Homework.objects.filter(group=group)
+    group = get_object_or_404(Group.objects.select_related('teacher'), pk=pk, group_students__student=request.user)
+    # Har vazifaga faqat shu o'quvchining topshirig'i - bitta so'rov bilan
+    homeworks = Homework.objects.filter(group=group).prefetch_related(
+        Prefetch('submissions', queryset=HomeworkSubmission.objects.filter(student=request.user))
+    )
     return render(request, 'erp/student/homeworks.html', {'group': group, 'homeworks': homeworks})
 
 @login_required
@@ -334,18 +562,168 @@ def support_requests_list(request):
     
     requests_list = SupportRequest.objects.filter(support_teacher=request.user)
     
-    pending_count = requests_list.filter(status='pending').count()
+    # Yangi so'rovlarni bitta UPDATE bilan "ko'rildi" qilish; shu vaqt belgisi
+    # bo'yicha shablon ularni hali ham "Yangi" deb ko'rsatadi
+    viewed_now = timezone.now()
+    pending_count = requests_list.filter(status='pending').update(status='viewed', viewed_at=viewed_now)
+    if pending_count:
+        # QuerySet.update signal yubormaydi
+        invalidate_users([request.user.id])
+    
+    page = paginate_keyset(
+        requests_list.select_related('student'), REQUEST_KEYS, request.GET.get('cursor')
+    )
+    return render(request, 'erp/support/requests.html', {
+        'requests': page.items,
+        'next_cursor': page.next_cursor,
+        'total_count': requests_list.count(),
+        'pending_count': pending_count,
+        'viewed_now': viewed_now,
+    })
+
+@login_required
+def support_queue(request):
+    """Rejalashtirilgan so'rovlar navbati: sana va vaqt bo'yicha, ?from= sanadan boshlab"""
+    if request.user.role != 'support_teacher':
+        return redirect('dashboard')
     
-    for req in requests_list.filter(status='pending'):
-        req.status = 'viewed'
-        req.viewed_at = timezone.now()
-        req.save()
+    start = _date_param(request.GET, 'from', timezone.localdate())
+    queue = SupportRequest.objects.filter(
+        support_teacher=request.user, scheduled_date__gte=start
+    ).select_related('student')
+    page = paginate_keyset(queue, QUEUE_KEYS, request.GET.get('cursor'))
     
-    return render(request, 'erp/support/requests.html', {
-        'requests': requests_list,
-        'pending_count': pending_count 
+    return render(request, 'erp/support/queue.html', {
+        'requests': page.items,
+        'next_cursor': page.next_cursor,
+        'start': start,
     })
+
+@login_required
+def support_schedule(request, teacher_id):
+    """Support teacher jadvali (JSON): kunlar bo'yicha band oraliqlar, bo'sh slotlar, to'qnashuvlar.
+
+    ?start=YYYY-MM-DD (standart - bugun), ?days=N (1..31). So'rovlar id'si va
+    to'qnashuvlar faqat support teacherning o'ziga va adminga ko'rsatiladi.
+    """
+    if request.user.role not in ('student', 'support_teacher', 'admin'):
+        return redirect('dashboard')
+    if request.user.role == 'support_teacher' and request.user.id != teacher_id:
+        return redirect('dashboard')
+    support_teacher = get_object_or_404(User, pk=teacher_id, role='support_teacher')
     
+    today = timezone.localdate()
+    try:
+        start = parse_date(request.GET.get('start') or '') or today
+        days = min(max(int(request.GET.get('days', 7)), 1), SCHEDULE_MAX_DAYS)
+        if abs((start - today).days) > SCHEDULE_WINDOW_DAYS:
+            raise ValueError(start)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Noto\'g\'ri parametr'}, status=400)
+    
+    detailed = request.user.role != 'student'
+    now = timezone.localtime().time()
+    result = []
+    for day, day_schedule in schedule.load(support_teacher, start, start + timedelta(days=days - 1)).items():
+        if day < today:
+            free = []
+        else:
+            free = day_schedule.free_slots(after=now if day == today else None)
+        entry = {
+            'date': day.isoformat(),
+            'busy': [
+                [schedule.to_time(begin).strftime('%H:%M'), schedule.to_time(end).strftime('%H:%M')]
+                for begin, end in day_schedule.busy()
+            ],
+            'free': [slot.strftime('%H:%M') for slot in free],
+        }
+        if detailed:
+            entry['bookings'] = [
+                {'id': request_id, 'time': schedule.to_time(begin).strftime('%H:%M')}
+                for begin, request_id in zip(day_schedule.starts, day_schedule.ids)
+            ]
+            entry['conflicts'] = day_schedule.conflicts()
+        result.append(entry)
+    
+    return JsonResponse({
+        'success': True,
+        'teacher': support_teacher.id,
+        'session_minutes': schedule.SESSION_MINUTES,
+        'days': result,
+    })
+
+def _export_group(request, pk):
+    """Eksport uchun guruh: admin - istalgan, o'qituvchi - faqat o'ziniki"""
+    if request.user.role == 'admin':
+        return get_object_or_404(Group, pk=pk)
+    return get_object_or_404(Group, pk=pk, teacher=request.user)
+
+@login_required
+def export_attendance(request, pk):
+    """Guruh davomati (?start=, ?end=, ?format=csv|xlsx) - oqim bilan"""
+    if request.user.role not in ('admin', 'teacher'):
+        return redirect('dashboard')
+    group = _export_group(request, pk)
+    
+    attendance = Attendance.objects.filter(group=group)
+    start = _date_param(request.GET, 'start')
+    end = _date_param(request.GET, 'end')
+    if start:
+        attendance = attendance.filter(date__gte=start)
+    if end:
+        attendance = attendance.filter(date__lte=end)
+    
+    statuses = dict(Attendance.STATUS_CHOICES)
+    rows = (
+        (day, first_name, last_name, username, statuses.get(status, status), notes)
+        for day, first_name, last_name, username, status, notes in attendance.order_by(
+            'date', 'student__first_name', 'student__last_name', 'student_id'
+        ).values_list(
+            'date', 'student__first_name', 'student__last_name', 'student__username', 'status', 'notes'
+        ).iterator(chunk_size=exports.CHUNK_SIZE)
+    )
+    return exports.stream_export(
+        request, f'davomat_{group.pk}_{start or "boshi"}_{end or "oxiri"}',
+        ['Sana', 'Ism', 'Familiya', 'Username', 'Holat', 'Izoh'], rows, exports.export_format(request)
+    )
+
+@login_required
+def export_gradebook(request, pk):
+    """Guruh bo'yicha barcha topshiriqlar va baholar (?format=csv|xlsx) - oqim bilan"""
+    if request.user.role not in ('admin', 'teacher'):
+        return redirect('dashboard')
+    group = _export_group(request, pk)
+    
+    statuses = dict(HomeworkSubmission.STATUS_CHOICES)
+    submissions = HomeworkSubmission.objects.filter(homework__group=group).order_by(
+        'homework__deadline', 'homework_id', 'student__first_name', 'student__last_name', 'student_id'
+    ).values_list(
+        'homework__title', 'homework__deadline', 'homework__max_score',
+        'student__first_name', 'student__last_name', 'student__username',
+        'submitted_at', 'score', 'status', 'graded_at', 'feedback',
+    )
+    rows = (
+        row[:8] + (statuses.get(row[8], row[8]),) + row[9:]
+        for row in submissions.iterator(chunk_size=exports.CHUNK_SIZE)
+    )
+    return exports.stream_export(
+        request, f'baholar_{group.pk}',
+        ['Vazifa', 'Muddat', 'Maks. ball', 'Ism', 'Familiya', 'Username',
+         'Topshirilgan', 'Ball', 'Holat', 'Baholangan', 'Izoh'],
+        rows, exports.export_format(request)
+    )
+
+@login_required
+def perf_stats(request):
+    """View'lar bo'yicha so'nggi unumdorlik o'lchovlari (JSON)"""
+    if request.user.role != 'admin':
+        return redirect('dashboard')
+    
+    if request.method == 'POST' and request.POST.get('reset'):
+        view_stats.clear()
+    
+    return JsonResponse({'views': view_stats.snapshot()})
+
     
 from django.views import View
 from django.shortcuts import render, redirect